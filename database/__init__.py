@@ -4,9 +4,21 @@ Veritabanı modelleri ve bağlantı yönetimi (PyInstaller UYUMLU)
 import sqlite3
 import os
 import sys  # sys import edildi
-from datetime import datetime
+import itertools
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from datetime import date, datetime
 from typing import Optional, List, Dict, Any
 
+from .migrations import migrate, get_schema_version, LATEST_VERSION
+from .money import register_money_types, to_minor, from_minor
+from .collation import fill_search_keys, register_turkish, turkish_search_key, turkish_sort_key
+
+# 'MONEY' sütunları (kuruş) okunurken doğrudan Decimal'e dönüşsün
+register_money_types()
+
 # --- PYINSTALLER İÇİN YARDIMCI FONKSİYON ---
 def resource_path(relative_path):
     """
@@ -25,31 +37,296 @@ def resource_path(relative_path):
 # --- YARDIMCI FONKSİYON SONU ---
 
 
+# --- SQLITE PERFORMANS PROFİLLERİ ---
+# Bağlantı açılırken (ve profil değiştiğinde havuzdan alınırken) uygulanır.
+# journal_mode veritabanı dosyasına kalıcı yazılır; diğerleri bağlantıya özeldir.
+# Havuzdaki bağlantı profiller arasında gidip geldiğinden her profil aynı
+# PRAGMA'ların tamamını belirtir (önceki profilin ayarı bağlantıda kalmasın).
+PERFORMANCE_PROFILES: Dict[str, Dict[str, Any]] = {
+    # Fiş kesme, arama, geçmiş: kısa işlemler, okuyucular yazanı bloklamasın
+    "interactive": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -16000,            # ~16 MB (negatif değer KiB cinsinden)
+        "mmap_size": 64 * 1024 * 1024,
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,
+        "wal_autocheckpoint": 1000,      # SQLite varsayılanı (sayfa)
+    },
+    # Büyük Excel/CSV içe aktarma: büyük önbellek, seyrek checkpoint
+    "bulk-import": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -131072,           # ~128 MB
+        "mmap_size": 256 * 1024 * 1024,
+        "temp_store": "MEMORY",
+        "busy_timeout": 30000,
+        "wal_autocheckpoint": 10000,
+    },
+    # Uzun raporlar: geniş mmap ve önbellek, GROUP BY/ORDER BY geçici tabloları bellekte
+    "reporting": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -65536,            # ~64 MB
+        "mmap_size": 512 * 1024 * 1024,
+        "temp_store": "MEMORY",
+        "busy_timeout": 10000,
+        "wal_autocheckpoint": 1000,
+    },
+}
+DEFAULT_PROFILE = "interactive"
+
+
+def apply_profile(connection: sqlite3.Connection, profile: str):
+    """Adı verilen performans profilinin PRAGMA'larını bağlantıya uygula"""
+    if profile not in PERFORMANCE_PROFILES:
+        raise ValueError(f"Bilinmeyen veritabanı profili: {profile}")
+    for pragma, value in PERFORMANCE_PROFILES[profile].items():
+        # Değerler yukarıdaki sabit tablodan gelir, kullanıcı girdisi değildir
+        connection.execute(f"PRAGMA {pragma} = {value}").fetchall()
+# --- PROFİLLER SONU ---
+
+
+class PooledConnection(sqlite3.Connection):
+    """
+    Havuzdan alınan sqlite3 bağlantısı.
+    close() bağlantıyı gerçekten kapatmaz, havuza geri verir; böylece
+    mevcut 'conn = get_connection() ... conn.close()' kodu değişmeden çalışır.
+    """
+    _pool = None
+    _checked_out = False
+    _profile = None  # Bağlantıya en son uygulanan performans profili
+
+    def close(self):
+        pool = self._pool
+        if pool is None:
+            super().close()
+        elif self._checked_out:
+            pool.release(self)
+        # Havuzda boşta bekleyen bağlantıda ikinci close() bir şey yapmaz
+
+    def close_physical(self):
+        """Bağlantıyı gerçekten kapat (havuzu atlayarak)"""
+        self._pool = None
+        super().close()
+
+
+class ConnectionPool:
+    """
+    Sınırlı (bounded) SQLite bağlantı havuzu.
+    Bağlantılar bir kez açılıp PRAGMA/fonksiyon kayıtlarıyla birlikte yeniden
+    kullanılır; sıcak sayfa önbelleği (page cache) korunur.
+    """
+
+    def __init__(self, db: "DatabaseConnection", max_size: int = 5, timeout: float = 10.0,
+                 profile: str = DEFAULT_PROFILE):
+        self.db = db
+        self.max_size = max_size
+        self.timeout = timeout
+        self.profile = profile  # Profil verilmeden alınan bağlantıların profili
+        self._idle: List[PooledConnection] = []
+        self._size = 0  # Havuza ait (boşta + kullanımda) bağlantı sayısı
+        self._closed = False
+        self._cond = threading.Condition(threading.RLock())
+        self._stats = {
+            'checkouts': 0,      # Toplam alım
+            'reused': 0,         # Boştaki bağlantı yeniden kullanıldı
+            'created': 0,        # Yeni bağlantı açıldı
+            'waits': 0,          # Boş bağlantı için beklenmek zorunda kalındı
+            'timeouts': 0,       # Süre aşımı
+            'lost': 0,           # close() çağrılmadan kaybolan bağlantılar
+            'total_wait_ms': 0.0,
+            'max_wait_ms': 0.0,
+        }
+
+    def acquire(self, profile: Optional[str] = None) -> PooledConnection:
+        """Havuzdan bir bağlantı al (gerekirse yenisini aç)"""
+        profile = profile or self.profile
+        started = time.perf_counter()
+        waited = False
+        with self._cond:
+            if self._closed:
+                raise sqlite3.ProgrammingError("Bağlantı havuzu kapatıldı.")
+            while not self._idle and self._size >= self.max_size:
+                waited = True
+                remaining = self.timeout - (time.perf_counter() - started)
+                if remaining <= 0 or not self._cond.wait(remaining):
+                    if not self._idle and self._size >= self.max_size:
+                        self._stats['timeouts'] += 1
+                        raise sqlite3.OperationalError(
+                            f"Bağlantı havuzundan {self.timeout} sn içinde bağlantı alınamadı "
+                            f"(boyut: {self.max_size})."
+                        )
+            if self._idle:
+                conn = self._idle.pop()  # LIFO: en son kullanılan (en sıcak) bağlantı
+                self._stats['reused'] += 1
+            else:
+                conn = None
+                self._size += 1  # Yer ayır, bağlantıyı kilit dışında aç
+
+        if conn is None:
+            try:
+                conn = self._create()
+            except BaseException:
+                with self._cond:
+                    self._size -= 1
+                    self._cond.notify()
+                raise
+
+        if conn._profile != profile:
+            try:
+                apply_profile(conn, profile)
+                conn._profile = profile
+            except BaseException:
+                conn._checked_out = True
+                conn.close()
+                raise
+
+        conn._checked_out = True
+        wait_ms = (time.perf_counter() - started) * 1000
+        with self._cond:
+            self._stats['checkouts'] += 1
+            if waited:
+                self._stats['waits'] += 1
+            self._stats['total_wait_ms'] += wait_ms
+            self._stats['max_wait_ms'] = max(self._stats['max_wait_ms'], wait_ms)
+        return conn
+
+    def release(self, conn: PooledConnection):
+        """Bağlantıyı havuza iade et"""
+        if conn._pool is not self or not conn._checked_out:
+            return  # Zaten iade edilmiş
+        conn._checked_out = False
+        try:
+            # Yarım kalmış işlemleri geri al, varsayılan ayarları geri yükle
+            if conn.in_transaction:
+                conn.rollback()
+            conn.row_factory = sqlite3.Row
+            reusable = True
+        except sqlite3.Error:
+            reusable = False
+
+        with self._cond:
+            if reusable and not self._closed:
+                self._idle.append(conn)
+            else:
+                self._discard(conn)
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self, profile: Optional[str] = None):
+        """'with pool.connection() as conn:' kullanımı için"""
+        conn = self.acquire(profile)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def close_all(self):
+        """Boştaki bağlantıları kapat ve havuzu kapat"""
+        with self._cond:
+            self._closed = True
+            while self._idle:
+                self._discard(self._idle.pop())
+            self._cond.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        """Havuz istatistikleri (alım gecikmesi dahil)"""
+        with self._cond:
+            stats = dict(self._stats)
+            stats['size'] = self._size
+            stats['idle'] = len(self._idle)
+            stats['in_use'] = self._size - len(self._idle)
+            stats['max_size'] = self.max_size
+            stats['profile'] = self.profile
+        checkouts = stats['checkouts']
+        stats['avg_wait_ms'] = stats['total_wait_ms'] / checkouts if checkouts else 0.0
+        return stats
+
+    def _create(self) -> PooledConnection:
+        conn = self.db.create_connection(factory=PooledConnection)
+        conn._pool = self
+        # close() çağrılmadan çöpe giden bağlantılar havuzda yer tutmasın
+        conn._finalizer = weakref.finalize(conn, self._on_lost)
+        with self._cond:
+            self._stats['created'] += 1
+        return conn
+
+    def _discard(self, conn: PooledConnection):
+        # Kilit tutulurken çağrılır
+        finalizer = getattr(conn, '_finalizer', None)
+        if finalizer is not None:
+            finalizer.detach()
+        self._size -= 1
+        try:
+            conn.close_physical()
+        except sqlite3.Error:
+            pass
+
+    def _on_lost(self):
+        with self._cond:
+            self._size -= 1
+            self._stats['lost'] += 1
+            self._cond.notify()
+
+
+def day_number(value) -> int:
+    """datetime/date -> YYYYMMDD tam sayı gün numarası (invoices.invoice_day)"""
+    return value.year * 10000 + value.month * 100 + value.day
+
+
+def day_from_number(day: int) -> date:
+    """YYYYMMDD tam sayı gün numarası -> date"""
+    return date(day // 10000, day // 100 % 100, day % 100)
+
+
+DEFAULT_DB_FILE = "forklift_system.db"
+MEMORY_DB = ":memory:"
+
+
 class DatabaseConnection:
     """SQLite veritabanı bağlantı yöneticisi"""
+
+    _memory_ids = itertools.count(1)
     
-    def __init__(self, db_path: str = "forklift_system.db"):
-        # --- VERİTABANI YOLU GÜNCELLENDİ ---
-        # self.db_path = db_path # ESKİ
-        self.db_path = resource_path(db_path) # YENİ
-        # --- GÜNCELLEME SONU ---
+    def __init__(self, db_path: str = DEFAULT_DB_FILE):
+        self.is_memory = db_path == MEMORY_DB
+        if self.is_memory:
+            # Havuzdaki tüm bağlantılar aynı bellek içi veritabanını görsün (shared cache)
+            self.db_path = f"file:forklift_memdb_{next(self._memory_ids)}?mode=memory&cache=shared"
+        else:
+            # --- VERİTABANI YOLU GÜNCELLENDİ ---
+            # self.db_path = db_path # ESKİ
+            self.db_path = resource_path(db_path) # YENİ
+            # --- GÜNCELLEME SONU ---
         self.connection = None
-        print(f"DEBUG: Veritabanı yolu ayarlandı: {self.db_path}") # Yolu kontrol et
+        self._memory_anchor = None  # Bellek içi veritabanı son bağlantı kapanınca silinmesin
         
     def connect(self):
         """Veritabanına bağlan (YEREL SAAT ZORUNLULUĞU DÜZELTMESİ)"""
-        
+        self.connection = self.create_connection()
+        return self.connection
+
+    def create_connection(self, factory=sqlite3.Connection):
+        """Yeni, yapılandırılmış bir sqlite3 bağlantısı aç (havuz da bunu kullanır)"""
         try:
-            self.connection = sqlite3.connect(
+            if self.is_memory and self._memory_anchor is None:
+                self._memory_anchor = sqlite3.connect(self.db_path, uri=True, check_same_thread=False)
+            connection = sqlite3.connect(
                 self.db_path,
                 detect_types=sqlite3.PARSE_DECLTYPES | sqlite3.PARSE_COLNAMES,
-                timeout=10
+                timeout=10,
+                factory=factory,
+                check_same_thread=False,  # Havuzdaki bağlantılar farklı thread'lerde kullanılabilir
+                uri=self.is_memory
             )
-            self.connection.create_function("DATETIME_LOCAL", 1, lambda ts: datetime.fromisoformat(ts).astimezone().isoformat())
-            self.connection.row_factory = sqlite3.Row
-            self.connection.execute("PRAGMA foreign_keys = ON")
-            self.connection.execute("PRAGMA encoding = 'UTF-8'")
-            return self.connection
+            connection.create_function("DATETIME_LOCAL", 1, lambda ts: datetime.fromisoformat(ts).astimezone().isoformat())
+            # Türkçe arama/sıralama anahtarları (yazma sorguları kullanır) ve COLLATE TURKISH
+            register_turkish(connection)
+            connection.row_factory = sqlite3.Row
+            connection.execute("PRAGMA foreign_keys = ON")
+            connection.execute("PRAGMA encoding = 'UTF-8'")
+            return connection
             
         except sqlite3.OperationalError as e:
             print(f"KRİTİK HATA: Veritabanı dosyasına bağlanılamadı!")
@@ -70,6 +347,9 @@ class DatabaseConnection:
         if self.connection:
             self.connection.close()
             self.connection = None
+        if self._memory_anchor:
+            self._memory_anchor.close()
+            self._memory_anchor = None
     
     def get_cursor(self):
         """Cursor nesnesi al"""
@@ -80,143 +360,159 @@ class DatabaseConnection:
 
 
 class DatabaseManager:
-    """Veritabanı işlemleri yöneticisi"""
+    """
+    Veritabanı işlemleri yöneticisi.
+    Oluşturulması yan etkisizdir; dosya açma ve şema göçleri ilk kullanımda
+    (veya açıkça init() çağrıldığında) yapılır.
+    """
     
-    def __init__(self):
-        self.db = DatabaseConnection() # resource_path'ı kullanan sınıfı başlat
-        self.init_database()
+    def __init__(self, db_path: Optional[str] = None, pool_size: int = 5):
+        # FORKLIFT_DB ortam değişkeni ile farklı dosya (veya ':memory:') seçilebilir
+        self.db_path = db_path or os.environ.get("FORKLIFT_DB", DEFAULT_DB_FILE)
+        self.pool_size = pool_size
+        self._db: Optional[DatabaseConnection] = None
+        self._pool: Optional[ConnectionPool] = None
+        self._init_lock = threading.Lock()
+        # PRAGMA data_version yalnızca BAŞKA bağlantıların commit'lerini gösterir;
+        # bu yüzden havuz dışında ayrı bir izleme bağlantısı tutulur
+        self._monitor: Optional[sqlite3.Connection] = None
+        self._monitor_lock = threading.Lock()
+
+    def init(self, db_path: Optional[str] = None, pool_size: Optional[int] = None) -> "DatabaseManager":
+        """
+        Veritabanını açıkça başlat. db_path verilirse (dosya yolu veya ':memory:')
+        mevcut bağlantılar kapatılıp yeni veritabanına geçilir.
+        """
+        with self._init_lock:
+            if db_path is not None and db_path != self.db_path:
+                self._shutdown()
+                self.db_path = db_path
+            if pool_size is not None and pool_size != self.pool_size:
+                self._shutdown()
+                self.pool_size = pool_size
+            if self._pool is None:
+                db = DatabaseConnection(self.db_path) # resource_path'ı kullanan sınıfı başlat
+                print(f"DEBUG: Veritabanı yolu ayarlandı: {db.db_path}") # Yolu kontrol et
+                self._db = db
+                self.init_database()
+                self._pool = ConnectionPool(db, max_size=self.pool_size)
+        return self
+
+    @property
+    def is_initialized(self) -> bool:
+        return self._pool is not None
+
+    @property
+    def db(self) -> DatabaseConnection:
+        if self._db is None:
+            self.init()
+        return self._db
+
+    @property
+    def pool(self) -> ConnectionPool:
+        if self._pool is None:
+            self.init()
+        return self._pool
     
     def init_database(self):
-        """Veritabanı tablolarını oluştur (Son isteklere göre güncellendi)"""
+        """Veritabanı şemasını güncelle (bekleyen göçleri uygula, eksik arama anahtarlarını doldur)"""
         conn = self.db.connect()
-        cursor = conn.cursor()
-        
-        # Müşteriler tablosu (Telefon/Eposta YOK)
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS customers (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL UNIQUE,
-                address TEXT,
-                tax_number TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        # Ürünler tablosu (birim fiyatı eklendi)
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS products (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                code TEXT UNIQUE NOT NULL,
-                name TEXT NOT NULL,
-                description TEXT,
-                unit_price NUMERIC(10, 2) DEFAULT 0.0,
-                category TEXT,
-                brand TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        # Fişler tablosu (discount_amount eklendi, fiyatlar REAL yerine NUMERIC)
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS invoices (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                invoice_number TEXT UNIQUE NOT NULL,
-                customer_id INTEGER,
-                customer_name TEXT NOT NULL,
-                customer_address TEXT,
-                delivery_person TEXT,
-                receiver_person TEXT,
-                subtotal NUMERIC(10, 2) DEFAULT 0.0,
-                discount_amount NUMERIC(10, 2) DEFAULT 0.0, -- İNDİRİM ALANI EKLENDİ
-                tax_rate NUMERIC(5, 2) DEFAULT 0.20,
-                tax_amount NUMERIC(10, 2) DEFAULT 0.0,
-                total_amount NUMERIC(10, 2) DEFAULT 0.0,
-                invoice_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (customer_id) REFERENCES customers (id) ON DELETE SET NULL -- Müşteri silinirse fiş kalsın
-            )
-        """)
-        
-        # Fiş detayları tablosu (fiyatlar REAL yerine NUMERIC)
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS invoice_items (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                invoice_id INTEGER NOT NULL,
-                product_id INTEGER,
-                product_code TEXT NOT NULL,
-                product_name TEXT NOT NULL,
-                quantity INTEGER NOT NULL,
-                unit_price NUMERIC(10, 2) NOT NULL,
-                total_price NUMERIC(10, 2) NOT NULL,
-                FOREIGN KEY (invoice_id) REFERENCES invoices (id) ON DELETE CASCADE, -- Fiş silinince item'lar da silinsin
-                FOREIGN KEY (product_id) REFERENCES products (id) ON DELETE SET NULL -- Ürün silinirse item kalsın (kodu/adı tutulur)
-            )
-        """)
-        
-        # Kullanıcılar tablosu (Değişiklik yok)
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                username TEXT UNIQUE NOT NULL,
-                password_hash TEXT NOT NULL,
-                full_name TEXT NOT NULL,
-                role TEXT DEFAULT 'user',
-                is_active BOOLEAN DEFAULT 1,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        # E-posta ayarları tablosu (Değişiklik yok)
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS email_settings (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                smtp_host TEXT NOT NULL,
-                smtp_port INTEGER NOT NULL,
-                username TEXT NOT NULL,
-                password TEXT NOT NULL,
-                use_ssl BOOLEAN DEFAULT 1,
-                is_active BOOLEAN DEFAULT 1,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        # --- TABLO GÜNCELLEMELERİ (ALTER TABLE) ---
-        # Bu kısım, mevcut tablolara eksik sütunları ekler (hata vermez)
-        print("DEBUG: Tablo sütunları kontrol ediliyor/güncelleniyor...")
-        self._add_column_if_not_exists(cursor, "invoices", "discount_amount", "NUMERIC(10, 2) DEFAULT 0.0")
-        self._add_column_if_not_exists(cursor, "products", "description", "TEXT")
-        self._add_column_if_not_exists(cursor, "products", "unit_price", "NUMERIC(10, 2) DEFAULT 0.0")
-        self._add_column_if_not_exists(cursor, "products", "category", "TEXT")
-        self._add_column_if_not_exists(cursor, "products", "brand", "TEXT")
-        # Müşteriden tel/eposta kaldırma (ALTER TABLE DROP COLUMN SQLite'ta zordur, şimdilik kalabilirler)
-        # self._remove_column_... (Bu işlemi yapmak karmaşıktır, veriyi kaybetmemek için yapılmaz)
-        print("DEBUG: Tablo güncelleme kontrolü bitti.")
-        # --- GÜNCELLEME SONU ---
-        
-        conn.commit()
-        conn.close()
-    
-    def _add_column_if_not_exists(self, cursor, table_name, column_name, column_type):
-        """Tabloya sütun ekler (eğer zaten yoksa)"""
         try:
-            cursor.execute(f"PRAGMA table_info({table_name});")
-            columns = [info[1] for info in cursor.fetchall()]
-            if column_name not in columns:
-                print(f"DEBUG: '{table_name}' tablosuna '{column_name}' sütunu ekleniyor...")
-                cursor.execute(f"ALTER TABLE {table_name} ADD COLUMN {column_name} {column_type};")
-                print(f"DEBUG: '{column_name}' sütunu eklendi.")
-            # else:
-            #     print(f"DEBUG: '{column_name}' sütunu '{table_name}' tablosunda zaten var.")
-        except sqlite3.Error as e:
-            print(f"UYARI: '{column_name}' sütunu eklenirken hata (belki zaten vardı?): {e}")
-
-    def get_connection(self):
-        """Veritabanı bağlantısı al"""
-        return self.db.connect()
-
-
-# Singleton instance
+            # Şema güncelse tek bir PRAGMA okuması yeterli
+            if get_schema_version(conn) < LATEST_VERSION:
+                migrate(conn)
+            # Uygulama dışından (sqlite3 komut satırı vb.) eklenmiş/değiştirilmiş satırların
+            # anahtarları; bayat satır yoksa tablo başına tek indeks araması yapılır
+            fill_search_keys(conn)
+            conn.commit()
+        finally:
+            conn.close()
+
+    def get_connection(self, profile: Optional[str] = None):
+        """Havuzdan veritabanı bağlantısı al (conn.close() bağlantıyı havuza iade eder)"""
+        return self.pool.acquire(profile)
+
+    def connection(self, profile: Optional[str] = None):
+        """Havuzdan bağlantı alan context manager: 'with db_manager.connection() as conn:'"""
+        return self.pool.connection(profile)
+
+    @contextmanager
+    def read_snapshot(self, count: int = 1, profile: Optional[str] = "reporting"):
+        """
+        Aynı anlık görüntüyü (WAL okuma işlemi) gören salt okunur bağlantılar:
+        'with db_manager.read_snapshot(3) as conns:'. Bağlantılar ayrı thread'lerde
+        paralel sorgu çalıştırabilir; hepsi aynı commit'e kadarki veriyi görür.
+
+        Okuyucular işlemlerini başlatırken ayrı bir bağlantı yazma kilidini
+        (BEGIN IMMEDIATE) kısa süre tutar; arada commit olamayacağı için tüm
+        okuma işlemleri aynı noktadan başlar. Bellek içi veritabanında (shared
+        cache, paralel okuma yok) ve havuz küçükse daha az bağlantı dönebilir.
+        """
+        pool = self.pool
+        count = 1 if self.db.is_memory else max(1, min(count, pool.max_size - 1))
+        readers: List[PooledConnection] = []
+        gate = None
+        try:
+            for _ in range(count):
+                readers.append(pool.acquire(profile))
+            if count > 1:
+                gate = pool.acquire(profile)
+                gate.execute("BEGIN IMMEDIATE")
+            for conn in readers:
+                conn.execute("PRAGMA query_only = ON")
+                conn.execute("BEGIN")
+                # Okuma işlemi ilk okumada başlar; anlık görüntüyü kilit tutulurken al
+                conn.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+            if gate is not None:
+                gate.rollback()
+                gate.close()
+                gate = None
+            yield readers
+        finally:
+            if gate is not None:
+                gate.close()  # Havuza iade yarım işlemi geri alır
+            for conn in readers:
+                try:
+                    if conn.in_transaction:
+                        conn.rollback()
+                    conn.execute("PRAGMA query_only = OFF")
+                except sqlite3.Error:
+                    pass
+                conn.close()
+
+    def data_version(self) -> int:
+        """
+        Veritabanı değişiklik sayacı (PRAGMA data_version). Herhangi bir bağlantı
+        (havuzdakiler veya başka bir uygulama örneği) commit ettikçe değişir.
+        Önbellekler zaman aşımı yerine bununla geçersiz kılınır.
+        """
+        db = self.db
+        with self._monitor_lock:
+            if self._monitor is None:
+                self._monitor = db.create_connection()
+            return self._monitor.execute("PRAGMA data_version").fetchone()[0]
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """Bağlantı havuzu istatistikleri (başlatılmadıysa boş)"""
+        return self._pool.stats() if self._pool is not None else {}
+
+    def close(self):
+        """Havuzdaki tüm bağlantıları kapat (uygulama kapanırken). Sonraki kullanımda yeniden başlar."""
+        with self._init_lock:
+            self._shutdown()
+
+    def _shutdown(self):
+        with self._monitor_lock:
+            if self._monitor is not None:
+                self._monitor.close()
+                self._monitor = None
+        if self._pool is not None:
+            self._pool.close_all()
+            self._pool = None
+        if self._db is not None:
+            self._db.disconnect()
+            self._db = None
+
+
+# Singleton instance (tembel: ilk get_connection() veya init() çağrısında başlar)
 db_manager = DatabaseManager()
\ No newline at end of file
@@ -0,0 +1,113 @@
+"""
+Türkçe büyük/küçük harf katlama, aksan duyarsız arama anahtarı ve sıralama
+
+SQLite'ın LOWER() fonksiyonu yalnızca ASCII harfleri küçültür; 'İ/ı/Ş/Ğ/Ç/Ö/Ü'
+katlanmaz ve ORDER BY bayt sırasıyla çalışır. Bu modüldeki fonksiyonlar her
+bağlantıya kaydedilir (register_turkish):
+
+  TR_SEARCH_KEY(x) : arama anahtarı ("KEÇE İĞNE" -> "kece igne")
+  TR_SORT_KEY(x)   : BINARY karşılaştırmada Türk alfabesi sırası veren anahtar
+  COLLATE TURKISH  : sütun anahtarı olmayan ad hoc sıralamalar için
+
+products/customers tablolarındaki *_key sütunları indekslenir; arama ve
+sıralama Python'a düşmeden indeksle yapılır. Anahtarları uygulamanın yazma
+yolları (INSERT/upsert) hesaplar. Şema tetikleyicileri bu fonksiyonları
+kullanmaz: Python fonksiyonu kayıtlı olmayan araçlar (sqlite3 komut satırı,
+DB Browser, onarım betikleri) tablolara yazabilmelidir. Öyle eklenen ya da
+adı değiştirilen satırların anahtarlarını fill_search_keys() açılışta yeniden
+hesaplar.
+"""
+import sqlite3
+import unicodedata
+from functools import lru_cache
+from typing import Dict
+
+# Türk alfabesi (q, w, x dahil) sırası
+TURKISH_ALPHABET = "abcçdefgğhıijklmnoöpqrsştuüvwxyz"
+
+# Sıralama anahtarında harfler özel kullanım alanına (U+E000...) eşlenir:
+# rakam, boşluk ve noktalama işaretleri harflerden önce gelir.
+_SORT_MAP = {ch: chr(0xE000 + i) for i, ch in enumerate(TURKISH_ALPHABET)}
+
+# Türkçe harflerin aksansız karşılıkları (arama anahtarı)
+_ASCII_FOLD = str.maketrans("çğıöşü", "cgiosu")
+
+
+def turkish_casefold(text: str) -> str:
+    """Türkçe kurallarla küçük harfe çevir ('I' -> 'ı', 'İ' -> 'i')"""
+    return text.replace("I", "ı").replace("İ", "i").lower()
+
+
+def _strip_combining(text: str) -> str:
+    """Birleşik aksan işaretlerini kaldır (é -> e, â -> a)"""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+@lru_cache(maxsize=4096)
+def turkish_search_key(text):
+    """Büyük/küçük harf ve aksan duyarsız arama anahtarı ("KEÇE" ve "kece" -> "kece")"""
+    if text is None:
+        return None
+    folded = turkish_casefold(str(text)).translate(_ASCII_FOLD)
+    return " ".join(_strip_combining(folded).split())
+
+
+@lru_cache(maxsize=4096)
+def turkish_sort_key(text):
+    """BINARY karşılaştırıldığında Türk alfabesi sırasını veren anahtar (c < ç < d, ı < i)"""
+    if text is None:
+        return None
+    key = []
+    for ch in turkish_casefold(str(text)):
+        mapped = _SORT_MAP.get(ch)
+        if mapped is None:
+            base = _strip_combining(ch)
+            mapped = _SORT_MAP.get(base, base)
+        key.append(mapped)
+    return "".join(key)
+
+
+def turkish_collation(left: str, right: str) -> int:
+    """COLLATE TURKISH karşılaştırması"""
+    left_key, right_key = turkish_sort_key(left), turkish_sort_key(right)
+    return (left_key > right_key) - (left_key < right_key)
+
+
+def register_turkish(conn: sqlite3.Connection):
+    """Türkçe fonksiyonları ve TURKISH sıralamasını bağlantıya kaydet"""
+    conn.create_function("TR_SEARCH_KEY", 1, turkish_search_key, deterministic=True)
+    conn.create_function("TR_SORT_KEY", 1, turkish_sort_key, deterministic=True)
+    conn.create_collation("TURKISH", turkish_collation)
+
+
+# Tablo -> (indeksli işaret anahtarı, {anahtar sütunu: (fonksiyon, kaynak sütun)}).
+# İşaret anahtarı NULL olan satırın anahtarları eksik ya da bayattır: dışarıdan
+# eklenen satırlarda boş kalır, kaynak sütun anahtarlara dokunulmadan
+# değiştirilirse tetikleyici (göç 13) onu NULL yapar.
+SEARCH_KEY_COLUMNS = {
+    "products": ("sort_key", {"code_key": ("TR_SEARCH_KEY", "code"), "name_key": ("TR_SEARCH_KEY", "name"),
+                              "sort_key": ("TR_SORT_KEY", "name")}),
+    "customers": ("sort_key", {"name_key": ("TR_SEARCH_KEY", "name"), "sort_key": ("TR_SORT_KEY", "name")}),
+    "invoices": ("customer_key", {"customer_key": ("TR_SEARCH_KEY", "customer_name")}),
+}
+
+
+def fill_search_keys(conn: sqlite3.Connection, rebuild: bool = False) -> Dict[str, int]:
+    """
+    İşaret anahtarı NULL olan satırların arama/sıralama anahtarlarını yeniden
+    hesapla; rebuild=True ise tüm satırlarınkini. Bağlantıda register_turkish()
+    çağrılmış olmalıdır. Tablo başına güncellenen satır sayısını döndürür;
+    işlemi çağıran commit eder.
+    """
+    updated = {}
+    for table, (marker, keys) in SEARCH_KEY_COLUMNS.items():
+        assignments = ", ".join(f"{key} = {function}({source})" for key, (function, source) in keys.items())
+        condition = "1" if rebuild else f"{marker} IS NULL"
+        # İşaret sütunu indeksli: eksik anahtar yoksa bu tek indeks araması yeterli,
+        # yazma kilidi de alınmaz
+        if not rebuild and conn.execute(f"SELECT 1 FROM {table} WHERE {condition} LIMIT 1").fetchone() is None:
+            updated[table] = 0
+            continue
+        updated[table] = conn.execute(f"UPDATE {table} SET {assignments} WHERE {condition}").rowcount
+    return updated
@@ -1,6 +1,6 @@
 """
 Veritabanı bağlantı yönetimi
 """
-from . import DatabaseConnection, DatabaseManager
+from . import DatabaseConnection, DatabaseManager, ConnectionPool, PooledConnection, db_manager
 
-__all__ = ['DatabaseConnection', 'DatabaseManager', 'db_manager']
+__all__ = ['DatabaseConnection', 'DatabaseManager', 'ConnectionPool', 'PooledConnection', 'db_manager']
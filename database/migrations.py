@@ -0,0 +1,615 @@
+"""
+Sürümlü şema göçleri (PRAGMA user_version)
+
+Her göç bir kez, kendi işlemi (transaction) içinde uygulanır ve sonunda
+user_version göçün numarasına yükseltilir. Şema güncelse açılışta yalnızca
+tek bir 'PRAGMA user_version' okunur; tablo/sütun kontrolü yapılmaz.
+
+Yeni göç eklemek için fonksiyonu yazıp MIGRATIONS listesinin sonuna ekleyin.
+Mevcut göçler değiştirilmemelidir (kullanıcı veritabanlarında zaten uygulandılar).
+"""
+import sqlite3
+from typing import Callable, List, NamedTuple, Optional
+
+from .rollups import (create_daily_sales, rebuild_daily_sales,
+                      create_product_daily_sales, rebuild_product_daily_sales,
+                      create_customer_stats, rebuild_customer_stats)
+
+
+class Migration(NamedTuple):
+    version: int
+    description: str
+    apply: Callable[[sqlite3.Connection], None]
+    # Tablo yeniden oluşturan göçlerde ON DELETE CASCADE tetiklenmesin diye
+    disable_foreign_keys: bool = False
+
+
+def _add_column_if_not_exists(conn: sqlite3.Connection, table_name: str, column_name: str, column_type: str):
+    """Tabloya sütun ekler (eğer zaten yoksa) - yalnızca göçler içinde kullanılır"""
+    columns = [info[1] for info in conn.execute(f"PRAGMA table_info({table_name})").fetchall()]
+    if column_name not in columns:
+        print(f"DEBUG: '{table_name}' tablosuna '{column_name}' sütunu ekleniyor...")
+        conn.execute(f"ALTER TABLE {table_name} ADD COLUMN {column_name} {column_type}")
+
+
+def _m001_base_schema(conn: sqlite3.Connection):
+    """Temel tablolar (ve eski veritabanlarında eksik olabilecek sütunlar)"""
+    # Müşteriler tablosu (Telefon/Eposta YOK)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS customers (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL UNIQUE,
+            address TEXT,
+            tax_number TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    # Ürünler tablosu (birim fiyatı eklendi)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS products (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            code TEXT UNIQUE NOT NULL,
+            name TEXT NOT NULL,
+            description TEXT,
+            unit_price NUMERIC(10, 2) DEFAULT 0.0,
+            category TEXT,
+            brand TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    # Fişler tablosu (discount_amount eklendi, fiyatlar REAL yerine NUMERIC)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS invoices (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            invoice_number TEXT UNIQUE NOT NULL,
+            customer_id INTEGER,
+            customer_name TEXT NOT NULL,
+            customer_address TEXT,
+            delivery_person TEXT,
+            receiver_person TEXT,
+            subtotal NUMERIC(10, 2) DEFAULT 0.0,
+            discount_amount NUMERIC(10, 2) DEFAULT 0.0, -- İNDİRİM ALANI EKLENDİ
+            tax_rate NUMERIC(5, 2) DEFAULT 0.20,
+            tax_amount NUMERIC(10, 2) DEFAULT 0.0,
+            total_amount NUMERIC(10, 2) DEFAULT 0.0,
+            invoice_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (customer_id) REFERENCES customers (id) ON DELETE SET NULL -- Müşteri silinirse fiş kalsın
+        )
+    """)
+
+    # Fiş detayları tablosu (fiyatlar REAL yerine NUMERIC)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS invoice_items (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            invoice_id INTEGER NOT NULL,
+            product_id INTEGER,
+            product_code TEXT NOT NULL,
+            product_name TEXT NOT NULL,
+            quantity INTEGER NOT NULL,
+            unit_price NUMERIC(10, 2) NOT NULL,
+            total_price NUMERIC(10, 2) NOT NULL,
+            FOREIGN KEY (invoice_id) REFERENCES invoices (id) ON DELETE CASCADE, -- Fiş silinince item'lar da silinsin
+            FOREIGN KEY (product_id) REFERENCES products (id) ON DELETE SET NULL -- Ürün silinirse item kalsın (kodu/adı tutulur)
+        )
+    """)
+
+    # Kullanıcılar tablosu
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            password_hash TEXT NOT NULL,
+            full_name TEXT NOT NULL,
+            role TEXT DEFAULT 'user',
+            is_active BOOLEAN DEFAULT 1,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    # E-posta ayarları tablosu
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS email_settings (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            smtp_host TEXT NOT NULL,
+            smtp_port INTEGER NOT NULL,
+            username TEXT NOT NULL,
+            password TEXT NOT NULL,
+            use_ssl BOOLEAN DEFAULT 1,
+            is_active BOOLEAN DEFAULT 1,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    # Eski sürümlerden kalan veritabanlarında eksik olabilecek sütunlar
+    # (eski update_db_schema.py betiğinin yaptığı discount_amount eklemesi dahil)
+    _add_column_if_not_exists(conn, "invoices", "discount_amount", "NUMERIC(10, 2) DEFAULT 0.0")
+    _add_column_if_not_exists(conn, "products", "description", "TEXT")
+    _add_column_if_not_exists(conn, "products", "unit_price", "NUMERIC(10, 2) DEFAULT 0.0")
+    _add_column_if_not_exists(conn, "products", "category", "TEXT")
+    _add_column_if_not_exists(conn, "products", "brand", "TEXT")
+    # InvoiceManager müşteri kaydında/okumasında hâlâ phone/email kullanıyor
+    _add_column_if_not_exists(conn, "customers", "phone", "TEXT")
+    _add_column_if_not_exists(conn, "customers", "email", "TEXT")
+
+
+def _m002_report_indexes(conn: sqlite3.Connection):
+    """Raporların filtrelediği/birleştirdiği sütunlar için ikincil indeksler"""
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_invoices_invoice_date ON invoices (invoice_date)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_invoices_customer_name ON invoices (customer_name)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_invoice_items_invoice_id ON invoice_items (invoice_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_invoice_items_product_code ON invoice_items (product_code, invoice_id)")
+    conn.execute("ANALYZE")
+
+
+def _rebuild_with_money_columns(conn: sqlite3.Connection, table: str, create_sql: str, money_columns: List[str]):
+    """
+    Tabloyu yeni tanımla yeniden oluşturur; tutar sütunları kuruşa çevrilerek kopyalanır.
+    Eski tabloda olmayan sütunlar (çok eski veritabanları) varsayılan değerlerini alır.
+    """
+    conn.execute(create_sql.format(table=f"{table}_new"))
+    old_columns = {info[1] for info in conn.execute(f"PRAGMA table_info({table})").fetchall()}
+    new_columns = [info[1] for info in conn.execute(f"PRAGMA table_info({table}_new)").fetchall()]
+    columns = [col for col in new_columns if col in old_columns]
+    select = [
+        f"CAST(ROUND(COALESCE({col}, 0) * 100) AS INTEGER)" if col in money_columns else col
+        for col in columns
+    ]
+    conn.execute(
+        f"INSERT INTO {table}_new ({', '.join(columns)}) SELECT {', '.join(select)} FROM {table}"
+    )
+
+
+def _m003_money_minor_units(conn: sqlite3.Connection):
+    """Tutar sütunlarını NUMERIC(10,2) yerine tam sayı kuruş (MONEY INTEGER) olarak sakla"""
+    # SQLite sütun tipini değiştiremediği için tablolar yeniden oluşturulur
+    _rebuild_with_money_columns(conn, "products", """
+        CREATE TABLE {table} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            code TEXT UNIQUE NOT NULL,
+            name TEXT NOT NULL,
+            description TEXT,
+            unit_price MONEY INTEGER DEFAULT 0, -- kuruş
+            category TEXT,
+            brand TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """, ["unit_price"])
+
+    _rebuild_with_money_columns(conn, "invoices", """
+        CREATE TABLE {table} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            invoice_number TEXT UNIQUE NOT NULL,
+            customer_id INTEGER,
+            customer_name TEXT NOT NULL,
+            customer_address TEXT,
+            delivery_person TEXT,
+            receiver_person TEXT,
+            subtotal MONEY INTEGER DEFAULT 0, -- kuruş
+            discount_amount MONEY INTEGER DEFAULT 0, -- kuruş
+            tax_rate NUMERIC(5, 2) DEFAULT 0.20,
+            tax_amount MONEY INTEGER DEFAULT 0, -- kuruş
+            total_amount MONEY INTEGER DEFAULT 0, -- kuruş
+            invoice_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (customer_id) REFERENCES customers (id) ON DELETE SET NULL
+        )
+    """, ["subtotal", "discount_amount", "tax_amount", "total_amount"])
+
+    _rebuild_with_money_columns(conn, "invoice_items", """
+        CREATE TABLE {table} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            invoice_id INTEGER NOT NULL,
+            product_id INTEGER,
+            product_code TEXT NOT NULL,
+            product_name TEXT NOT NULL,
+            quantity INTEGER NOT NULL,
+            unit_price MONEY INTEGER NOT NULL, -- kuruş
+            total_price MONEY INTEGER NOT NULL, -- kuruş
+            FOREIGN KEY (invoice_id) REFERENCES invoices (id) ON DELETE CASCADE,
+            FOREIGN KEY (product_id) REFERENCES products (id) ON DELETE SET NULL
+        )
+    """, ["unit_price", "total_price"])
+
+    for table in ("invoice_items", "invoices", "products"):
+        conn.execute(f"DROP TABLE {table}")
+    for table in ("products", "invoices", "invoice_items"):
+        conn.execute(f"ALTER TABLE {table}_new RENAME TO {table}")
+
+    # Tablo silinince indeksleri de gitti (göç 2)
+    _m002_report_indexes(conn)
+
+
+def _m004_invoice_day(conn: sqlite3.Connection):
+    """
+    invoices.invoice_day: YYYYMMDD biçiminde tam sayı gün numarası (ör. 20240501).
+    Tarih filtreleri/gruplamaları DATE()/strftime() yerine bu indeksli sütun üzerinden
+    aralık sorgusu olarak yazılır. Uygulama değeri kendisi yazar; tetikleyiciler
+    başka yollardan eklenen/güncellenen satırlar için yedektir.
+    """
+    _add_column_if_not_exists(conn, "invoices", "invoice_day", "INTEGER")
+    conn.execute("""
+        UPDATE invoices SET invoice_day = CAST(strftime('%Y%m%d', invoice_date) AS INTEGER)
+        WHERE invoice_date IS NOT NULL
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_invoices_invoice_day ON invoices (invoice_day)")
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_invoices_invoice_day_insert
+        AFTER INSERT ON invoices
+        WHEN NEW.invoice_day IS NULL AND NEW.invoice_date IS NOT NULL
+        BEGIN
+            UPDATE invoices SET invoice_day = CAST(strftime('%Y%m%d', NEW.invoice_date) AS INTEGER)
+            WHERE id = NEW.id;
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_invoices_invoice_day_update
+        AFTER UPDATE OF invoice_date ON invoices
+        BEGIN
+            UPDATE invoices SET invoice_day = CAST(strftime('%Y%m%d', NEW.invoice_date) AS INTEGER)
+            WHERE id = NEW.id;
+        END
+    """)
+    conn.execute("ANALYZE invoices")
+
+
+def fts5_available(conn: sqlite3.Connection) -> bool:
+    """SQLite derlemesi FTS5 (trigram) destekliyor mu?"""
+    try:
+        conn.execute("CREATE VIRTUAL TABLE temp._fts5_probe USING fts5(x, tokenize='trigram')")
+        conn.execute("DROP TABLE temp._fts5_probe")
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+
+def _m005_products_fts(conn: sqlite3.Connection):
+    """
+    Ürün araması için FTS5 trigram dizini (products_fts).
+    'content=products' ile metin kopyalanmaz; tetikleyiciler dizini eşitler.
+    FTS5 yoksa atlanır ve arama LIKE sorgusuna düşer.
+    """
+    if not fts5_available(conn):
+        print("DEBUG: SQLite FTS5 desteklemiyor, products_fts oluşturulmadı.")
+        return
+    conn.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+            code, name,
+            content='products', content_rowid='id',
+            tokenize='trigram'
+        )
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_products_fts_insert AFTER INSERT ON products BEGIN
+            INSERT INTO products_fts (rowid, code, name) VALUES (NEW.id, NEW.code, NEW.name);
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_products_fts_delete AFTER DELETE ON products BEGIN
+            INSERT INTO products_fts (products_fts, rowid, code, name) VALUES ('delete', OLD.id, OLD.code, OLD.name);
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_products_fts_update AFTER UPDATE OF code, name ON products BEGIN
+            INSERT INTO products_fts (products_fts, rowid, code, name) VALUES ('delete', OLD.id, OLD.code, OLD.name);
+            INSERT INTO products_fts (rowid, code, name) VALUES (NEW.id, NEW.code, NEW.name);
+        END
+    """)
+    conn.execute("INSERT INTO products_fts (products_fts) VALUES ('rebuild')")
+
+
+def _m006_turkish_keys(conn: sqlite3.Connection):
+    """
+    Türkçe katlanmış arama anahtarları (code_key/name_key) ve sıralama anahtarı
+    (sort_key) sütunları. Değerler TR_SEARCH_KEY/TR_SORT_KEY fonksiyonlarıyla
+    (database.collation, her bağlantıya kaydedilir) tetikleyicilerde hesaplanır.
+    products_fts katlanmış anahtarlar üzerinden yeniden oluşturulur.
+    """
+    _add_column_if_not_exists(conn, "products", "code_key", "TEXT")
+    _add_column_if_not_exists(conn, "products", "name_key", "TEXT")
+    _add_column_if_not_exists(conn, "products", "sort_key", "TEXT")
+    _add_column_if_not_exists(conn, "customers", "name_key", "TEXT")
+    _add_column_if_not_exists(conn, "customers", "sort_key", "TEXT")
+
+    conn.execute("""
+        UPDATE products SET code_key = TR_SEARCH_KEY(code), name_key = TR_SEARCH_KEY(name),
+                            sort_key = TR_SORT_KEY(name)
+    """)
+    conn.execute("UPDATE customers SET name_key = TR_SEARCH_KEY(name), sort_key = TR_SORT_KEY(name)")
+
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_products_sort_key ON products (sort_key)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_customers_sort_key ON customers (sort_key)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_customers_name_key ON customers (name_key)")
+
+    # Göç 5'in tetikleyicileri ve dizini ham code/name üzerindeydi
+    for trigger in ("trg_products_fts_insert", "trg_products_fts_delete", "trg_products_fts_update"):
+        conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    conn.execute("DROP TABLE IF EXISTS products_fts")
+    has_fts = fts5_available(conn)
+    if has_fts:
+        conn.execute("""
+            CREATE VIRTUAL TABLE products_fts USING fts5(
+                code_key, name_key,
+                content='products', content_rowid='id',
+                tokenize='trigram'
+            )
+        """)
+        conn.execute("INSERT INTO products_fts (products_fts) VALUES ('rebuild')")
+
+    # Tek tetikleyici anahtarları hesaplar ve dizini günceller (tetikleyici sırasına bağımlı olmamak için)
+    fts_insert = """
+            INSERT INTO products_fts (rowid, code_key, name_key)
+            VALUES (NEW.id, TR_SEARCH_KEY(NEW.code), TR_SEARCH_KEY(NEW.name));""" if has_fts else ""
+    fts_delete = """
+            INSERT INTO products_fts (products_fts, rowid, code_key, name_key)
+            VALUES ('delete', OLD.id, OLD.code_key, OLD.name_key);""" if has_fts else ""
+    conn.execute(f"""
+        CREATE TRIGGER trg_products_keys_insert AFTER INSERT ON products BEGIN
+            UPDATE products SET code_key = TR_SEARCH_KEY(NEW.code), name_key = TR_SEARCH_KEY(NEW.name),
+                                sort_key = TR_SORT_KEY(NEW.name)
+            WHERE id = NEW.id;{fts_insert}
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER trg_products_keys_update AFTER UPDATE OF code, name ON products BEGIN{fts_delete}
+            UPDATE products SET code_key = TR_SEARCH_KEY(NEW.code), name_key = TR_SEARCH_KEY(NEW.name),
+                                sort_key = TR_SORT_KEY(NEW.name)
+            WHERE id = NEW.id;{fts_insert}
+        END
+    """)
+    if has_fts:
+        conn.execute(f"""
+            CREATE TRIGGER trg_products_keys_delete AFTER DELETE ON products BEGIN{fts_delete}
+            END
+        """)
+    conn.execute("""
+        CREATE TRIGGER trg_customers_keys_insert AFTER INSERT ON customers BEGIN
+            UPDATE customers SET name_key = TR_SEARCH_KEY(NEW.name), sort_key = TR_SORT_KEY(NEW.name)
+            WHERE id = NEW.id;
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER trg_customers_keys_update AFTER UPDATE OF name ON customers BEGIN
+            UPDATE customers SET name_key = TR_SEARCH_KEY(NEW.name), sort_key = TR_SORT_KEY(NEW.name)
+            WHERE id = NEW.id;
+        END
+    """)
+    conn.execute("ANALYZE")
+
+
+def _m007_invoice_counters(conn: sqlite3.Connection):
+    """
+    Günlük fiş numarası sayacı (YYYYMMDD-NNN). save_invoice sayacı fişle aynı
+    BEGIN IMMEDIATE işleminde artırır: numara almak sabit maliyetlidir, eşzamanlı
+    kayıtlar aynı numarayı alamaz ve silinen fişlerin numaraları tekrar verilmez.
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS invoice_counters (
+            day INTEGER PRIMARY KEY, -- YYYYMMDD
+            last_number INTEGER NOT NULL
+        )
+    """)
+    # Mevcut numaralardan başlat
+    conn.execute("""
+        INSERT OR REPLACE INTO invoice_counters (day, last_number)
+        SELECT CAST(substr(invoice_number, 1, 8) AS INTEGER), MAX(CAST(substr(invoice_number, 10) AS INTEGER))
+        FROM invoices
+        WHERE invoice_number GLOB '[0-9][0-9][0-9][0-9][0-9][0-9][0-9][0-9]-[0-9]*'
+        GROUP BY substr(invoice_number, 1, 8)
+    """)
+
+
+def _m008_daily_sales(conn: sqlite3.Connection):
+    """Günlük satış özeti (daily_sales) ve onu güncel tutan tetikleyiciler"""
+    create_daily_sales(conn)
+    rebuild_daily_sales(conn)
+
+
+def _m009_product_daily_sales(conn: sqlite3.Connection):
+    """Ürün-gün satış özeti (product_daily_sales) ve tetikleyicileri"""
+    create_product_daily_sales(conn)
+    rebuild_product_daily_sales(conn)
+    conn.execute("ANALYZE product_daily_sales")
+
+
+def _m010_customer_stats(conn: sqlite3.Connection):
+    """Müşteri özet tabloları; yalnızca adla kaydedilmiş fişler müşteri kaydına bağlanır"""
+    # customers.name UNIQUE: ad eşleşmesi tek müşteriye gider
+    conn.execute("""
+        UPDATE invoices SET customer_id = (SELECT id FROM customers WHERE name = invoices.customer_name)
+        WHERE customer_id IS NULL
+    """)
+    create_customer_stats(conn)
+    rebuild_customer_stats(conn)
+    conn.execute("ANALYZE")
+
+
+def _m011_export_watermarks(conn: sqlite3.Connection):
+    """
+    Artımlı fiş dışa aktarma işaretleri: hedef (dosya/klasör) başına en son
+    aktarılan invoices.id. invoices AUTOINCREMENT olduğundan silinen fişlerin
+    id'leri tekrar verilmez; işaretten büyük id'ler yalnızca yeni fişlerdir.
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS export_watermarks (
+            destination TEXT PRIMARY KEY,          -- Mutlak dosya/klasör yolu
+            last_invoice_id INTEGER NOT NULL,
+            file_size INTEGER,                     -- Ek dosyada son başarılı yazımdan sonraki boyut (bayt)
+            row_count INTEGER NOT NULL DEFAULT 0,  -- Bu hedefe şimdiye kadar yazılan satır
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+
+def _m012_invoice_history_indexes(conn: sqlite3.Connection):
+    """
+    Fiş geçmişi filtre/sıralama indeksleri. invoices.customer_key müşteri adının
+    Türkçe katlanmış arama anahtarıdır (TR_SEARCH_KEY); müşteri önek araması ve
+    müşteriye göre sıralama bunun indeksi üzerinden yapılır. Uygulama değeri
+    kendisi yazar; tetikleyiciler başka yollardan eklenen satırlar için yedektir.
+    total_amount indeksi tutar aralığı filtresi ve tutara göre sıralama içindir.
+    """
+    _add_column_if_not_exists(conn, "invoices", "customer_key", "TEXT")
+    conn.execute("UPDATE invoices SET customer_key = TR_SEARCH_KEY(customer_name)")
+
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_invoices_customer_key ON invoices (customer_key)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_invoices_total_amount ON invoices (total_amount)")
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_invoices_customer_key_insert
+        AFTER INSERT ON invoices
+        WHEN NEW.customer_key IS NULL
+        BEGIN
+            UPDATE invoices SET customer_key = TR_SEARCH_KEY(NEW.customer_name) WHERE id = NEW.id;
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_invoices_customer_key_update
+        AFTER UPDATE OF customer_name ON invoices
+        BEGIN
+            UPDATE invoices SET customer_key = TR_SEARCH_KEY(NEW.customer_name) WHERE id = NEW.id;
+        END
+    """)
+    conn.execute("ANALYZE invoices")
+
+
+def _m013_drop_udf_triggers(conn: sqlite3.Connection):
+    """
+    Göç 6 ve 12'nin TR_SEARCH_KEY/TR_SORT_KEY çağıran tetikleyicileri kaldırılır:
+    fonksiyon yalnızca uygulama bağlantılarında kayıtlı olduğundan dış araçlarla
+    (sqlite3 komut satırı, DB Browser) yapılan her ekleme/güncelleme "no such
+    function" hatası veriyordu. Anahtarları artık uygulamanın yazma sorguları
+    hesaplar; yerlerine konan tetikleyiciler Python fonksiyonu çağırmaz:
+
+      - products_fts yalnızca anahtar sütunlarını kopyalayarak eşitlenir
+      - kaynak sütun (ad/kod) anahtarlara dokunulmadan değiştirilirse indeksli
+        işaret anahtarı (sort_key, fişlerde customer_key) NULL yapılır;
+        fill_search_keys bu satırların tüm anahtarlarını yeniden hesaplar
+    """
+    for trigger in ("trg_products_keys_insert", "trg_products_keys_update", "trg_products_keys_delete",
+                    "trg_customers_keys_insert", "trg_customers_keys_update",
+                    "trg_invoices_customer_key_insert", "trg_invoices_customer_key_update"):
+        conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+
+    has_fts = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'products_fts'"
+    ).fetchone() is not None
+    if has_fts:
+        conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_products_fts_insert AFTER INSERT ON products BEGIN
+                INSERT INTO products_fts (rowid, code_key, name_key) VALUES (NEW.id, NEW.code_key, NEW.name_key);
+            END
+        """)
+        conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_products_fts_delete AFTER DELETE ON products BEGIN
+                INSERT INTO products_fts (products_fts, rowid, code_key, name_key)
+                VALUES ('delete', OLD.id, OLD.code_key, OLD.name_key);
+            END
+        """)
+        conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_products_fts_update AFTER UPDATE OF code_key, name_key ON products BEGIN
+                INSERT INTO products_fts (products_fts, rowid, code_key, name_key)
+                VALUES ('delete', OLD.id, OLD.code_key, OLD.name_key);
+                INSERT INTO products_fts (rowid, code_key, name_key) VALUES (NEW.id, NEW.code_key, NEW.name_key);
+            END
+        """)
+
+    # Yazan anahtarları da güncellediyse sort_key değişmiştir; değişmediyse bayat say
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_products_keys_stale
+        AFTER UPDATE OF code, name ON products
+        WHEN NEW.sort_key IS OLD.sort_key
+        BEGIN
+            UPDATE products SET sort_key = NULL WHERE id = NEW.id;
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_customers_keys_stale
+        AFTER UPDATE OF name ON customers
+        WHEN NEW.sort_key IS OLD.sort_key
+        BEGIN
+            UPDATE customers SET sort_key = NULL WHERE id = NEW.id;
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_invoices_customer_key_stale
+        AFTER UPDATE OF customer_name ON invoices
+        WHEN NEW.customer_key IS OLD.customer_key
+        BEGIN
+            UPDATE invoices SET customer_key = NULL WHERE id = NEW.id;
+        END
+    """)
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "Temel tablolar", _m001_base_schema),
+    Migration(2, "Rapor indeksleri", _m002_report_indexes),
+    Migration(3, "Tutarlar kuruş (INTEGER) olarak", _m003_money_minor_units, disable_foreign_keys=True),
+    Migration(4, "Fişlerde indeksli gün numarası (invoice_day)", _m004_invoice_day),
+    Migration(5, "Ürün araması için FTS5 trigram dizini", _m005_products_fts),
+    Migration(6, "Türkçe arama/sıralama anahtarları", _m006_turkish_keys),
+    Migration(7, "Günlük fiş numarası sayacı", _m007_invoice_counters),
+    Migration(8, "Günlük satış özeti (daily_sales)", _m008_daily_sales),
+    Migration(9, "Ürün-gün satış özeti (product_daily_sales)", _m009_product_daily_sales),
+    Migration(10, "Müşteri özetleri (customer_stats, customer_monthly_stats)", _m010_customer_stats),
+    Migration(11, "Artımlı dışa aktarma işaretleri (export_watermarks)", _m011_export_watermarks),
+    Migration(12, "Fiş geçmişi sorgu indeksleri (customer_key, total_amount)", _m012_invoice_history_indexes),
+    Migration(13, "Arama anahtarı tetikleyicileri Python fonksiyonsuz", _m013_drop_udf_triggers),
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    """Veritabanının şema sürümü (PRAGMA user_version)"""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn: sqlite3.Connection, target: Optional[int] = None) -> int:
+    """
+    Bekleyen göçleri sırayla uygula. Uygulanan göç sayısını döndürür.
+    Bir göç hata verirse o göçün değişiklikleri geri alınır ve hata yükseltilir.
+    """
+    target = LATEST_VERSION if target is None else target
+    current = get_schema_version(conn)
+    applied = 0
+
+    for migration in MIGRATIONS:
+        if migration.version <= current or migration.version > target:
+            continue
+
+        print(f"DEBUG: Şema göçü uygulanıyor: {migration.version} - {migration.description}")
+        if migration.disable_foreign_keys:
+            conn.execute("PRAGMA foreign_keys = OFF")  # İşlem dışında ayarlanmalı
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            if get_schema_version(conn) >= migration.version:
+                # Başka bir uygulama örneği bu göçü bizden önce uyguladı
+                conn.commit()
+                current = migration.version
+                continue
+            migration.apply(conn)
+            conn.execute(f"PRAGMA user_version = {migration.version}")
+            if migration.disable_foreign_keys:
+                violations = conn.execute("PRAGMA foreign_key_check").fetchall()
+                if violations:
+                    raise sqlite3.IntegrityError(
+                        f"Göç {migration.version} sonrası yabancı anahtar ihlali: {len(violations)} kayıt"
+                    )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            if migration.disable_foreign_keys:
+                conn.execute("PRAGMA foreign_keys = ON")
+
+        current = migration.version
+        applied += 1
+
+    return applied
@@ -3,7 +3,7 @@ Veritabanı modelleri (Güncellenmiş)
 """
 from dataclasses import dataclass, field # field eklendi
 from datetime import datetime
-from typing import List, Optional
+from typing import Any, List, Optional, Tuple
 from decimal import Decimal
 
 
@@ -20,6 +20,23 @@ class Customer:
     updated_at: Optional[datetime] = None
 
 
+@dataclass
+class CustomerStats:
+    """Müşterinin tüm zamanlar alış özeti (customer_stats tablosu)"""
+    customer_id: Optional[int] = None
+    invoice_count: int = 0
+    total_amount: Decimal = field(default_factory=lambda: Decimal('0.00'))
+    first_purchase: Optional[datetime] = None
+    last_purchase: Optional[datetime] = None
+
+    @property
+    def avg_amount(self) -> Decimal:
+        """Fiş başına ortalama tutar"""
+        if not self.invoice_count:
+            return Decimal('0.00')
+        return (self.total_amount / self.invoice_count).quantize(Decimal('0.01'))
+
+
 @dataclass
 class Product:
     """Ürün modeli (Eksik alanlar eklendi)"""
@@ -70,6 +87,35 @@ class Invoice:
     # __post_init__ kaldırıldı, field(default_factory=list) daha iyi
 
 
+@dataclass
+class InvoiceSummary:
+    """Fiş listesi satırı (yalnızca başlık alanları, kalemler yüklenmez)"""
+    id: Optional[int] = None
+    invoice_number: str = ""
+    customer_name: str = ""
+    subtotal: Decimal = field(default_factory=lambda: Decimal('0.00'))
+    tax_amount: Decimal = field(default_factory=lambda: Decimal('0.00'))
+    total_amount: Decimal = field(default_factory=lambda: Decimal('0.00'))
+    invoice_date: Optional[datetime] = None
+    # Sayfalama anahtarı: (sıralama sütununun veritabanındaki ham değeri, id);
+    # sort_by'a göre metin (tarih, fiş no, customer_key) veya kuruş tamsayısıdır
+    page_key: Optional[Tuple[Any, int]] = None
+
+
+@dataclass
+class InvoiceQuery:
+    """Fiş geçmişi sorgusu: boş bırakılan filtreler uygulanmaz"""
+    start_date: Optional[datetime] = None   # Dahil
+    end_date: Optional[datetime] = None     # Hariç
+    customer_prefix: str = ""               # Müşteri adı başlangıcı (Türkçe harf duyarsız)
+    customer_id: Optional[int] = None
+    product_code: str = ""                  # Bu ürünü içeren fişler
+    min_total: Optional[Decimal] = None
+    max_total: Optional[Decimal] = None
+    sort_by: str = "invoice_date"           # InvoiceManager.INVOICE_SORT_COLUMNS anahtarı
+    descending: bool = True
+
+
 @dataclass
 class User:
     """Kullanıcı modeli"""
@@ -0,0 +1,54 @@
+"""
+Para tutarlarının veritabanı gösterimi (tam sayı kuruş)
+
+Tutar sütunları 'MONEY INTEGER' tipinde tanımlıdır: SQLite tarafında INTEGER
+(kuruş) olarak saklanır, böylece SUM gibi toplamalar tam sayı aritmetiğiyle
+yapılır. Okurken kayıtlı 'MONEY' dönüştürücüsü değeri doğrudan Decimal'e çevirir.
+
+Yazarken Decimal -> kuruş dönüşümü açıkça to_minor() ile yapılır. Decimal için
+genel bir adaptör kaydedilmez; çünkü tax_rate gibi oran sütunları da Decimal'dir
+ve kuruşa çevrilmemelidir.
+
+Toplama sorgularında sütun tipi kaybolduğundan takma ad ile belirtilmelidir:
+    SELECT SUM(total_amount) AS "total_amount [MONEY]" FROM invoices
+"""
+import sqlite3
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Optional, Union
+
+MONEY_TYPE = "MONEY"
+MINOR_UNITS = 100  # 1 TL = 100 kuruş
+_CENT = Decimal("0.01")
+
+
+def to_minor(value: Union[Decimal, int, float, str, None]) -> Optional[int]:
+    """Tutarı kuruşa çevir (Decimal('12.345') -> 1235). None olduğu gibi kalır."""
+    if value is None:
+        return None
+    if not isinstance(value, Decimal):
+        value = Decimal(str(value))
+    return int(value.quantize(_CENT, rounding=ROUND_HALF_UP).scaleb(2))
+
+
+def from_minor(value: Union[int, float, None]) -> Optional[Decimal]:
+    """Kuruşu TL'ye çevir (1235 -> Decimal('12.35'))"""
+    if value is None:
+        return None
+    if isinstance(value, int):
+        return Decimal(value).scaleb(-2)
+    # AVG gibi kesirli sonuçlar
+    return Decimal(str(value)).scaleb(-2)
+
+
+def _convert_money(raw: bytes) -> Decimal:
+    """sqlite3 dönüştürücüsü: b'1235' -> Decimal('12.35')"""
+    try:
+        return Decimal(int(raw)).scaleb(-2)
+    except ValueError:
+        # AVG() ondalıklı döner (b'1234.5'); kuruşa yuvarla
+        return Decimal(raw.decode()).scaleb(-2).quantize(_CENT, rounding=ROUND_HALF_UP)
+
+
+def register_money_types():
+    """'MONEY' bildirilmiş tip/takma adı için dönüştürücüyü kaydet (süreç genelinde)"""
+    sqlite3.register_converter(MONEY_TYPE, _convert_money)
@@ -0,0 +1,456 @@
+"""
+Rapor özet (rollup) tabloları
+
+daily_sales: yerel gün (invoice_day) başına fiş sayısı ve tutar toplamları.
+invoices üzerindeki tetikleyiciler (göç 8) her ekleme/silme/güncellemede
+tabloyu günceller; raporlar ham fiş tablosunu yeniden toplamak yerine buradan
+okur.
+
+product_daily_sales: ürün kodu ve gün başına miktar, ciro, kalem ve fiş
+sayısı. invoice_items tetikleyicileriyle (göç 9) güncellenir; fişin günü
+değişirse kalemleri yeni güne taşınır.
+
+customer_stats / customer_monthly_stats: müşteri başına tüm zamanlar ve ay
+(YYYYMM) başına fiş sayısı, toplam tutar, ilk/son alış. Tetikleyiciyle değil,
+InvoiceManager tarafından fişi kaydeden/silen işlemin içinde güncellenir
+(add_customer_invoice / remove_customer_invoice).
+
+Tablolar bozulursa veya tetikleyiciler devre dışıyken veri yüklendiyse
+rebuild_*() fonksiyonlarıyla sıfırdan üretilebilir:
+
+    python update_db_schema.py --rebuild-rollups
+"""
+import sqlite3
+import calendar
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Any, Dict, List
+
+# Tetikleyicilerde kullanılan ekleme/çıkarma ifadeleri
+_ADD_DAILY = """
+    INSERT INTO daily_sales (day, invoice_count, subtotal, discount_amount, tax_amount, total_amount)
+    SELECT NEW.invoice_day, 1, COALESCE(NEW.subtotal, 0), COALESCE(NEW.discount_amount, 0),
+           COALESCE(NEW.tax_amount, 0), COALESCE(NEW.total_amount, 0)
+    WHERE NEW.invoice_day IS NOT NULL
+    ON CONFLICT (day) DO UPDATE SET
+        invoice_count = invoice_count + 1,
+        subtotal = subtotal + excluded.subtotal,
+        discount_amount = discount_amount + excluded.discount_amount,
+        tax_amount = tax_amount + excluded.tax_amount,
+        total_amount = total_amount + excluded.total_amount;
+"""
+
+_SUBTRACT_DAILY = """
+    UPDATE daily_sales SET
+        invoice_count = invoice_count - 1,
+        subtotal = subtotal - COALESCE(OLD.subtotal, 0),
+        discount_amount = discount_amount - COALESCE(OLD.discount_amount, 0),
+        tax_amount = tax_amount - COALESCE(OLD.tax_amount, 0),
+        total_amount = total_amount - COALESCE(OLD.total_amount, 0)
+    WHERE day = OLD.invoice_day;
+    DELETE FROM daily_sales WHERE day = OLD.invoice_day AND invoice_count <= 0;
+"""
+
+
+def create_daily_sales(conn: sqlite3.Connection):
+    """daily_sales tablosunu ve invoices tetikleyicilerini oluştur"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS daily_sales (
+            day INTEGER PRIMARY KEY, -- YYYYMMDD (invoices.invoice_day)
+            invoice_count INTEGER NOT NULL DEFAULT 0,
+            subtotal MONEY INTEGER NOT NULL DEFAULT 0, -- kuruş
+            discount_amount MONEY INTEGER NOT NULL DEFAULT 0, -- kuruş
+            tax_amount MONEY INTEGER NOT NULL DEFAULT 0, -- kuruş
+            total_amount MONEY INTEGER NOT NULL DEFAULT 0 -- kuruş
+        )
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_daily_sales_insert AFTER INSERT ON invoices BEGIN
+            {_ADD_DAILY}
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_daily_sales_delete AFTER DELETE ON invoices BEGIN
+            {_SUBTRACT_DAILY}
+        END
+    """)
+    # invoice_day tetikleyicisi (göç 4) NULL günü sonradan doldurduğunda da burası çalışır
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_daily_sales_update
+        AFTER UPDATE OF invoice_day, subtotal, discount_amount, tax_amount, total_amount ON invoices
+        BEGIN
+            {_SUBTRACT_DAILY}
+            {_ADD_DAILY}
+        END
+    """)
+
+
+def rebuild_daily_sales(conn: sqlite3.Connection) -> int:
+    """daily_sales'i fişlerden sıfırdan üret (çağıran commit eder). Gün sayısını döndürür."""
+    conn.execute("DELETE FROM daily_sales")
+    conn.execute("""
+        INSERT INTO daily_sales (day, invoice_count, subtotal, discount_amount, tax_amount, total_amount)
+        SELECT invoice_day, COUNT(*), COALESCE(SUM(subtotal), 0), COALESCE(SUM(discount_amount), 0),
+               COALESCE(SUM(tax_amount), 0), COALESCE(SUM(total_amount), 0)
+        FROM invoices
+        WHERE invoice_day IS NOT NULL
+        GROUP BY invoice_day
+    """)
+    return conn.execute("SELECT COUNT(*) FROM daily_sales").fetchone()[0]
+
+
+# Kalem ekleme/çıkarma. Gün, kalemin fişinden okunur; fiş sayısı yalnızca
+# fişteki aynı koddan ilk kalem eklenirken / son kalem silinirken değişir.
+_ADD_PRODUCT = """
+    INSERT INTO product_daily_sales (product_code, day, product_name, quantity, revenue,
+                                     unit_price_sum, line_count, invoice_count)
+    SELECT NEW.product_code, i.invoice_day, NEW.product_name, NEW.quantity, NEW.total_price,
+           NEW.unit_price, 1,
+           NOT EXISTS (SELECT 1 FROM invoice_items
+                       WHERE product_code = NEW.product_code AND invoice_id = NEW.invoice_id
+                       AND id <> NEW.id)
+    FROM invoices i
+    WHERE i.id = NEW.invoice_id AND i.invoice_day IS NOT NULL
+    ON CONFLICT (product_code, day) DO UPDATE SET
+        product_name = excluded.product_name,
+        quantity = quantity + excluded.quantity,
+        revenue = revenue + excluded.revenue,
+        unit_price_sum = unit_price_sum + excluded.unit_price_sum,
+        line_count = line_count + 1,
+        invoice_count = invoice_count + excluded.invoice_count;
+"""
+
+_SUBTRACT_PRODUCT = """
+    UPDATE product_daily_sales SET
+        quantity = quantity - OLD.quantity,
+        revenue = revenue - OLD.total_price,
+        unit_price_sum = unit_price_sum - OLD.unit_price,
+        line_count = line_count - 1,
+        invoice_count = invoice_count - NOT EXISTS (
+            SELECT 1 FROM invoice_items
+            WHERE product_code = OLD.product_code AND invoice_id = OLD.invoice_id AND id <> OLD.id)
+    WHERE product_code = OLD.product_code
+    AND day = (SELECT invoice_day FROM invoices WHERE id = OLD.invoice_id);
+    DELETE FROM product_daily_sales
+    WHERE product_code = OLD.product_code AND line_count <= 0
+    AND day = (SELECT invoice_day FROM invoices WHERE id = OLD.invoice_id);
+"""
+
+
+def create_product_daily_sales(conn: sqlite3.Connection):
+    """product_daily_sales tablosunu ve invoice_items/invoices tetikleyicilerini oluştur"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS product_daily_sales (
+            product_code TEXT NOT NULL,
+            day INTEGER NOT NULL, -- YYYYMMDD (invoices.invoice_day)
+            product_name TEXT NOT NULL, -- o gün satılan son kalemdeki ad
+            quantity INTEGER NOT NULL DEFAULT 0,
+            revenue MONEY INTEGER NOT NULL DEFAULT 0, -- kuruş
+            unit_price_sum MONEY INTEGER NOT NULL DEFAULT 0, -- kuruş (ortalama fiyat için)
+            line_count INTEGER NOT NULL DEFAULT 0,
+            invoice_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (product_code, day)
+        ) WITHOUT ROWID
+    """)
+    # Tüm ürünler için gün aralığı (ürün analizi, en çok satan)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_product_daily_sales_day ON product_daily_sales (day)")
+
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_product_daily_sales_insert AFTER INSERT ON invoice_items BEGIN
+            {_ADD_PRODUCT}
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_product_daily_sales_delete AFTER DELETE ON invoice_items BEGIN
+            {_SUBTRACT_PRODUCT}
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_product_daily_sales_update
+        AFTER UPDATE OF invoice_id, product_code, product_name, quantity, unit_price, total_price
+        ON invoice_items
+        BEGIN
+            {_SUBTRACT_PRODUCT}
+            {_ADD_PRODUCT}
+        END
+    """)
+
+    # Fiş silinirken kalemler önce silinir: kalem tetikleyicisi fişin gününü
+    # okuyabilsin (ON DELETE CASCADE, fiş satırı gittikten sonra çalışır)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_invoices_delete_items BEFORE DELETE ON invoices BEGIN
+            DELETE FROM invoice_items WHERE invoice_id = OLD.id;
+        END
+    """)
+
+    # Fişin günü değişince kalemleri eski günden düş, yeni güne ekle
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_product_daily_sales_move
+        AFTER UPDATE OF invoice_day ON invoices
+        WHEN OLD.invoice_day IS NOT NEW.invoice_day
+        BEGIN
+            UPDATE product_daily_sales SET
+                quantity = quantity - (SELECT SUM(quantity) FROM invoice_items
+                                       WHERE invoice_id = NEW.id AND product_code = product_daily_sales.product_code),
+                revenue = revenue - (SELECT SUM(total_price) FROM invoice_items
+                                     WHERE invoice_id = NEW.id AND product_code = product_daily_sales.product_code),
+                unit_price_sum = unit_price_sum - (SELECT SUM(unit_price) FROM invoice_items
+                                                   WHERE invoice_id = NEW.id AND product_code = product_daily_sales.product_code),
+                line_count = line_count - (SELECT COUNT(*) FROM invoice_items
+                                           WHERE invoice_id = NEW.id AND product_code = product_daily_sales.product_code),
+                invoice_count = invoice_count - 1
+            WHERE day = OLD.invoice_day
+            AND product_code IN (SELECT product_code FROM invoice_items WHERE invoice_id = NEW.id);
+            DELETE FROM product_daily_sales WHERE day = OLD.invoice_day AND line_count <= 0;
+
+            INSERT INTO product_daily_sales (product_code, day, product_name, quantity, revenue,
+                                             unit_price_sum, line_count, invoice_count)
+            SELECT product_code, NEW.invoice_day, MAX(product_name), SUM(quantity), SUM(total_price),
+                   SUM(unit_price), COUNT(*), 1
+            FROM invoice_items
+            WHERE invoice_id = NEW.id AND NEW.invoice_day IS NOT NULL
+            GROUP BY product_code
+            ON CONFLICT (product_code, day) DO UPDATE SET
+                quantity = quantity + excluded.quantity,
+                revenue = revenue + excluded.revenue,
+                unit_price_sum = unit_price_sum + excluded.unit_price_sum,
+                line_count = line_count + excluded.line_count,
+                invoice_count = invoice_count + 1;
+        END
+    """)
+
+
+def rebuild_product_daily_sales(conn: sqlite3.Connection) -> int:
+    """product_daily_sales'i kalemlerden sıfırdan üret (çağıran commit eder). Satır sayısını döndürür."""
+    conn.execute("DELETE FROM product_daily_sales")
+    # product_name, MAX(ii.id) ile aynı satırdan gelir (SQLite "bare column" kuralı): son satılan ad
+    conn.execute("""
+        INSERT INTO product_daily_sales (product_code, day, product_name, quantity, revenue,
+                                         unit_price_sum, line_count, invoice_count)
+        SELECT product_code, day, product_name, quantity, revenue, unit_price_sum, line_count, invoice_count
+        FROM (
+            SELECT ii.product_code, i.invoice_day AS day, ii.product_name, MAX(ii.id),
+                   SUM(ii.quantity) AS quantity, SUM(ii.total_price) AS revenue,
+                   SUM(ii.unit_price) AS unit_price_sum, COUNT(*) AS line_count,
+                   COUNT(DISTINCT ii.invoice_id) AS invoice_count
+            FROM invoice_items ii
+            JOIN invoices i ON i.id = ii.invoice_id
+            WHERE i.invoice_day IS NOT NULL
+            GROUP BY ii.product_code, i.invoice_day
+        )
+    """)
+    return conn.execute("SELECT COUNT(*) FROM product_daily_sales").fetchone()[0]
+
+
+def create_customer_stats(conn: sqlite3.Connection):
+    """customer_stats ve customer_monthly_stats tablolarını oluştur"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS customer_stats (
+            customer_id INTEGER PRIMARY KEY REFERENCES customers (id) ON DELETE CASCADE,
+            invoice_count INTEGER NOT NULL DEFAULT 0,
+            total_amount MONEY INTEGER NOT NULL DEFAULT 0, -- kuruş
+            first_purchase TIMESTAMP,
+            last_purchase TIMESTAMP
+        )
+    """)
+    # Tüm zamanlar sıralaması (en çok alış yapanlar)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_customer_stats_total ON customer_stats (total_amount)")
+
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS customer_monthly_stats (
+            customer_id INTEGER NOT NULL REFERENCES customers (id) ON DELETE CASCADE,
+            month INTEGER NOT NULL, -- YYYYMM
+            invoice_count INTEGER NOT NULL DEFAULT 0,
+            total_amount MONEY INTEGER NOT NULL DEFAULT 0, -- kuruş
+            first_purchase TIMESTAMP,
+            last_purchase TIMESTAMP,
+            PRIMARY KEY (customer_id, month)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_customer_monthly_stats_month ON customer_monthly_stats (month)")
+
+    # Silmede ilk/son alışın yeniden bulunması ve müşteri kaydına bağlı olmayan
+    # fişler (customer_id IS NULL, özet tablolarında yer almaz) için
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_invoices_customer_day ON invoices (customer_id, invoice_day)")
+
+
+def rebuild_customer_stats(conn: sqlite3.Connection) -> int:
+    """Müşteri özetlerini fişlerden sıfırdan üret (çağıran commit eder). Müşteri sayısını döndürür."""
+    conn.execute("DELETE FROM customer_stats")
+    conn.execute("DELETE FROM customer_monthly_stats")
+    conn.execute("""
+        INSERT INTO customer_stats (customer_id, invoice_count, total_amount, first_purchase, last_purchase)
+        SELECT customer_id, COUNT(*), COALESCE(SUM(total_amount), 0), MIN(invoice_date), MAX(invoice_date)
+        FROM invoices
+        WHERE customer_id IN (SELECT id FROM customers)
+        GROUP BY customer_id
+    """)
+    conn.execute("""
+        INSERT INTO customer_monthly_stats (customer_id, month, invoice_count, total_amount,
+                                            first_purchase, last_purchase)
+        SELECT customer_id, invoice_day / 100, COUNT(*), COALESCE(SUM(total_amount), 0),
+               MIN(invoice_date), MAX(invoice_date)
+        FROM invoices
+        WHERE customer_id IN (SELECT id FROM customers) AND invoice_day IS NOT NULL
+        GROUP BY customer_id, invoice_day / 100
+    """)
+    return conn.execute("SELECT COUNT(*) FROM customer_stats").fetchone()[0]
+
+
+def add_customer_invoice(conn: sqlite3.Connection, customer_id: int, invoice_date: datetime, total_minor: int):
+    """Kaydedilen fişi müşteri özetlerine ekle (fişi kaydeden işlemin içinde çağrılır)"""
+    when = invoice_date.strftime("%Y-%m-%d %H:%M:%S")
+    month = invoice_date.year * 100 + invoice_date.month
+    conn.execute("""
+        INSERT INTO customer_stats (customer_id, invoice_count, total_amount, first_purchase, last_purchase)
+        VALUES (?, 1, ?, ?, ?)
+        ON CONFLICT (customer_id) DO UPDATE SET
+            invoice_count = invoice_count + 1,
+            total_amount = total_amount + excluded.total_amount,
+            first_purchase = MIN(COALESCE(first_purchase, excluded.first_purchase), excluded.first_purchase),
+            last_purchase = MAX(COALESCE(last_purchase, excluded.last_purchase), excluded.last_purchase)
+    """, (customer_id, total_minor, when, when))
+    conn.execute("""
+        INSERT INTO customer_monthly_stats (customer_id, month, invoice_count, total_amount,
+                                            first_purchase, last_purchase)
+        VALUES (?, ?, 1, ?, ?, ?)
+        ON CONFLICT (customer_id, month) DO UPDATE SET
+            invoice_count = invoice_count + 1,
+            total_amount = total_amount + excluded.total_amount,
+            first_purchase = MIN(COALESCE(first_purchase, excluded.first_purchase), excluded.first_purchase),
+            last_purchase = MAX(COALESCE(last_purchase, excluded.last_purchase), excluded.last_purchase)
+    """, (customer_id, month, total_minor, when, when))
+
+
+def remove_customer_invoice(conn: sqlite3.Connection, customer_id: int, invoice_date: datetime, total_minor: int):
+    """
+    Silinen fişi müşteri özetlerinden düş. Fiş satırı silindikten sonra (aynı
+    işlemde) çağrılmalıdır: ilk/son alış kalan fişlerden indeksle yeniden bulunur.
+    """
+    month = invoice_date.year * 100 + invoice_date.month
+    conn.execute("""
+        UPDATE customer_stats SET
+            invoice_count = invoice_count - 1,
+            total_amount = total_amount - ?2,
+            first_purchase = (SELECT MIN(invoice_date) FROM invoices WHERE customer_id = ?1),
+            last_purchase = (SELECT MAX(invoice_date) FROM invoices WHERE customer_id = ?1)
+        WHERE customer_id = ?1
+    """, (customer_id, total_minor))
+    conn.execute("DELETE FROM customer_stats WHERE customer_id = ? AND invoice_count <= 0", (customer_id,))
+
+    conn.execute("""
+        UPDATE customer_monthly_stats SET
+            invoice_count = invoice_count - 1,
+            total_amount = total_amount - ?2,
+            first_purchase = (SELECT MIN(invoice_date) FROM invoices
+                              WHERE customer_id = ?1 AND invoice_day BETWEEN ?3 * 100 + 1 AND ?3 * 100 + 31),
+            last_purchase = (SELECT MAX(invoice_date) FROM invoices
+                             WHERE customer_id = ?1 AND invoice_day BETWEEN ?3 * 100 + 1 AND ?3 * 100 + 31)
+        WHERE customer_id = ?1 AND month = ?3
+    """, (customer_id, total_minor, month))
+    conn.execute("DELETE FROM customer_monthly_stats WHERE customer_id = ? AND month = ? AND invoice_count <= 0",
+                 (customer_id, month))
+
+
+def _day_to_date(day: int) -> date:
+    return date(day // 10000, day // 100 % 100, day % 100)
+
+
+def _date_to_day(value: date) -> int:
+    return value.year * 10000 + value.month * 100 + value.day
+
+
+def _split_months(start_day: int, end_day: int):
+    """
+    Gün aralığını, tamamen kapsanan aylar (YYYYMM, YYYYMM) ve kenarlarda kalan
+    kısmi gün aralıklarına böl. Tam ay yoksa ay aralığı None olur.
+    """
+    start, end = _day_to_date(start_day), _day_to_date(end_day)
+    first = start if start.day == 1 else (start.replace(day=1) + timedelta(days=31)).replace(day=1)
+    if end.day == calendar.monthrange(end.year, end.month)[1]:
+        last = end.replace(day=1)
+    else:
+        last = (end.replace(day=1) - timedelta(days=1)).replace(day=1)
+
+    if first > last:
+        return None, [(start_day, end_day)]
+
+    edges = []
+    if start < first:
+        edges.append((start_day, _date_to_day(first - timedelta(days=1))))
+    last_end = last.replace(day=calendar.monthrange(last.year, last.month)[1])
+    if end > last_end:
+        edges.append((_date_to_day(last_end + timedelta(days=1)), end_day))
+    return (first.year * 100 + first.month, last.year * 100 + last.month), edges
+
+
+def customer_period_totals(conn: sqlite3.Connection, start_day: int, end_day: int) -> List[Dict[str, Any]]:
+    """
+    Gün aralığında (YYYYMMDD, dahil) müşteri başına fiş sayısı, toplam, ortalama
+    ve ilk/son alış; toplam tutara göre azalan.
+
+    Tam aylar customer_monthly_stats'tan, kenarlardaki kısmi günler ve müşteri
+    kaydına bağlı olmayan fişler invoices üzerinde indeksli sorgularla okunur.
+    """
+    months, edges = _split_months(start_day, end_day)
+    parts = []
+    if months:
+        parts.append(conn.execute("""
+            SELECT s.customer_id, c.name, c.address,
+                   SUM(s.invoice_count) as invoice_count,
+                   SUM(s.total_amount) as "total_amount [MONEY]",
+                   MIN(s.first_purchase) as "first_purchase [TIMESTAMP]",
+                   MAX(s.last_purchase) as "last_purchase [TIMESTAMP]"
+            FROM customer_monthly_stats s
+            JOIN customers c ON c.id = s.customer_id
+            WHERE s.month BETWEEN ? AND ?
+            GROUP BY s.customer_id
+        """, months).fetchall())
+    for edge_start, edge_end in edges:
+        parts.append(conn.execute("""
+            SELECT i.customer_id, c.name, c.address,
+                   COUNT(*) as invoice_count,
+                   SUM(i.total_amount) as "total_amount [MONEY]",
+                   MIN(i.invoice_date) as "first_purchase [TIMESTAMP]",
+                   MAX(i.invoice_date) as "last_purchase [TIMESTAMP]"
+            FROM invoices i INDEXED BY idx_invoices_invoice_day -- kenarlar bir aydan kısa
+            JOIN customers c ON c.id = i.customer_id
+            WHERE i.invoice_day BETWEEN ? AND ?
+            GROUP BY i.customer_id
+        """, (edge_start, edge_end)).fetchall())
+    parts.append(conn.execute("""
+        SELECT NULL as customer_id, customer_name as name, customer_address as address,
+               COUNT(*) as invoice_count,
+               SUM(total_amount) as "total_amount [MONEY]",
+               MIN(invoice_date) as "first_purchase [TIMESTAMP]",
+               MAX(invoice_date) as "last_purchase [TIMESTAMP]"
+        FROM invoices
+        WHERE invoice_day BETWEEN ? AND ? AND customer_id IS NULL
+        GROUP BY customer_name, customer_address
+    """, (start_day, end_day)).fetchall())
+
+    totals: Dict[Any, Dict[str, Any]] = {}
+    for rows in parts:
+        for row in rows:
+            key = row['customer_id'] if row['customer_id'] is not None else (row['name'], row['address'])
+            entry = totals.get(key)
+            if entry is None:
+                totals[key] = {
+                    'customer_id': row['customer_id'],
+                    'name': row['name'],
+                    'address': row['address'],
+                    'invoice_count': row['invoice_count'],
+                    'total_amount': row['total_amount'] or Decimal('0.00'),
+                    'first_purchase': row['first_purchase'],
+                    'last_purchase': row['last_purchase'],
+                }
+                continue
+            entry['invoice_count'] += row['invoice_count']
+            entry['total_amount'] += row['total_amount'] or Decimal('0.00')
+            entry['first_purchase'] = min(entry['first_purchase'], row['first_purchase'])
+            entry['last_purchase'] = max(entry['last_purchase'], row['last_purchase'])
+
+    result = sorted(totals.values(), key=lambda entry: entry['total_amount'], reverse=True)
+    for entry in result:
+        entry['avg_amount'] = (entry['total_amount'] / entry['invoice_count']).quantize(Decimal('0.01'))
+    return result
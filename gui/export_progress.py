@@ -0,0 +1,52 @@
+"""
+Dışa aktarma yardımcıları: ilerleme penceresi ve dosya türü filtresi
+
+Akışlı dışa aktarma (utils.streaming_export) her parçadan sonra progress(yazılan,
+toplam) çağırır. Bu pencere doğrudan o geri çağırım olarak verilir: çubuğu
+günceller, bekleyen olayları işler (arayüz donmaz) ve İptal'e basılmışsa False
+döndürerek dışa aktarmayı durdurur.
+"""
+from PySide6.QtCore import Qt
+from PySide6.QtWidgets import QApplication, QProgressDialog
+
+from utils.streaming_export import available_export_formats
+
+
+class ExportProgressDialog(QProgressDialog):
+    """Dışa aktarma metotlarına progress olarak verilen modal ilerleme penceresi"""
+
+    def __init__(self, label: str, parent=None):
+        super().__init__(label, "İptal", 0, 0, parent)
+        self.setWindowTitle("Dışa Aktarılıyor")
+        self.setWindowModality(Qt.WindowModal)
+        self.setMinimumDuration(500)  # Kısa dışa aktarmalarda pencere hiç görünmez
+        self.setAutoClose(False)
+        self.setAutoReset(False)
+        self.setValue(0)
+
+    def __call__(self, done: int, total: int) -> bool:
+        # Toplam bilinmiyorsa (0) çubuk meşgul göstergesi olarak kalır
+        if total and self.maximum() != 100:
+            self.setMaximum(100)
+        if total:
+            self.setValue(min(100, done * 100 // total))
+        self.setLabelText(f"{done:,} satır yazıldı".replace(",", "."))
+        QApplication.processEvents()
+        return not self.wasCanceled()
+
+
+def export_file_filter() -> str:
+    """Kurulu dışa aktarma biçimleri için QFileDialog filtresi (ilk sırada Excel)"""
+    return ";;".join(f"{export_format.description} (*{export_format.extension})"
+                     for export_format in available_export_formats())
+
+
+def export_path_with_extension(file_path: str, selected_filter: str) -> str:
+    """Kullanıcı uzantı yazmadıysa seçilen filtrenin uzantısını ekle (biçim uzantıdan seçilir)"""
+    for export_format in available_export_formats():
+        if file_path.lower().endswith(export_format.extension):
+            return file_path
+    for export_format in available_export_formats():
+        if f"(*{export_format.extension})" in selected_filter:
+            return file_path + export_format.extension
+    return file_path
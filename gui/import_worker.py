@@ -0,0 +1,39 @@
+"""
+Arka planda içe aktarma (ürün/müşteri)
+
+DataImporter.import_products / import_customers ayrı bir QThread'de çalışır;
+ilerleme ve sonuç sinyallerle arayüz thread'ine iletilir. İptal isteği bir
+sonraki parça yazıldıktan sonra dikkate alınır (kaydedilen parçalar kalır).
+"""
+from PySide6.QtCore import QThread, Signal
+
+
+class ImportWorker(QThread):
+    """DataImporter içe aktarma metodunu arka planda çalıştıran thread"""
+
+    progress_changed = Signal(int)  # yüzde; toplam bilinmiyorsa -1
+    import_finished = Signal(dict)
+    import_failed = Signal(str)
+
+    def __init__(self, import_method, file_path: str, parent=None):
+        super().__init__(parent)
+        self.import_method = import_method
+        self.file_path = file_path
+        self._cancel_requested = False
+
+    def cancel(self):
+        """İçe aktarmayı sonraki parçadan sonra durdur"""
+        self._cancel_requested = True
+
+    def _report_progress(self, done: int, total: int) -> bool:
+        # CSV'de birim bayt: büyük dosyalarda int sınırını aşmamak için yüzde gönderilir
+        self.progress_changed.emit(min(100, done * 100 // total) if total else -1)
+        return not self._cancel_requested
+
+    def run(self):
+        try:
+            result = self.import_method(self.file_path, progress=self._report_progress)
+        except Exception as e:
+            self.import_failed.emit(str(e))
+            return
+        self.import_finished.emit(result)
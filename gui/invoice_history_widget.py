@@ -3,27 +3,29 @@ Geçmiş Fişler Widget'ı (Excel Export Düzeltildi)
 """
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QGridLayout,
-    QLabel, QLineEdit, QPushButton, QTableWidget,
-    QTableWidgetItem, QComboBox, QDateEdit, QTextEdit,
+    QLabel, QLineEdit, QPushButton, QTableView,
+    QAbstractItemView, QComboBox, QDateEdit, QTextEdit,
     QGroupBox, QFrame, QHeaderView, QMessageBox,
     QFileDialog, QProgressBar, QTabWidget
 )
-from PySide6.QtCore import Qt, QDate, Signal, QTimer
-from PySide6.QtGui import QFont
+from PySide6.QtCore import Qt, QDate, Signal, QTimer, QRegularExpression
+from PySide6.QtGui import QFont, QRegularExpressionValidator
 from datetime import datetime, timedelta
 import sys 
 import os
 
-from decimal import Decimal
+from decimal import Decimal, InvalidOperation
 
 # Proje kök dizinini path'e ekle
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from database.models import Invoice
+from database.models import Invoice, InvoiceQuery
 from modules.invoice_manager import InvoiceManager
 from utils.pdf_generator import PDFGenerator
 # --- YENİ EKLENEN IMPORT (Excel Export için) ---
 from modules.data_importer import DataImporter
+from .export_progress import ExportProgressDialog, export_file_filter, export_path_with_extension
+from .invoice_table_model import InvoiceTableModel, InvoiceActionDelegate, COLUMNS, SORT_FIELDS
 # ---------------------------------------------
 
 
@@ -35,13 +37,19 @@ class InvoiceHistoryWidget(QWidget):
         self.invoice_manager = InvoiceManager()
         self.pdf_generator = PDFGenerator()
 
+        # Yazarken filtreleme: son tuştan 300 ms sonra tek sorgu
+        self.filter_timer = QTimer(self)
+        self.filter_timer.setSingleShot(True)
+        self.filter_timer.setInterval(300)
+        self.filter_timer.timeout.connect(self.filter_invoices)
+
         self.init_ui()
         self.setup_connections()
 
         # Otomatik yenileme timer'ı
+        self._loaded_data_version = None
         self.refresh_timer = QTimer(self) # Parent eklendi
-        # Lambda fonksiyonunu show_message olmadan çağırmak için düzeltme
-        self.refresh_timer.timeout.connect(lambda: self.load_invoices(show_message=False))
+        self.refresh_timer.timeout.connect(self.refresh_if_changed)
         self.refresh_timer.start(30000)  # 30 saniyede bir yenile
 
         # Başlangıçta fişleri yükle
@@ -64,13 +72,16 @@ class InvoiceHistoryWidget(QWidget):
         filter_panel = self.create_filter_panel()
         layout.addWidget(filter_panel)
 
-        # Fiş listesi
-        self.invoice_table = QTableWidget()
-        self.invoice_table.setColumnCount(9) # Sil butonu için 9 sütun
-        self.invoice_table.setHorizontalHeaderLabels([
-            "Fiş No", "Tarih", "Müşteri", "Ara Toplam", "KDV", "Toplam",
-            "Görüntüle", "PDF", "Sil"
-        ])
+        # Fiş listesi (sayfalı model; satırlar kaydırdıkça yüklenir)
+        self.invoice_model = InvoiceTableModel(self.invoice_manager, self)
+        self.action_delegate = InvoiceActionDelegate(self)
+        self.invoice_table = QTableView()
+        self.invoice_table.setModel(self.invoice_model)
+        for column, (_, action) in enumerate(COLUMNS):
+            if action is not None:
+                self.invoice_table.setItemDelegateForColumn(column, self.action_delegate)
+        self.invoice_table.setMouseTracking(True)  # Buton sütunlarında üzerine gelme efekti
+        self.invoice_table.verticalHeader().setDefaultSectionSize(30)
         self.invoice_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         # Sütun genişliklerini ayarla (Opsiyonel ama daha iyi görünüm için)
         self.invoice_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeToContents) # Fiş No
@@ -83,11 +94,20 @@ class InvoiceHistoryWidget(QWidget):
         self.invoice_table.horizontalHeader().setSectionResizeMode(7, QHeaderView.ResizeToContents) # PDF
         self.invoice_table.horizontalHeader().setSectionResizeMode(8, QHeaderView.ResizeToContents) # Sil
         # Seçim modunu ayarla (Tüm satırı seç)
-        self.invoice_table.setSelectionBehavior(QTableWidget.SelectRows)
-        self.invoice_table.setSelectionMode(QTableWidget.SingleSelection) # Tek satır seçimi
-        self.invoice_table.setEditTriggers(QTableWidget.NoEditTriggers) # Düzenlemeyi kapat
+        self.invoice_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.invoice_table.setSelectionMode(QAbstractItemView.SingleSelection) # Tek satır seçimi
+        self.invoice_table.setEditTriggers(QAbstractItemView.NoEditTriggers) # Düzenlemeyi kapat
+        # Başlığa tıklayınca SQL'de sıralanır (varsayılan: tarih, yeniden eskiye)
+        self.invoice_table.horizontalHeader().setSortIndicator(self.invoice_model.sort_column, self.invoice_model.sort_order)
+        self.invoice_table.setSortingEnabled(True)
         layout.addWidget(self.invoice_table)
 
+        # Alt satır: filtreye uyan tüm fişlerin toplamları (yalnızca yüklenen sayfaların değil)
+        self.totals_label = QLabel()
+        self.totals_label.setAlignment(Qt.AlignRight | Qt.AlignVCenter)
+        self.totals_label.setFont(QFont("Roboto", 10, QFont.Weight.Bold))
+        layout.addWidget(self.totals_label)
+
         # Alt butonlar
         button_panel = self.create_button_panel()
         layout.addWidget(button_panel)
@@ -101,7 +121,13 @@ class InvoiceHistoryWidget(QWidget):
         layout.addWidget(QLabel("Bitiş:"))
         self.end_date = QDateEdit(); self.end_date.setDate(QDate.currentDate()); self.end_date.setCalendarPopup(True); layout.addWidget(self.end_date)
         layout.addWidget(QLabel("Müşteri:"))
-        self.customer_filter = QLineEdit(); self.customer_filter.setPlaceholderText("Müşteri adı ara..."); layout.addWidget(self.customer_filter)
+        self.customer_filter = QLineEdit(); self.customer_filter.setPlaceholderText("Müşteri adı başlangıcı..."); layout.addWidget(self.customer_filter)
+        layout.addWidget(QLabel("Ürün Kodu:"))
+        self.product_filter = QLineEdit(); self.product_filter.setPlaceholderText("Kod"); self.product_filter.setMaximumWidth(120); layout.addWidget(self.product_filter)
+        layout.addWidget(QLabel("Tutar:"))
+        amount_validator = QRegularExpressionValidator(QRegularExpression(r"\d{0,9}([.,]\d{0,2})?"), self)
+        self.min_total_filter = QLineEdit(); self.min_total_filter.setPlaceholderText("En az"); self.min_total_filter.setValidator(amount_validator); self.min_total_filter.setMaximumWidth(90); layout.addWidget(self.min_total_filter)
+        self.max_total_filter = QLineEdit(); self.max_total_filter.setPlaceholderText("En çok"); self.max_total_filter.setValidator(amount_validator); self.max_total_filter.setMaximumWidth(90); layout.addWidget(self.max_total_filter)
         self.filter_btn = QPushButton("🔍 Filtrele"); self.filter_btn.setStyleSheet("QPushButton { background-color: #2196f3; color: white; border: none; padding: 8px 16px; border-radius: 4px; font-weight: bold; } QPushButton:hover { background-color: #1976d2; }"); layout.addWidget(self.filter_btn)
         return panel
 
@@ -110,16 +136,23 @@ class InvoiceHistoryWidget(QWidget):
         panel = QFrame(); layout = QHBoxLayout(panel); layout.setSpacing(10)
         self.pdf_btn = QPushButton("📄 PDF Oluştur"); self.pdf_btn.setStyleSheet("QPushButton { background-color: #ff9800; color: white; border: none; padding: 10px 20px; border-radius: 5px; font-weight: bold; } QPushButton:hover { background-color: #f57c00; }"); layout.addWidget(self.pdf_btn)
         self.excel_btn = QPushButton("📈 Excel'e Aktar"); self.excel_btn.setStyleSheet("QPushButton { background-color: #4caf50; color: white; border: none; padding: 10px 20px; border-radius: 5px; font-weight: bold; } QPushButton:hover { background-color: #45a049; }"); layout.addWidget(self.excel_btn)
+        self.incremental_btn = QPushButton("🗂 Yeni Fişleri CSV'ye Ekle"); self.incremental_btn.setToolTip("Yalnızca bu dosyaya son aktarımdan sonra kaydedilen fişleri dosyanın sonuna ekler"); self.incremental_btn.setStyleSheet("QPushButton { background-color: #009688; color: white; border: none; padding: 10px 20px; border-radius: 5px; font-weight: bold; } QPushButton:hover { background-color: #00796b; }"); layout.addWidget(self.incremental_btn)
         self.refresh_btn = QPushButton("🔄 Yenile"); self.refresh_btn.setStyleSheet("QPushButton { background-color: #9c27b0; color: white; border: none; padding: 10px 20px; border-radius: 5px; font-weight: bold; } QPushButton:hover { background-color: #7b1fa2; }"); layout.addWidget(self.refresh_btn)
         layout.addStretch(); return panel
 
     def setup_connections(self):
         """Sinyal bağlantılarını kur"""
         self.filter_btn.clicked.connect(self.filter_invoices)
+        self.filter_btn.clicked.connect(self.filter_timer.stop)
         self.pdf_btn.clicked.connect(self.generate_selected_pdf) # Seçili olanı PDF yapacak
         self.excel_btn.clicked.connect(self.export_to_excel) # Hatalı fonksiyonu çağırıyordu, düzeltildi
+        self.incremental_btn.clicked.connect(self.export_incremental)
         self.refresh_btn.clicked.connect(lambda: self.load_invoices(show_message=True)) # Yenile butonu mesaj göstersin
-        self.customer_filter.textChanged.connect(self.filter_invoices) # Yazarken filtrele
+        # Yazarken filtrele (her tuşta değil, yazma durunca)
+        for line_edit in (self.customer_filter, self.product_filter, self.min_total_filter, self.max_total_filter):
+            line_edit.textChanged.connect(self.filter_timer.start)
+        self.invoice_table.horizontalHeader().sortIndicatorChanged.connect(self.on_sort_indicator_changed)
+        self.action_delegate.action_triggered.connect(self.on_invoice_action)
 
     def load_invoices(self, show_message=True):
         """Fişleri yükle"""
@@ -141,71 +174,70 @@ class InvoiceHistoryWidget(QWidget):
 
 
             print(f"DEBUG: Fişler yükleniyor: {start_date} - {end_date_obj}") # Debug
-            invoices = self.invoice_manager.get_invoices_by_date_range(start_date, end_date) # Manager'a doğru tarihleri gönder
+            self.populate_invoice_table(self.build_query(start_date, end_date))
 
-            if not invoices:
-                if show_message:
-                    QMessageBox.information(self, "Bilgi", "Seçilen tarih aralığında fiş bulunamadı!")
-                self.invoice_table.setRowCount(0) # Tabloyu temizle
-                return
-
-            self.populate_invoice_table(invoices)
+            if self.invoice_model.rowCount() == 0 and show_message:
+                QMessageBox.information(self, "Bilgi", "Seçilen tarih aralığında fiş bulunamadı!")
 
         except Exception as e:
             QMessageBox.critical(self, "Hata", f"Fişler yüklenemedi!\nHata: {str(e)}")
             print(f"DEBUG: Fiş yükleme hatası: {e}") # Debug
 
-    def populate_invoice_table(self, invoices):
-        """Fiş tablosunu doldur"""
-        self.invoice_table.setRowCount(0) # Önce temizle
-        self.invoice_table.setRowCount(len(invoices))
-        print(f"DEBUG: Tablo dolduruluyor: {len(invoices)} fiş.") # Debug
-
-        for row, invoice in enumerate(invoices):
-             # invoice None veya eksik attribute kontrolü
-            if not invoice or not hasattr(invoice, 'invoice_number'):
-                print(f"UYARI: Satır {row} için geçersiz fiş verisi.")
-                continue
-
-            # Fiş No
-            item_num = QTableWidgetItem(invoice.invoice_number)
-            self.invoice_table.setItem(row, 0, item_num)
-            # Tarih
-            date_str = invoice.invoice_date.strftime("%d.%m.%Y %H:%M") if hasattr(invoice, 'invoice_date') and invoice.invoice_date else "N/A"
-            item_date = QTableWidgetItem(date_str)
-            self.invoice_table.setItem(row, 1, item_date)
-            # Müşteri
-            item_cust = QTableWidgetItem(invoice.customer_name or "")
-            self.invoice_table.setItem(row, 2, item_cust)
-            # Ara Toplam
-            item_sub = QTableWidgetItem(f"{invoice.subtotal or 0:.2f} TL"); item_sub.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
-            self.invoice_table.setItem(row, 3, item_sub)
-            # KDV
-            item_tax = QTableWidgetItem(f"{invoice.tax_amount or 0:.2f} TL"); item_tax.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
-            self.invoice_table.setItem(row, 4, item_tax)
-            # Toplam
-            item_total = QTableWidgetItem(f"{invoice.total_amount or 0:.2f} TL"); item_total.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
-            item_total.setFont(QFont("Roboto", 10, QFont.Weight.Bold)) # Toplamı kalın yap
-            self.invoice_table.setItem(row, 5, item_total)
-
-            # Görüntüle butonu
-            view_btn = QPushButton("👁️"); view_btn.setToolTip("Fiş Detaylarını Görüntüle")
-            view_btn.clicked.connect(lambda checked, inv=invoice: self.view_invoice(inv))
-            self.invoice_table.setCellWidget(row, 6, view_btn)
-            # PDF butonu
-            pdf_btn = QPushButton("📄"); pdf_btn.setToolTip("Bu Fişi PDF Olarak Kaydet")
-            pdf_btn.clicked.connect(lambda checked, inv=invoice: self.generate_single_invoice_pdf(inv)) # Ayrı fonksiyon
-            self.invoice_table.setCellWidget(row, 7, pdf_btn)
-            # Sil butonu
-            delete_btn = QPushButton("❌"); delete_btn.setToolTip("Bu Fişi Sil")
-            delete_btn.setStyleSheet("background-color: #e74c3c; color: white; border:none; border-radius: 3px;")
-            delete_btn.clicked.connect(lambda checked, num=invoice.invoice_number: self.confirm_delete_invoice(num))
-            self.invoice_table.setCellWidget(row, 8, delete_btn)
-
-        # Tablonun içeriğe göre boyutlanmasını sağla (ilk iki sütun için)
-        # self.invoice_table.resizeColumnsToContents()
-        print("DEBUG: Tablo dolduruldu.") # Debug
-
+    def build_query(self, start_date, end_date):
+        """Filtre panelinden fiş sorgusu (end_date hariç)"""
+        return InvoiceQuery(
+            start_date=start_date,
+            end_date=end_date,
+            customer_prefix=self.customer_filter.text().strip(),
+            product_code=self.product_filter.text().strip(),
+            min_total=self._amount_filter(self.min_total_filter),
+            max_total=self._amount_filter(self.max_total_filter),
+        )
+
+    @staticmethod
+    def _amount_filter(line_edit):
+        """Tutar kutusu -> Decimal (boş veya yarım girişse filtre yok)"""
+        try:
+            return Decimal(line_edit.text().strip().replace(",", ".")) if line_edit.text().strip() else None
+        except InvalidOperation:
+            return None
+
+    def populate_invoice_table(self, query):
+        """Tabloyu yeni sorguya bağla (ilk sayfa yüklenir, kalanı kaydırdıkça gelir)"""
+        self._loaded_data_version = self.invoice_manager.db.data_version()
+        self.invoice_model.set_query(query)
+        totals = self.invoice_model.totals
+        self.totals_label.setText(
+            f"{totals['invoice_count']:,} fiş".replace(",", ".")
+            + f"   |   Ara Toplam: {totals['subtotal']:.2f} TL   |   KDV: {totals['tax_amount']:.2f} TL"
+            f"   |   Toplam: {totals['total_amount']:.2f} TL"
+        )
+        print(f"DEBUG: Tablo dolduruldu: ilk sayfada {self.invoice_model.rowCount()} fiş.") # Debug
+
+    def on_sort_indicator_changed(self, column, order):
+        """İşlem sütunları sıralanmaz: başlık okunu modelin sırasına geri al"""
+        if column not in SORT_FIELDS:
+            header = self.invoice_table.horizontalHeader()
+            header.blockSignals(True)
+            header.setSortIndicator(self.invoice_model.sort_column, self.invoice_model.sort_order)
+            header.blockSignals(False)
+
+    def refresh_if_changed(self):
+        """Zamanlayıcı: veritabanı değiştiyse listeyi yeniden yükle (değişmediyse kaydırma konumu korunur)"""
+        if self.invoice_manager.db.data_version() != self._loaded_data_version:
+            self.load_invoices(show_message=False)
+
+    def on_invoice_action(self, action, row):
+        """Tablodaki Görüntüle/PDF/Sil sütunlarına tıklandı"""
+        invoice = self.invoice_model.invoice_at(row)
+        if invoice is None:
+            return
+        if action == "view":
+            self.view_invoice(invoice)
+        elif action == "pdf":
+            self.generate_single_invoice_pdf(invoice)
+        elif action == "delete":
+            self.confirm_delete_invoice(invoice.invoice_number)
 
     def filter_invoices(self):
         """Fişleri filtrele"""
@@ -222,17 +254,11 @@ class InvoiceHistoryWidget(QWidget):
                  # self.load_invoices(show_message=False) # Ya da varsayılan aralığı yükle
                  return
 
-            customer_filter = self.customer_filter.text().strip()
-            print(f"DEBUG: Filtreleme: {start_date} - {end_date_obj}, Müşteri: '{customer_filter}'") # Debug
-
-            invoices = self.invoice_manager.get_invoices_by_date_range(start_date, end_date)
+            query = self.build_query(start_date, end_date)
+            print(f"DEBUG: Filtreleme: {start_date} - {end_date_obj}, Müşteri: '{query.customer_prefix}'") # Debug
 
-            # Müşteri filtresi uygula (büyük/küçük harf duyarsız)
-            if customer_filter:
-                invoices = [inv for inv in invoices if inv and hasattr(inv, 'customer_name') and inv.customer_name and customer_filter.lower() in inv.customer_name.lower()]
-                print(f"DEBUG: Müşteri filtresi sonrası kalan fiş sayısı: {len(invoices)}") # Debug
-
-            self.populate_invoice_table(invoices)
+            # Tüm filtreler SQL'de uygulanır (müşteri öneki Türkçe harf duyarsız)
+            self.populate_invoice_table(query)
 
         except Exception as e:
             QMessageBox.critical(self, "Hata", f"Filtreleme hatası!\nHata: {str(e)}")
@@ -343,14 +369,13 @@ TOPLAM: {invoice.total_amount or 0:.2f} TL
              QMessageBox.warning(self, "Uyarı", "Lütfen sadece bir fiş seçin.")
              return
 
-        selected_row_index = selected_rows[0].row()
-        invoice_number_item = self.invoice_table.item(selected_row_index, 0) # Fiş No sütunu
+        selected_invoice = self.invoice_model.invoice_at(selected_rows[0].row())
 
-        if not invoice_number_item:
+        if not selected_invoice:
              QMessageBox.warning(self, "Uyarı", "Seçili satırdan fiş numarası alınamadı.")
              return
 
-        invoice_number = invoice_number_item.text()
+        invoice_number = selected_invoice.invoice_number
         print(f"DEBUG: Seçili fiş PDF'i oluşturulacak: {invoice_number}") # Debug
 
         try:
@@ -368,11 +393,12 @@ TOPLAM: {invoice.total_amount or 0:.2f} TL
     def export_to_excel(self):
         """Excel'e aktar (DÜZELTİLDİ - DataImporter kullanılıyor)"""
         try:
-            file_path, _ = QFileDialog.getSaveFileName(
-                self, "Excel Kaydet", f"fisler_{datetime.now().strftime('%Y%m%d')}.xlsx", "Excel Dosyaları (*.xlsx)"
+            file_path, selected_filter = QFileDialog.getSaveFileName(
+                self, "Excel Kaydet", f"fisler_{datetime.now().strftime('%Y%m%d')}.xlsx", export_file_filter()
             )
 
             if file_path:
+                file_path = export_path_with_extension(file_path, selected_filter)
                 # --- DOĞRU SINIFI KULLAN ---
                 # excel_handler = ExcelHandler() # YANLIŞ
                 data_importer = DataImporter() # DOĞRU
@@ -388,16 +414,51 @@ TOPLAM: {invoice.total_amount or 0:.2f} TL
                 print(f"DEBUG (History): export_invoices çağrılıyor. Path: {file_path}, Start: {start_date_str}, End: {end_date_str}") # Debug
 
                 # --- DOĞRU FONKSİYONU ÇAĞIR ---
-                data_importer.export_invoices(
-                    file_path=file_path,
-                    start_date=start_date_str,
-                    end_date=end_date_str
-                )
+                progress = ExportProgressDialog("Fişler Excel'e aktarılıyor...", self)
+                try:
+                    result = data_importer.export_invoices(
+                        file_path=file_path,
+                        start_date=start_date_str,
+                        end_date=end_date_str,
+                        progress=progress
+                    )
+                finally:
+                    progress.close()
                 # -----------------------------
 
+                if result['cancelled']:
+                    QMessageBox.information(self, "İptal", "Excel aktarımı iptal edildi.")
+                    return
                 QMessageBox.information(self, "Başarılı", f"Excel dosyası oluşturuldu!\nDosya: {file_path}")
 
         except Exception as e:
             QMessageBox.critical(self, "Hata", f"Excel dosyası oluşturulamadı!\nHata: {str(e)}")
             print(f"DEBUG (History Excel Export): Hata: {e}") # Debug
-    # --- DEĞİŞİKLİK SONU ---
\ No newline at end of file
+    # --- DEĞİŞİKLİK SONU ---
+
+    def export_incremental(self):
+        """Son aktarımdan sonraki fişleri seçilen CSV dosyasının sonuna ekle (tarih filtresi kullanılmaz)"""
+        try:
+            file_path, _ = QFileDialog.getSaveFileName(
+                self, "Fiş Kayıt Dosyası (CSV)", "fisler.csv", "CSV Dosyaları (*.csv)",
+                options=QFileDialog.Option.DontConfirmOverwrite  # Mevcut dosyanın sonuna eklenir
+            )
+            if not file_path:
+                return
+
+            progress = ExportProgressDialog("Yeni fişler dosyaya ekleniyor...", self)
+            try:
+                result = DataImporter().export_invoices_incremental(file_path, progress=progress)
+            finally:
+                progress.close()
+
+            if result['cancelled']:
+                QMessageBox.information(self, "İptal", "Aktarım iptal edildi, dosya değiştirilmedi.")
+            elif not result['rows']:
+                QMessageBox.information(self, "Bilgi", "Son aktarımdan sonra kaydedilmiş yeni fiş yok.")
+            else:
+                QMessageBox.information(self, "Başarılı",
+                                        f"{result['invoices']} yeni fiş ({result['rows']} satır) eklendi.\nDosya: {file_path}")
+        except Exception as e:
+            QMessageBox.critical(self, "Hata", f"Aktarım yapılamadı!\nHata: {str(e)}")
+            print(f"DEBUG (History Incremental Export): Hata: {e}")
\ No newline at end of file
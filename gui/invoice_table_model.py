@@ -0,0 +1,216 @@
+"""
+Fiş geçmişi tablosu için sanal model ve işlem sütunları delegesi
+
+InvoiceTableModel satırları InvoiceManager.query_invoices ile sayfa sayfa
+çeker: görünüm kaydırma sonuna yaklaştıkça canFetchMore/fetchMore ile bir
+sonraki sayfa eklenir. Hücre metinleri yalnızca çizilirken üretilir; satır
+başına QTableWidgetItem veya buton oluşturulmaz. Sıralama (başlığa tıklama)
+ve alt satır toplamları da SQL'de yapılır.
+
+Görüntüle/PDF/Sil sütunlarını InvoiceActionDelegate buton gibi çizer ve
+tıklamaları action_triggered(işlem, satır) sinyaliyle bildirir.
+"""
+from dataclasses import replace
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from PySide6.QtCore import QAbstractTableModel, QEvent, QModelIndex, QRect, Qt, Signal
+from PySide6.QtGui import QColor, QFont, QPainter
+from PySide6.QtWidgets import QStyle, QStyledItemDelegate
+
+from database.models import InvoiceQuery, InvoiceSummary
+
+# (başlık, işlem adı); işlem adı None olan sütunlar veri sütunudur
+COLUMNS = [
+    ("Fiş No", None), ("Tarih", None), ("Müşteri", None),
+    ("Ara Toplam", None), ("KDV", None), ("Toplam", None),
+    ("Görüntüle", "view"), ("PDF", "pdf"), ("Sil", "delete"),
+]
+MONEY_COLUMNS = {3: "subtotal", 4: "tax_amount", 5: "total_amount"}
+TOTAL_COLUMN = 5
+# Sütun -> InvoiceQuery.sort_by (işlem sütunları sıralanmaz)
+SORT_FIELDS = {
+    0: "invoice_number", 1: "invoice_date", 2: "customer_name",
+    3: "subtotal", 4: "tax_amount", 5: "total_amount",
+}
+DEFAULT_SORT_COLUMN = 1  # Tarih, yeniden eskiye
+
+# İşlem sütunları: simge, ipucu, arka plan rengi (None: normal buton görünümü)
+ACTIONS = {
+    "view": ("👁️", "Fiş Detaylarını Görüntüle", None),
+    "pdf": ("📄", "Bu Fişi PDF Olarak Kaydet", None),
+    "delete": ("❌", "Bu Fişi Sil", QColor("#e74c3c")),
+}
+
+# data() görünüm tarafından hücre ve rol başına çağrılır; Qt enum özniteliklerine
+# her seferinde erişmek pahalı olduğundan roller bir kez alınır
+DISPLAY_ROLE = Qt.ItemDataRole.DisplayRole
+ALIGNMENT_ROLE = Qt.ItemDataRole.TextAlignmentRole
+FONT_ROLE = Qt.ItemDataRole.FontRole
+TOOLTIP_ROLE = Qt.ItemDataRole.ToolTipRole
+USER_ROLE = Qt.ItemDataRole.UserRole
+HANDLED_ROLES = {DISPLAY_ROLE, ALIGNMENT_ROLE, FONT_ROLE, TOOLTIP_ROLE, USER_ROLE}
+RIGHT_ALIGNED = Qt.AlignRight | Qt.AlignVCenter
+CENTER_ALIGNED = Qt.AlignCenter
+
+
+class InvoiceTableModel(QAbstractTableModel):
+    """InvoiceQuery filtrelerine uyan fiş başlıklarını sayfalı gösteren salt okunur model"""
+
+    def __init__(self, invoice_manager, parent=None):
+        super().__init__(parent)
+        self.invoice_manager = invoice_manager
+        self._invoices: List[InvoiceSummary] = []
+        self._next_key = None
+        self._has_more = False
+        self._query: Optional[InvoiceQuery] = None
+        self.sort_column = DEFAULT_SORT_COLUMN
+        self.sort_order = Qt.DescendingOrder
+        self.totals: Dict = {}
+        self._bold_font = QFont("Roboto", 10, QFont.Weight.Bold)
+
+    def set_query(self, query: InvoiceQuery):
+        """
+        Yeni filtreler: toplamlar hesaplanır, model sıfırlanır ve ilk sayfa hemen
+        yüklenir. Sıralama modelde tutulur (query.sort_by/descending yok sayılır).
+        """
+        self.totals = self.invoice_manager.get_invoice_totals(query)
+        self._reload(query)
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        """Başlığa tıklandı: aynı filtrelerle SQL'de yeniden sırala (toplamlar değişmez)"""
+        if column not in SORT_FIELDS:
+            return
+        self.sort_column, self.sort_order = column, order
+        if self._query is not None:
+            self._reload(self._query)
+
+    def _reload(self, query: InvoiceQuery):
+        self.beginResetModel()
+        self._query = replace(query, sort_by=SORT_FIELDS[self.sort_column],
+                              descending=self.sort_order == Qt.DescendingOrder)
+        self._invoices = []
+        self._next_key = None
+        self._has_more = False
+        try:
+            self._invoices, self._next_key = self._load_page()
+            self._has_more = self._next_key is not None
+        finally:
+            self.endResetModel()
+
+    def _load_page(self):
+        return self.invoice_manager.query_invoices(self._query, after=self._next_key)
+
+    def invoice_at(self, row: int) -> Optional[InvoiceSummary]:
+        """Satırdaki fiş başlığı"""
+        if 0 <= row < len(self._invoices):
+            return self._invoices[row]
+        return None
+
+    # --- QAbstractTableModel ---
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._invoices)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return COLUMNS[section][0]
+        return super().headerData(section, orientation, role)
+
+    def data(self, index, role=DISPLAY_ROLE):
+        if role not in HANDLED_ROLES or not index.isValid():
+            return None
+        invoice = self._invoices[index.row()]
+        column = index.column()
+        action = COLUMNS[column][1]
+
+        if role == DISPLAY_ROLE:
+            if action is not None:
+                return ACTIONS[action][0]
+            if column == 0:
+                return invoice.invoice_number
+            if column == 1:
+                return invoice.invoice_date.strftime("%d.%m.%Y %H:%M") if isinstance(invoice.invoice_date, datetime) else "N/A"
+            if column == 2:
+                return invoice.customer_name or ""
+            return f"{getattr(invoice, MONEY_COLUMNS[column]) or 0:.2f} TL"
+        if role == ALIGNMENT_ROLE:
+            if column in MONEY_COLUMNS:
+                return RIGHT_ALIGNED
+            if action is not None:
+                return CENTER_ALIGNED
+        elif role == FONT_ROLE and column == TOTAL_COLUMN:
+            return self._bold_font  # Toplamı kalın yap
+        elif role == TOOLTIP_ROLE and action is not None:
+            return ACTIONS[action][1]
+        elif role == USER_ROLE:
+            return invoice
+        return None
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self._has_more
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or not self._has_more:
+            return
+        page, next_key = self._load_page()
+        self._has_more = next_key is not None
+        if page:
+            first = len(self._invoices)
+            self.beginInsertRows(QModelIndex(), first, first + len(page) - 1)
+            self._invoices.extend(page)
+            self._next_key = next_key
+            self.endInsertRows()
+
+
+class InvoiceActionDelegate(QStyledItemDelegate):
+    """Görüntüle/PDF/Sil sütunlarını buton gibi çizer; tıklamada action_triggered yayar"""
+
+    action_triggered = Signal(str, int)  # (işlem adı, satır)
+
+    MARGIN = 3
+
+    def paint(self, painter: QPainter, option, index):
+        action = COLUMNS[index.column()][1]
+        if action is None:
+            super().paint(painter, option, index)
+            return
+
+        icon, _, color = ACTIONS[action]
+        rect = option.rect.adjusted(self.MARGIN, self.MARGIN, -self.MARGIN, -self.MARGIN)
+        painter.save()
+        painter.setRenderHint(QPainter.Antialiasing)
+        if option.state & QStyle.State_Selected:
+            painter.fillRect(option.rect, option.palette.highlight())
+        if color is not None:
+            painter.setPen(Qt.NoPen)
+            painter.setBrush(color.darker(115) if option.state & QStyle.State_MouseOver else color)
+            painter.drawRoundedRect(rect, 3, 3)
+            painter.setPen(QColor("white"))
+        else:
+            painter.setPen(option.palette.mid().color())
+            painter.setBrush(option.palette.light() if option.state & QStyle.State_MouseOver else option.palette.button())
+            painter.drawRoundedRect(rect, 3, 3)
+            painter.setPen(option.palette.buttonText().color())
+        painter.drawText(rect, Qt.AlignCenter, icon)
+        painter.restore()
+
+    def sizeHint(self, option, index):
+        size = super().sizeHint(option, index)
+        if COLUMNS[index.column()][1] is not None:
+            size.setWidth(max(size.width(), 48))
+        return size
+
+    def editorEvent(self, event, model, option, index):
+        action = COLUMNS[index.column()][1]
+        if action is None:
+            return super().editorEvent(event, model, option, index)
+        if event.type() == QEvent.MouseButtonRelease and event.button() == Qt.LeftButton:
+            rect = QRect(option.rect).adjusted(self.MARGIN, self.MARGIN, -self.MARGIN, -self.MARGIN)
+            if rect.contains(event.position().toPoint()):
+                self.action_triggered.emit(action, index.row())
+                return True
+        return False
@@ -37,6 +37,8 @@ class InvoiceWidget(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.invoice_manager = InvoiceManager()
+        # Ürün kataloğu arka planda yüklenir; hazır olana kadar aramalar veritabanından yapılır
+        self.invoice_manager.catalog.load_async()
         self.pdf_generator = PDFGenerator()
         self.current_invoice = Invoice(items=[])
         """Fiş/Sipariş Yönetimi widget'ı"""
@@ -380,11 +382,21 @@ class InvoiceWidget(QWidget):
         if hasattr(self, 'discount_input'): self.discount_input.editingFinished.connect(self.on_discount_changed)
         if hasattr(self, 'discount_type_combo'): self.discount_type_combo.currentIndexChanged.connect(self.on_discount_changed)
 
+    @staticmethod
+    def _customer_tooltip(stats) -> str:
+        """Müşteri seçicide gösterilen alış özeti (customer_stats)"""
+        if stats is None:
+            return "Henüz fiş yok"
+        last = stats.last_purchase.strftime("%d.%m.%Y") if stats.last_purchase else "-"
+        return (f"{stats.invoice_count} fiş, toplam {stats.total_amount:.2f} ₺\n"
+                f"Ortalama {stats.avg_amount:.2f} ₺, son alış {last}")
+
     def load_customers(self):
         """Müşteri listesini yükle (customer_selector için)"""
         if not hasattr(self, 'customer_selector') or not hasattr(self, 'invoice_manager'): return
         try:
             customers = self.invoice_manager.get_all_customers()
+            customer_stats = self.invoice_manager.get_customer_stats()
             self.customer_selector.blockSignals(True)
             current_selection_data = self.customer_selector.currentData()
             
@@ -395,6 +407,11 @@ class InvoiceWidget(QWidget):
             for i, customer in enumerate(customers or []):  # None kontrolü
                 if customer and hasattr(customer, 'name') and hasattr(customer, 'id'):
                     self.customer_selector.addItem(customer.name, customer)
+                    self.customer_selector.setItemData(
+                        self.customer_selector.count() - 1,
+                        self._customer_tooltip(customer_stats.get(customer.id)),
+                        Qt.ToolTipRole
+                    )
                     if (current_selection_data and 
                         hasattr(current_selection_data, 'id') and 
                         customer.id == current_selection_data.id):
@@ -807,6 +824,7 @@ class InvoiceWidget(QWidget):
         if not hasattr(self, 'customer_selector') or not hasattr(self, 'invoice_manager'): return
         try:
             customers = self.invoice_manager.get_all_customers()
+            customer_stats = self.invoice_manager.get_customer_stats()
             self.customer_selector.blockSignals(True)
             current_selection_data = self.customer_selector.currentData()
             
@@ -817,6 +835,11 @@ class InvoiceWidget(QWidget):
             for i, customer in enumerate(customers or []):  # None kontrolü
                 if customer and hasattr(customer, 'name') and hasattr(customer, 'id'):
                     self.customer_selector.addItem(customer.name, customer)
+                    self.customer_selector.setItemData(
+                        self.customer_selector.count() - 1,
+                        self._customer_tooltip(customer_stats.get(customer.id)),
+                        Qt.ToolTipRole
+                    )
                     if (current_selection_data and 
                         hasattr(current_selection_data, 'id') and 
                         customer.id == current_selection_data.id):
@@ -916,6 +939,8 @@ class InvoiceWidget(QWidget):
         # Kaydetmeden önce son kez toplamları ve indirimi hesapla/güncelle
         self.update_totals() # Bu satır kritik
         self.current_invoice.customer_name = customer_name
+        selected_customer = self.customer_selector.currentData() if hasattr(self, 'customer_selector') else None
+        self.current_invoice.customer_id = selected_customer.id if isinstance(selected_customer, Customer) and selected_customer.name == customer_name else None
         self.current_invoice.customer_address = self.customer_address.toPlainText().strip() if hasattr(self, 'customer_address') else ""
         self.current_invoice.delivery_person = self.delivery_person.text().strip() if hasattr(self, 'delivery_person') else "Mehmet Ali"
         self.current_invoice.receiver_person = self.receiver_person.text().strip() if hasattr(self, 'receiver_person') else ""
@@ -21,6 +21,7 @@ from modules.report_generator import ReportGenerator
 
 # --- YENİ EKLENEN IMPORT (HATA DÜZELTMESİ) ---
 from modules.data_importer import DataImporter
+from .export_progress import ExportProgressDialog, export_file_filter, export_path_with_extension
 # ---------------------------------------------
 
 
@@ -303,6 +304,8 @@ class ReportsWidget(QWidget):
             else:
                 self.current_report_data = []
 
+            print(f"DEBUG: Rapor önbelleği: {self.report_generator.cache_stats()}")
+
             # Tabloyu güncelle
             self.update_report_table()
             
@@ -442,21 +445,30 @@ class ReportsWidget(QWidget):
             end_date_str = end_date_py.isoformat()
             
             # 3. Dosya kaydetme diyaloğunu aç
-            file_path, _ = QFileDialog.getSaveFileName(
+            file_path, selected_filter = QFileDialog.getSaveFileName(
                 self, "Excel Fiş Raporu Kaydet", 
                 f"fis_raporu_{datetime.now().strftime('%Y%m%d')}.xlsx",
-                "Excel Dosyaları (*.xlsx)"
+                export_file_filter()  # xlsx, csv, csv.gz (pyarrow varsa parquet)
             )
             
             if file_path:
+                file_path = export_path_with_extension(file_path, selected_filter)
                 # 4. DataImporter'daki DOĞRU fonksiyonu çağır
                 print(f"DEBUG: export_invoices çağrılıyor. Path: {file_path}, Start: {start_date_str}, End: {end_date_str}")
-                self.data_importer.export_invoices(
-                    file_path=file_path, 
-                    start_date=start_date_str, 
-                    end_date=end_date_str
-                )
-                QMessageBox.information(self, "Başarılı", f"Fiş raporu Excel'e aktarıldı:\n{file_path}")
+                progress = ExportProgressDialog("Fişler Excel'e aktarılıyor...", self)
+                try:
+                    result = self.data_importer.export_invoices(
+                        file_path=file_path, 
+                        start_date=start_date_str, 
+                        end_date=end_date_str,
+                        progress=progress
+                    )
+                finally:
+                    progress.close()
+                if result['cancelled']:
+                    QMessageBox.information(self, "İptal", "Excel aktarımı iptal edildi.")
+                    return
+                QMessageBox.information(self, "Başarılı", f"Fiş raporu Excel'e aktarıldı ({result['rows']} satır):\n{file_path}")
                     
         except Exception as e:
             QMessageBox.warning(self, "Hata", f"Excel dosyası oluşturulamadı!\nHata: {str(e)}")
@@ -22,6 +22,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from database.models import User, EmailSettings
 from modules.email_service import EmailService
 from modules.data_importer import DataImporter
+from .import_worker import ImportWorker
 
 
 class SettingsWidget(QWidget):
@@ -31,6 +32,8 @@ class SettingsWidget(QWidget):
         super().__init__()
         self.email_service = EmailService()
         self.data_importer = DataImporter()
+        self.import_worker = None
+        self.import_label = ""
         
         self.init_ui()
         self.setup_connections()
@@ -339,6 +342,19 @@ class SettingsWidget(QWidget):
         
         import_layout.addLayout(customer_import_layout)
         
+        # İçe aktarma ilerlemesi (yalnızca içe aktarma sürerken görünür)
+        import_progress_layout = QHBoxLayout()
+        self.import_progress_bar = QProgressBar()
+        self.import_progress_bar.setRange(0, 100)
+        self.import_progress_bar.setVisible(False)
+        import_progress_layout.addWidget(self.import_progress_bar)
+        
+        self.cancel_import_btn = QPushButton("İptal")
+        self.cancel_import_btn.setVisible(False)
+        import_progress_layout.addWidget(self.cancel_import_btn)
+        
+        import_layout.addLayout(import_progress_layout)
+        
         layout.addWidget(import_group)
         
         # Veri dışa aktarma grubu
@@ -490,6 +506,7 @@ class SettingsWidget(QWidget):
         # Veri yönetimi
         self.import_products_btn.clicked.connect(self.import_products)
         self.import_customers_btn.clicked.connect(self.import_customers)
+        self.cancel_import_btn.clicked.connect(self.cancel_import)
         self.download_product_template_btn.clicked.connect(self.download_product_template)
         self.download_customer_template_btn.clicked.connect(self.download_customer_template)
         self.export_products_btn.clicked.connect(self.export_products)
@@ -620,32 +637,84 @@ class SettingsWidget(QWidget):
         QMessageBox.information(self, "Bilgi", "Kullanıcı silme özelliği yakında eklenecek!")
     
     def import_products(self):
-        """Ürünleri içe aktar"""
-        try:
-            file_path, _ = QFileDialog.getOpenFileName(
-                self, "Ürün Dosyası Seç", "", "Excel Dosyaları (*.xlsx *.xls);;CSV Dosyaları (*.csv)"
-            )
-            
-            if file_path:
-                result = self.data_importer.import_products(file_path)
-                QMessageBox.information(self, "Başarılı", f"{result['imported']} ürün içe aktarıldı!")
-                
-        except Exception as e:
-            QMessageBox.critical(self, "Hata", f"Ürünler içe aktarılamadı!\nHata: {str(e)}")
+        """Ürünleri içe aktar (arka planda)"""
+        file_path, _ = QFileDialog.getOpenFileName(
+            self, "Ürün Dosyası Seç", "", "Excel Dosyaları (*.xlsx *.xls);;CSV Dosyaları (*.csv)"
+        )
+        
+        if file_path:
+            self.start_import(self.data_importer.import_products, file_path, "ürün")
     
     def import_customers(self):
-        """Müşterileri içe aktar"""
-        try:
-            file_path, _ = QFileDialog.getOpenFileName(
-                self, "Müşteri Dosyası Seç", "", "Excel Dosyaları (*.xlsx *.xls);;CSV Dosyaları (*.csv)"
-            )
-            
-            if file_path:
-                result = self.data_importer.import_customers(file_path)
-                QMessageBox.information(self, "Başarılı", f"{result['imported']} müşteri içe aktarıldı!")
-                
-        except Exception as e:
-            QMessageBox.critical(self, "Hata", f"Müşteriler içe aktarılamadı!\nHata: {str(e)}")
+        """Müşterileri içe aktar (arka planda)"""
+        file_path, _ = QFileDialog.getOpenFileName(
+            self, "Müşteri Dosyası Seç", "", "Excel Dosyaları (*.xlsx *.xls);;CSV Dosyaları (*.csv)"
+        )
+        
+        if file_path:
+            self.start_import(self.data_importer.import_customers, file_path, "müşteri")
+    
+    def start_import(self, import_method, file_path: str, label: str):
+        """İçe aktarmayı ayrı thread'de başlat; arayüz donmaz, ilerleme çubuğu güncellenir"""
+        if self.import_worker is not None and self.import_worker.isRunning():
+            QMessageBox.warning(self, "Uyarı", "Devam eden bir içe aktarma var!")
+            return
+        
+        self.import_products_btn.setEnabled(False)
+        self.import_customers_btn.setEnabled(False)
+        self.import_progress_bar.setRange(0, 100)
+        self.import_progress_bar.setValue(0)
+        self.import_progress_bar.setVisible(True)
+        self.cancel_import_btn.setEnabled(True)
+        self.cancel_import_btn.setVisible(True)
+        
+        self.import_worker = ImportWorker(import_method, file_path, self)
+        self.import_worker.progress_changed.connect(self.update_import_progress)
+        self.import_label = label
+        self.import_worker.import_finished.connect(self.on_import_finished)
+        self.import_worker.import_failed.connect(self.on_import_failed)
+        self.import_worker.finished.connect(self.reset_import_ui)
+        self.import_worker.start()
+    
+    def update_import_progress(self, percent: int):
+        """İlerleme çubuğunu güncelle (-1: toplam bilinmiyor)"""
+        if percent < 0:
+            self.import_progress_bar.setRange(0, 0)
+        else:
+            self.import_progress_bar.setRange(0, 100)
+            self.import_progress_bar.setValue(percent)
+    
+    def cancel_import(self):
+        """Devam eden içe aktarmayı durdur (kaydedilen parçalar kalır)"""
+        if self.import_worker is not None:
+            self.import_worker.cancel()
+            self.cancel_import_btn.setEnabled(False)
+    
+    def on_import_finished(self, result: dict):
+        message = (f"{result['imported']} {self.import_label} içe aktarıldı, {result['updated']} güncellendi, "
+                   f"{result['unchanged']} değişmedi ({result['skipped']} satır atlandı).")
+        if result.get('duplicates'):
+            message += f"\nDosyada aynı anahtarla tekrar eden {result['duplicates']} satır için son satır kullanıldı."
+        if result.get('errors'):
+            # Satır bazında hata raporunun ilk satırları
+            lines = [f"Satır {error['row']} ({error['column']}): {error['error']} [{error['value']}]"
+                     for error in result['errors'][:10]]
+            if result['skipped'] > len(lines):
+                lines.append(f"... toplam {result['skipped']} geçersiz satır")
+            message += "\n\nAtlanan satırlar:\n" + "\n".join(lines)
+        if result.get('cancelled'):
+            QMessageBox.warning(self, "İptal Edildi", f"İçe aktarma yarıda kesildi.\nO ana kadar: {message}")
+        else:
+            QMessageBox.information(self, "Başarılı", message)
+    
+    def on_import_failed(self, error: str):
+        QMessageBox.critical(self, "Hata", f"İçe aktarma başarısız!\nHata: {error}")
+    
+    def reset_import_ui(self):
+        self.import_progress_bar.setVisible(False)
+        self.cancel_import_btn.setVisible(False)
+        self.import_products_btn.setEnabled(True)
+        self.import_customers_btn.setEnabled(True)
     
     def download_product_template(self):
         """Ürün şablonunu indir"""
@@ -115,6 +115,13 @@ def main():
     except Exception as e:
         write_log(f"Stil dosyası yüklenemedi: {e}")
     
+    # Veritabanını QApplication oluştuktan sonra başlat (hata mesaj kutusu gösterilebilsin)
+    from database import db_manager
+    write_log("Veritabanı başlatılıyor...")
+    db_manager.init()
+    # Uygulama kapanırken havuzdaki veritabanı bağlantılarını kapat
+    app.aboutToQuit.connect(db_manager.close)
+    
     write_log("Ana pencere (MainWindow) oluşturuluyor...")
     window = MainWindow()
     window.show()
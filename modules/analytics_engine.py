@@ -0,0 +1,219 @@
+"""
+NumPy ile sütunsal rapor motoru (isteğe bağlı)
+
+Fiş ve kalem olguları (gün, müşteri, ürün, miktar, kuruş tutarları)
+modules.fact_store.FactStore sütunlarından okunur; günlük/aylık/ürün/müşteri/
+ilk-N toplamları SQLite'a gitmeden vektörel gruplamalarla (np.bincount,
+np.unique, argsort) hesaplanır.
+
+Dosya veritabanında sütunlar '<veritabanı>.facts/' altında memmap olarak
+kalıcıdır; uygulama yeniden açıldığında yükleme yapılmaz, yalnızca son
+eşitlemeden sonra eklenen satırlar okunur (eşitleme ve silme/güncelleme
+sağlaması için bkz. fact_store).
+
+NumPy kurulu değilse AnalyticsEngine.available() False döner ve
+ReportGenerator SQL yoluyla çalışmaya devam eder. Çıktılar ReportGenerator
+metotlarıyla aynı biçimdedir (ReportsWidget.update_report_table).
+"""
+import os
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Any, Dict, List, Optional
+
+try:
+    import numpy as np
+except ImportError:  # NumPy isteğe bağlı
+    np = None
+
+from database import db_manager, day_number, day_from_number
+from database.money import from_minor
+from modules.fact_store import FactStore
+
+_CENT = Decimal("0.01")
+
+
+def _average(total_minor: int, count: int) -> Decimal:
+    """Kuruş toplamından ortalama TL (SQL yolundaki MONEY dönüştürücüsüyle aynı yuvarlama)"""
+    if not count:
+        return Decimal("0.00")
+    return (Decimal(int(total_minor)) / count).scaleb(-2).quantize(_CENT, rounding=ROUND_HALF_UP)
+
+
+class AnalyticsEngine:
+    """Fiş/kalem olgu sütunları (FactStore) üzerinde çalışan rapor motoru"""
+
+    def __init__(self, db=None, store: Optional[FactStore] = None):
+        if np is None:
+            raise ImportError("Analiz motoru için NumPy gerekli")
+        self.db = db or db_manager
+        self._store = store  # Veritabanı henüz açılmamış olabilir; ilk kullanımda oluşturulur
+
+    @staticmethod
+    def available() -> bool:
+        """NumPy kurulu mu?"""
+        return np is not None
+
+    @classmethod
+    def from_environment(cls, db=None, use_engine: Optional[bool] = None) -> Optional["AnalyticsEngine"]:
+        """use_engine verilmezse FORKLIFT_ANALYTICS=numpy ile açılır; NumPy yoksa None"""
+        if use_engine is None:
+            use_engine = os.environ.get("FORKLIFT_ANALYTICS", "").lower() == "numpy"
+        return cls(db) if use_engine and cls.available() else None
+
+    @property
+    def store(self) -> FactStore:
+        if self._store is None:
+            self._store = FactStore.for_database(self.db)
+        return self._store
+
+    def refresh(self, full: bool = False):
+        """Olgu deposunu veritabanıyla eşitle (değişiklik yoksa bir şey yapmaz)"""
+        self.store.sync(self.db, force_rebuild=full)
+
+    # --- Yardımcılar ---
+
+    @staticmethod
+    def _day_range(start_date, end_date):
+        return day_number(start_date), day_number(end_date)
+
+    @staticmethod
+    def _group_sum(keys, weights, size: int):
+        """Anahtar başına tam sayı toplam (bincount ağırlıkları float64; kuruşta 2^53'e kadar kesin)"""
+        return np.rint(np.bincount(keys, weights=weights, minlength=size)).astype(np.int64)
+
+    # --- Raporlar (ReportGenerator ile aynı çıktı biçimi) ---
+    # Aralıklar store.invoice_range/item_range ile seçilir: gün sütunu sıralıysa dilimdir ve
+    # memmap'ten yalnızca o aralığın sayfaları okunur.
+
+    def daily_sales(self, start_date, end_date) -> List[Dict[str, Any]]:
+        self.refresh()
+        store = self.store
+        rows = store.invoice_range(*self._day_range(start_date, end_date))
+        days, inverse = np.unique(store.invoice_days[rows], return_inverse=True)
+        counts = np.bincount(inverse, minlength=len(days))
+        totals = self._group_sum(inverse, store.invoice_totals[rows], len(days))
+        return [
+            {'date': day_from_number(int(day)), 'invoice_count': int(count), 'revenue': from_minor(int(total))}
+            for day, count, total in zip(days, counts, totals)
+        ]
+
+    def monthly_sales(self, year: int) -> List[Dict[str, Any]]:
+        self.refresh()
+        store = self.store
+        rows = store.invoice_range(year * 10000 + 101, year * 10000 + 1231)
+        months = store.invoice_days[rows] // 100 % 100
+        counts = np.bincount(months, minlength=13)
+        totals = self._group_sum(months, store.invoice_totals[rows], 13)
+        return [
+            {'month': month, 'invoice_count': int(counts[month]), 'revenue': from_minor(int(totals[month]))}
+            for month in range(1, 13) if counts[month]
+        ]
+
+    def _product_totals(self, start_date, end_date, with_invoice_count: bool = False):
+        """Aralıktaki kalemlerden ürün kodu başına toplam dizileri"""
+        store = self.store
+        rows = store.item_range(*self._day_range(start_date, end_date))
+        products = np.asarray(store.item_products[rows])
+        item_names = np.asarray(store.item_names[rows])
+        size = len(store.product_codes)
+        lines = np.bincount(products, minlength=size)
+        quantities = self._group_sum(products, store.item_quantities[rows], size)
+        revenues = self._group_sum(products, store.item_totals[rows], size)
+        unit_prices = self._group_sum(products, store.item_unit_prices[rows], size)
+        # Görünen ad: aralıktaki son kalemin adı (ters çevrilmiş dizide ilk görülen)
+        names = np.zeros(size, dtype=np.int32)
+        seen, first = np.unique(products[::-1], return_index=True)
+        names[seen] = item_names[::-1][first]
+        invoices = None
+        if with_invoice_count:
+            # Ürünün geçtiği ayrık fiş sayısı: (fiş, ürün) çiftleri tekilleştirilir
+            pairs = np.unique(store.item_invoice_ids[rows] * size + products)
+            invoices = np.bincount(pairs % size, minlength=size)
+        return lines, quantities, revenues, unit_prices, names, invoices
+
+    def _product_rows(self, order, totals) -> List[Dict[str, Any]]:
+        lines, quantities, revenues, unit_prices, names, invoices = totals
+        store = self.store
+        rows = []
+        for p in order:
+            row = {
+                'code': store.product_codes.values[p],
+                'name': store.product_names.values[names[p]],
+                'quantity': int(quantities[p]),
+                'total': from_minor(int(revenues[p])),
+                'avg_price': _average(unit_prices[p], lines[p])
+            }
+            if invoices is not None:
+                row['invoice_count'] = int(invoices[p])
+            rows.append(row)
+        return rows
+
+    def product_analysis(self, start_date, end_date, with_invoice_count: bool = False) -> List[Dict[str, Any]]:
+        self.refresh()
+        totals = self._product_totals(start_date, end_date, with_invoice_count)
+        lines, revenues = totals[0], totals[2]
+        sold = np.nonzero(lines)[0]
+        order = sold[np.argsort(-revenues[sold], kind="stable")]
+        return self._product_rows(order, totals)
+
+    def top_products(self, start_date, end_date, limit: int = 5, by: str = "quantity") -> List[Dict[str, Any]]:
+        """Miktara ('quantity') veya ciroya ('total') göre ilk N ürün"""
+        self.refresh()
+        totals = self._product_totals(start_date, end_date)
+        lines = totals[0]
+        values = totals[1] if by == "quantity" else totals[2]
+        sold = np.nonzero(lines)[0]
+        if len(sold) > limit:
+            sold = sold[np.argpartition(-values[sold], limit - 1)[:limit]]
+        order = sold[np.argsort(-values[sold], kind="stable")]
+        return self._product_rows(order, totals)
+
+    def customer_analysis(self, start_date, end_date) -> List[Dict[str, Any]]:
+        self.refresh()
+        store = self.store
+        rows = store.invoice_range(*self._day_range(start_date, end_date))
+        customers = store.invoice_customers[rows]
+        size = len(store.customer_keys)
+        counts = np.bincount(customers, minlength=size)
+        totals = self._group_sum(customers, store.invoice_totals[rows], size)
+        active = np.nonzero(counts)[0]
+        order = active[np.argsort(-totals[active], kind="stable")]
+        return [
+            {
+                'name': store.customer_names[c],
+                'invoice_count': int(counts[c]),
+                'total_amount': from_minor(int(totals[c])),
+                'avg_amount': _average(totals[c], counts[c])
+            }
+            for c in order
+        ]
+
+    def summary_stats(self, start_date, end_date) -> Dict[str, Any]:
+        self.refresh()
+        store = self.store
+        totals = store.invoice_totals[store.invoice_range(*self._day_range(start_date, end_date))]
+        invoice_count = len(totals)
+        revenue = int(totals.sum())
+        top = self.top_products(start_date, end_date, limit=1, by="quantity")
+        return {
+            'total_invoices': invoice_count,
+            'total_revenue': from_minor(revenue),
+            'avg_invoice_amount': _average(revenue, invoice_count),
+            'top_product': top[0]['name'] if top else 'Ürün Yok',
+            'top_product_quantity': top[0]['quantity'] if top else 0
+        }
+
+    def product_sales_trend(self, product_code: str, start_date, end_date) -> List[Dict[str, Any]]:
+        self.refresh()
+        store = self.store
+        product = store.product_codes.get(product_code)
+        if product is None:
+            return []
+        rows = store.item_range(*self._day_range(start_date, end_date))
+        mask = store.item_products[rows] == product
+        days, inverse = np.unique(store.item_days[rows][mask], return_inverse=True)
+        quantities = self._group_sum(inverse, store.item_quantities[rows][mask], len(days))
+        revenues = self._group_sum(inverse, store.item_totals[rows][mask], len(days))
+        return [
+            {'date': day_from_number(int(day)), 'quantity': int(quantity), 'revenue': from_minor(int(revenue))}
+            for day, quantity, revenue in zip(days, quantities, revenues)
+        ]
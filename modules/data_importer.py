@@ -2,21 +2,71 @@
 Veri içe/dışa aktarma modülü (Telefon/Eposta Yok)
 """
 import pandas as pd
-from typing import Dict, List, Any
+from itertools import islice
+from typing import Dict, List, Any, Callable, Iterator, Optional
 import os
 import sys # sys import'u ekle
+from datetime import datetime
+from openpyxl import load_workbook
 
 # db_manager'ı import edebilmek için proje yolunu ekle (önceki kodda yoktu, ekledim)
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from database.models import Product, Customer
+from modules.product_catalog import product_catalog
+from utils.validators import BatchValidators
+from utils.streaming_export import ExportCancelled, ExportProgress, iter_cursor, open_export_writer, write_csv_rows
 # db_manager'ı doğru import et
 try:
-    from database import db_manager
+    from database import db_manager, fill_search_keys
 except ImportError:
     print("HATA: db_manager modülü bulunamadı. Veritabanı işlemleri çalışmayacak.")
     db_manager = None # Hata durumunda None ata
 
+# İçe aktarmada bir işlemde yazılan satır sayısı (bellek kullanımı da buna bağlı)
+IMPORT_CHUNK_SIZE = 5000
+
+# progress(işlenen, toplam) -> False dönerse içe aktarma durur
+ProgressCallback = Callable[[int, int], Optional[bool]]
+
+# İçe aktarma sonucunda raporlanan en fazla hata satırı (sayım yine de tamdır)
+MAX_REPORTED_ERRORS = 1000
+
+# tür -> (tablo, zorunlu sütunlar, doğrulama kuralları (sütun sırası = upsert parametre sırası), upsert)
+# Türkçe arama/sıralama anahtarları (*_key) upsert içinde TR_SEARCH_KEY/TR_SORT_KEY ile hesaplanır
+IMPORT_SPECS = {
+    'products': ("products", ['code', 'name'], {
+        'code': BatchValidators.product_code,
+        'name': BatchValidators.product_name,
+    }, """
+        INSERT INTO products (code, name, code_key, name_key, sort_key)
+        VALUES (?1, ?2, TR_SEARCH_KEY(?1), TR_SEARCH_KEY(?2), TR_SORT_KEY(?2))
+        ON CONFLICT(code) DO UPDATE SET name = excluded.name, name_key = excluded.name_key,
+                                        sort_key = excluded.sort_key, updated_at = CURRENT_TIMESTAMP
+        WHERE products.name IS NOT excluded.name
+    """),
+    'customers': ("customers", ['name'], {
+        'name': BatchValidators.customer_name,
+        'address': BatchValidators.optional_text,
+        'tax_number': BatchValidators.tax_number,
+    }, """
+        INSERT INTO customers (name, address, tax_number, name_key, sort_key)
+        VALUES (?1, ?2, ?3, TR_SEARCH_KEY(?1), TR_SORT_KEY(?1))
+        ON CONFLICT(name) DO UPDATE SET address = excluded.address, tax_number = excluded.tax_number,
+                                        updated_at = CURRENT_TIMESTAMP
+        WHERE customers.address IS NOT excluded.address OR customers.tax_number IS NOT excluded.tax_number
+    """),
+}
+
+# Fiş dışa aktarma (fiş kalemi başına bir satır): Excel ve artımlı CSV aynı sütunları yazar
+INVOICE_EXPORT_HEADERS = ['Fiş No', 'Tarih', 'Müşteri', 'Adres', 'Teslim Eden', 'Teslim Alan', 'Ara Toplam', 'KDV',
+                          'Toplam', 'Ürün Kodu', 'Ürün Adı', 'Miktar', 'Birim Fiyat', 'Satır Toplamı']
+INVOICE_EXPORT_COLUMNS = """
+    i.invoice_number, i.invoice_date, i.customer_name, i.customer_address,
+    i.delivery_person, i.receiver_person, i.subtotal, i.tax_amount, i.total_amount,
+    ii.product_code, ii.product_name, ii.quantity, ii.unit_price, ii.total_price"""
+INVOICE_EXPORT_SOURCE = "invoices i LEFT JOIN invoice_items ii ON i.id = ii.invoice_id"
+
 
 class DataImporter:
     """Veri içe/dışa aktarma sınıfı"""
@@ -27,122 +77,183 @@ class DataImporter:
             raise ImportError("db_manager başlatılamadı.")
         self.db = db_manager
 
-    def import_products(self, file_path: str) -> Dict[str, int]:
-        """Ürünleri Excel/CSV dosyasından içe aktar"""
-        print("\n--- DEBUG: import_products fonksiyonu başladı ---")
-        try:
-            if file_path.endswith('.csv'):
-                df = pd.read_csv(file_path, encoding='utf-8', na_filter=False)
-            else:
-                df = pd.read_excel(file_path, sheet_name=0, keep_default_na=False)
+    # --- Akışlı okuma ---
 
-            if len(df) == 0: print("DEBUG: UYARI! Dosyada veri satırı (0) bulundu.")
+    @staticmethod
+    def _cell_text(value) -> str:
+        """openpyxl hücre değerini pandas'ın okuyacağı metne çevir (boş -> '', 5.0 -> '5')"""
+        if value is None:
+            return ''
+        if isinstance(value, float) and value.is_integer():
+            value = int(value)
+        return str(value)
 
-            required_columns = ['code', 'name']
-            missing_columns = [col for col in required_columns if col not in df.columns]
-            if missing_columns:
-                raise ValueError(f"Eksik sütunlar: {', '.join(missing_columns)}")
+    def _iter_chunks(self, file_path: str, chunk_size: int) -> Iterator[Any]:
+        """
+        Önce sütun adlarını, sonra (parça, işlenen, toplam) demetlerini üret.
+        Parçalar metin sütunlu DataFrame'lerdir; indeksleri dosyadaki veri satırı sırasıdır.
+        İlerleme birimi CSV'de bayt, XLSX'te satırdır. Bellekte bir parçadan fazlası tutulmaz
+        (eski .xls biçimi akışlı okunamaz; tamamı okunup parçalanır).
+        """
+        if file_path.lower().endswith('.csv'):
+            total = os.path.getsize(file_path)
+            yield list(pd.read_csv(file_path, encoding='utf-8-sig', nrows=0).columns)
+            with open(file_path, 'rb') as handle:
+                # dtype=str: '007' gibi kodlar sayıya çevrilip '7' olmaz
+                for chunk in pd.read_csv(handle, encoding='utf-8-sig', na_filter=False, dtype=str, chunksize=chunk_size):
+                    yield chunk, handle.tell(), total
+            return
 
-            conn = self.db.get_connection(); cursor = conn.cursor()
-            imported_count = 0; updated_count = 0; skipped_count = 0
+        if file_path.lower().endswith('.xls'):
+            df = pd.read_excel(file_path, sheet_name=0, keep_default_na=False, dtype=str)
+            yield list(df.columns)
+            for start in range(0, len(df), chunk_size):
+                yield df.iloc[start:start + chunk_size], min(start + chunk_size, len(df)), len(df)
+            return
 
-            try:
-                for index, row in df.iterrows():
-                    excel_row_num = index + 2
-                    product_code_raw = str(row.get('code', '')).strip()
-                    product_name_raw = str(row.get('name', '')).strip()
-                    if not product_code_raw or not product_name_raw:
-                        print(f"DEBUG: Satır {excel_row_num} ATLANDI. Kod/Ad boş.")
-                        skipped_count += 1; continue
-
-                    cursor.execute("SELECT id FROM products WHERE code = ?", (product_code_raw,))
-                    existing = cursor.fetchone()
-                    if existing:
-                        cursor.execute("UPDATE products SET name = ?, updated_at = CURRENT_TIMESTAMP WHERE code = ?", (product_name_raw, product_code_raw))
-                        updated_count += 1
-                    else:
-                        cursor.execute("INSERT INTO products (code, name) VALUES (?, ?)", (product_code_raw, product_name_raw))
-                        imported_count += 1
-                conn.commit()
-            except Exception as e:
-                conn.rollback(); print(f"DEBUG: Veritabanı döngüsünde HATA: {e}"); raise e
-            finally:
-                conn.close()
+        workbook = load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            sheet = workbook.worksheets[0]
+            total = max((sheet.max_row or 1) - 1, 0)  # Boyut bilgisi yoksa 0 (belirsiz)
+            rows = sheet.iter_rows(values_only=True)
+            header = next(rows, ())
+            columns = [str(name) if name is not None else f"Unnamed: {i}" for i, name in enumerate(header)]
+            yield columns
+            width, done = len(columns), 0
+            while True:
+                batch = [[self._cell_text(value) for value in row[:width]] for row in islice(rows, chunk_size)]
+                if not batch:
+                    break
+                chunk = pd.DataFrame([row + [''] * (width - len(row)) for row in batch], columns=columns,
+                                     index=range(done, done + len(batch)), dtype=object)
+                done += len(batch)
+                yield chunk, done, max(total, done)
+        finally:
+            workbook.close()  # Salt okunur kitap dosyayı açık tutar
 
-            print(f"-> Yeni: {imported_count}, Güncel: {updated_count}, Atlanan: {skipped_count}")
-            return {'imported': imported_count, 'updated': updated_count, 'total': imported_count + updated_count}
-        except Exception as e:
-            print(f"DEBUG: İçe aktarma sırasında genel HATA: {str(e)}"); raise Exception(f"Ürünler içe aktarılamadı: {str(e)}")
+    def _import_chunks(self, file_path: str, table: str, required_columns: List[str], rules: Dict[str, Any],
+                       upsert_sql: str, progress: Optional[ProgressCallback], chunk_size: int,
+                       write: bool = True) -> Dict[str, Any]:
+        """
+        Dosyayı parça parça oku, her parçayı BatchValidators kurallarıyla tek geçişte
+        doğrula ve geçerli satırları ayrı bir BEGIN IMMEDIATE işleminde executemany +
+        ON CONFLICT DO UPDATE ile yaz. Yazma kilidi yalnızca parça yazılırken tutulur;
+        arada fiş kaydı yapılabilir. Geçersiz satırlar atlanır ve satır/sütun bazında
+        'errors' raporuna eklenir (ilk MAX_REPORTED_ERRORS hata). write=False ise
+        yalnızca doğrulanır.
+
+        Sayılar küme olarak hesaplanır: yeni = id'si işlem öncesi en büyük id'den
+        büyük satırlar (AUTOINCREMENT); güncel = upsert'in gerçekten değiştirdiği
+        satırlardan yeniler çıkınca kalan (DO UPDATE ... WHERE koşulu yazmayı
+        atladıysa satır 'unchanged' sayılır); parça içinde aynı anahtarla tekrar
+        eden ve son satır kalsın diye atılanlar 'duplicates' sayılır.
+        progress(işlenen, toplam) False döndürürse içe aktarma o parçadan sonra
+        durur; önceki parçalar kaydedilmiş kalır.
+        """
+        chunks = self._iter_chunks(file_path, chunk_size)
+        columns = next(chunks)
+        missing_columns = [col for col in required_columns if col not in columns]
+        if missing_columns:
+            chunks.close()
+            raise ValueError(f"Eksik sütunlar: {', '.join(missing_columns)}")
 
-    def import_customers(self, file_path: str) -> Dict[str, int]:
-        """Müşterileri Excel/CSV dosyasından içe aktar (Telefon/Eposta YOK)"""
+        counts = {'imported': 0, 'updated': 0, 'unchanged': 0, 'duplicates': 0, 'skipped': 0, 'rows': 0}
+        errors: List[Dict[str, Any]] = []
+        cancelled = False
+        # Toplu yazma için 'bulk-import' profili (büyük önbellek, seyrek checkpoint)
+        conn = self.db.get_connection(profile="bulk-import") if write else None
         try:
-            if file_path.endswith('.csv'):
-                df = pd.read_csv(file_path, encoding='utf-8', na_filter=False)
-            else:
-                df = pd.read_excel(file_path, sheet_name=0, keep_default_na=False)
+            for chunk, done, total in chunks:
+                checked = BatchValidators.validate(chunk, rules, max_errors=MAX_REPORTED_ERRORS - len(errors))
+                errors.extend(checked.errors)
+                rows = checked.valid_frame
+                counts['rows'] += len(chunk)
+                counts['skipped'] += len(chunk) - len(rows)
+                if write and len(rows):
+                    # Parça içinde aynı anahtar birden çok kez geçerse son satır kalır
+                    unique_rows = rows.drop_duplicates(rows.columns[0], keep='last')
+                    conn.execute("BEGIN IMMEDIATE")
+                    try:
+                        last_id = conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}").fetchone()[0]
+                        # rowcount: deyimin doğrudan eklediği/güncellediği satırlar (sqlite3_changes).
+                        # conn.total_changes tetikleyicilerin (FTS, anahtar) yazdıklarını da sayar.
+                        changed = conn.executemany(upsert_sql, unique_rows.itertuples(index=False, name=None)).rowcount
+                        imported = conn.execute(f"SELECT COUNT(*) FROM {table} WHERE id > ?", (last_id,)).fetchone()[0]
+                        # Anahtarları değişmeyen ad güncellemelerinde (yalnızca harf büyüklüğü)
+                        # tetikleyici sort_key'i bayat işaretler; aynı işlemde yeniden hesapla
+                        fill_search_keys(conn)
+                        conn.commit()
+                    except Exception:
+                        conn.rollback()
+                        raise
+                    counts['imported'] += imported
+                    counts['updated'] += changed - imported
+                    counts['unchanged'] += len(unique_rows) - changed
+                    counts['duplicates'] += len(rows) - len(unique_rows)
+                if progress is not None and progress(done, total) is False:
+                    cancelled = True
+                    chunks.close()
+                    break
+        finally:
+            if conn is not None:
+                conn.close()
 
-            required_columns = ['name'] # Sadece 'name' zorunlu
-            missing_columns = [col for col in required_columns if col not in df.columns]
-            if missing_columns:
-                raise ValueError(f"Eksik sütunlar: {', '.join(missing_columns)}")
+        if counts['skipped']:
+            print(f"DEBUG: {counts['skipped']} satır ATLANDI; ilk hatalar: "
+                  f"{[(error['row'], error['column'], error['error']) for error in errors[:5]]}")
+        counts['total'] = counts['imported'] + counts['updated']
+        counts['cancelled'] = cancelled
+        counts['errors'] = errors
+        return counts
 
-            conn = self.db.get_connection(); cursor = conn.cursor()
-            imported_count = 0; updated_count = 0
+    # --- İçe aktarma ---
 
-            try:
-                for index, row in df.iterrows(): # index eklendi
-                    excel_row_num = index + 2 # Excel satır no debug için
-                    customer_name = str(row['name']).strip()
-                    if not customer_name:
-                        print(f"DEBUG: Satır {excel_row_num} ATLANDI. Müşteri adı boş.")
-                        continue
-
-                    # Sadece adres ve vergi no okunuyor
-                    customer_data = {
-                        'name': customer_name,
-                        'address': str(row.get('address', '')).strip(),
-                        'tax_number': str(row.get('tax_number', '')).strip()
-                    }
-
-                    # Sadece isme göre kontrol
-                    cursor.execute("SELECT id FROM customers WHERE name = ?", (customer_data['name'],))
-                    existing = cursor.fetchone()
-
-                    if existing:
-                        # Sadece adresi ve vergi numarasını güncelle
-                        cursor.execute("""
-                            UPDATE customers
-                            SET address = ?, tax_number = ?, updated_at = CURRENT_TIMESTAMP
-                            WHERE id = ?
-                        """, (
-                            customer_data['address'],
-                            customer_data['tax_number'],
-                            existing['id'] # ID ile güncellemek daha güvenli
-                        ))
-                        updated_count += 1
-                    else:
-                        # Sadece isim, adres, vergi no ekle
-                        cursor.execute("""
-                            INSERT INTO customers (name, address, tax_number)
-                            VALUES (?, ?, ?)
-                        """, (
-                            customer_data['name'],
-                            customer_data['address'],
-                            customer_data['tax_number']
-                        ))
-                        imported_count += 1
-                conn.commit()
-            except Exception as e:
-                conn.rollback(); raise e
-            finally:
-                conn.close()
+    def validate_file(self, file_path: str, kind: str, chunk_size: int = IMPORT_CHUNK_SIZE) -> Dict[str, Any]:
+        """
+        Dosyayı veritabanına yazmadan doğrula ('products' veya 'customers').
+        Dönen sözlükte 'rows', 'skipped' (geçersiz satır sayısı) ve 'errors' raporu bulunur.
+        """
+        table, required_columns, rules, _ = IMPORT_SPECS[kind]
+        result = self._import_chunks(file_path, table, required_columns, rules, "", None, chunk_size, write=False)
+        return {'rows': result['rows'], 'skipped': result['skipped'], 'errors': result['errors']}
+
+    def import_products(self, file_path: str, progress: Optional[ProgressCallback] = None,
+                        chunk_size: int = IMPORT_CHUNK_SIZE) -> Dict[str, Any]:
+        """
+        Ürünleri Excel/CSV dosyasından parça parça içe aktar (bkz. _import_chunks).
+        Adı değişmeyen ürünlere dokunulmaz (anahtar/FTS tetikleyicileri boşuna çalışmaz).
+        """
+        print("\n--- DEBUG: import_products fonksiyonu başladı ---")
+        try:
+            result = self._import_chunks(file_path, *IMPORT_SPECS['products'], progress, chunk_size)
+        except Exception as e:
+            print(f"DEBUG: İçe aktarma sırasında genel HATA: {str(e)}"); raise Exception(f"Ürünler içe aktarılamadı: {str(e)}")
+        finally:
+            # Ad değişiklikleri ürün sayısını değiştirmez; kataloğu açıkça yenile (yarıda kalsa da)
+            product_catalog.invalidate()
+
+        if result['rows'] == 0: print("DEBUG: UYARI! Dosyada veri satırı (0) bulundu.")
+        print(f"-> Yeni: {result['imported']}, Güncel: {result['updated']}, Değişmeyen: {result['unchanged']}, "
+              f"Tekrarlanan: {result['duplicates']}, Atlanan: {result['skipped']}"
+              f"{' (İPTAL EDİLDİ)' if result['cancelled'] else ''}")
+        return result
 
-            print(f"-> Müşteri Yeni: {imported_count}, Güncel: {updated_count}")
-            return {'imported': imported_count, 'updated': updated_count, 'total': imported_count + updated_count}
+    def import_customers(self, file_path: str, progress: Optional[ProgressCallback] = None,
+                         chunk_size: int = IMPORT_CHUNK_SIZE) -> Dict[str, Any]:
+        """
+        Müşterileri Excel/CSV dosyasından parça parça içe aktar (Telefon/Eposta YOK).
+        Ada göre eşleşir; yalnızca adres ve vergi numarası güncellenir.
+        """
+        try:
+            result = self._import_chunks(file_path, *IMPORT_SPECS['customers'], progress, chunk_size)
         except Exception as e:
             raise Exception(f"Müşteriler içe aktarılamadı: {str(e)}")
 
+        print(f"-> Müşteri Yeni: {result['imported']}, Güncel: {result['updated']}, Değişmeyen: {result['unchanged']}, "
+              f"Tekrarlanan: {result['duplicates']}, Atlanan: {result['skipped']}"
+              f"{' (İPTAL EDİLDİ)' if result['cancelled'] else ''}")
+        return result
+
     def create_product_template(self, file_path: str):
         """Ürün şablonu oluştur"""
         template_data = {'code': ['PRD001'], 'name': ['Örnek Ürün 1']}
@@ -157,39 +268,177 @@ class DataImporter:
         }
         df = pd.DataFrame(template_data); df.to_excel(file_path, index=False, engine='openpyxl')
 
-    def export_products(self, file_path: str):
-        """Ürünleri Excel dosyasına dışa aktar"""
-        conn = self.db.get_connection(); cursor = conn.cursor()
-        cursor.execute("SELECT code, name FROM products ORDER BY name")
-        products = [{'code': row['code'],'name': row['name']} for row in cursor.fetchall()]
-        conn.close(); df = pd.DataFrame(products); df.to_excel(file_path, index=False, engine='openpyxl')
-
-    def export_customers(self, file_path: str):
-        """Müşterileri Excel dosyasına dışa aktar (Telefon/Eposta YOK)"""
-        conn = self.db.get_connection(); cursor = conn.cursor()
-        cursor.execute("SELECT name, address, tax_number FROM customers ORDER BY name")
-        customers = [{'name': row['name'], 'address': row['address'], 'tax_number': row['tax_number']} for row in cursor.fetchall()]
-        conn.close(); df = pd.DataFrame(customers); df.to_excel(file_path, index=False, engine='openpyxl')
-
-    def export_invoices(self, file_path: str, start_date: str = None, end_date: str = None):
-        """Fişleri Excel dosyasına dışa aktar"""
-        conn = self.db.get_connection(); cursor = conn.cursor()
-        query = """
-            SELECT i.invoice_number, i.invoice_date, i.customer_name, i.customer_address,
-                   i.delivery_person, i.receiver_person, i.subtotal, i.tax_amount, i.total_amount,
-                   ii.product_code, ii.product_name, ii.quantity, ii.unit_price, ii.total_price
-            FROM invoices i LEFT JOIN invoice_items ii ON i.id = ii.invoice_id """
+    def export_products(self, file_path: str, progress: Optional[ExportProgress] = None,
+                        file_format: Optional[str] = None):
+        """Ürünleri dışa aktar (biçim uzantıdan: xlsx/csv/csv.gz/parquet; akışlı, sabit bellek)"""
+        return self._export_query(file_path, "Sheet1", ['code', 'name'], "products",
+                                  "SELECT code, name FROM products ORDER BY sort_key", [], progress, file_format)  # Türkçe sıralama (indeksli)
+
+    def export_customers(self, file_path: str, progress: Optional[ExportProgress] = None,
+                         file_format: Optional[str] = None):
+        """Müşterileri dışa aktar (Telefon/Eposta YOK; biçim uzantıdan; akışlı, sabit bellek)"""
+        return self._export_query(file_path, "Sheet1", ['name', 'address', 'tax_number'], "customers",
+                                  "SELECT name, address, tax_number FROM customers ORDER BY sort_key", [], progress,
+                                  file_format)
+
+    def export_invoices(self, file_path: str, start_date: str = None, end_date: str = None,
+                        progress: Optional[ExportProgress] = None, file_format: Optional[str] = None):
+        """Fişleri dışa aktar (fiş kalemi başına bir satır; biçim uzantıdan; akışlı, sabit bellek)"""
+        source = INVOICE_EXPORT_SOURCE
         params = []
         if start_date and end_date:
-            query += " WHERE i.invoice_date BETWEEN ? AND ?"
+            source += " WHERE i.invoice_date BETWEEN ? AND ?"
             params = [start_date, end_date]
-        query += " ORDER BY i.invoice_date DESC, i.invoice_number, ii.id"
-        cursor.execute(query, params)
-        invoices_data = []
-        for row in cursor.fetchall():
-            invoices_data.append({
-                'Fiş No': row['invoice_number'], 'Tarih': row['invoice_date'], 'Müşteri': row['customer_name'], 'Adres': row['customer_address'],
-                'Teslim Eden': row['delivery_person'], 'Teslim Alan': row['receiver_person'], 'Ara Toplam': row['subtotal'], 'KDV': row['tax_amount'], 'Toplam': row['total_amount'],
-                'Ürün Kodu': row['product_code'], 'Ürün Adı': row['product_name'], 'Miktar': row['quantity'], 'Birim Fiyat': row['unit_price'], 'Satır Toplamı': row['total_price']
-            })
-        conn.close(); df = pd.DataFrame(invoices_data); df.to_excel(file_path, index=False, engine='openpyxl')
\ No newline at end of file
+        query = f"SELECT {INVOICE_EXPORT_COLUMNS} FROM {source} ORDER BY i.invoice_date DESC, i.invoice_number, ii.id"
+        return self._export_query(file_path, "Sheet1", INVOICE_EXPORT_HEADERS, source, query, params, progress,
+                                  file_format)
+
+    def export_invoices_incremental(self, destination: str,
+                                    progress: Optional[ExportProgress] = None) -> Dict[str, Any]:
+        """
+        Yalnızca bu hedefe son aktarımdan sonra kaydedilen fişleri CSV olarak yaz.
+
+        destination bir klasörse her çalıştırma tarihli bir fark dosyası
+        (fisler_YYYYMMDD_<ilk id>-<son id>.csv) oluşturur; değilse satırlar aynı CSV dosyasının
+        sonuna eklenir (dosya silinirse bir sonraki çalıştırma baştan yazar). Hedef
+        başına en son aktarılan invoices.id export_watermarks tablosunda tutulur,
+        böylece maliyet geçmişin tamamıyla değil yeni fişlerle orantılıdır.
+        Aktarıldıktan sonra silinen fişler dosyadan çıkarılmaz.
+
+        Sonuç: {'rows', 'invoices', 'last_invoice_id', 'file', 'cancelled'}
+        """
+        destination = os.path.abspath(destination)
+        delta_mode = os.path.isdir(destination)
+        conn = self.db.get_connection(profile="reporting")
+        try:
+            mark = conn.execute(
+                "SELECT last_invoice_id, file_size, row_count FROM export_watermarks WHERE destination = ?",
+                (destination,)
+            ).fetchone()
+            last_id, file_size, row_count = tuple(mark) if mark else (0, None, 0)
+            if not delta_mode:
+                last_id, row_count = self._prepare_export_log(destination, last_id, file_size, row_count)
+
+            # Üst sınır, sayım ve satırlar aynı okuma işleminden (arada kaydedilen fiş sonraki çalıştırmaya kalır)
+            conn.execute("BEGIN")
+            max_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM invoices").fetchone()[0]
+            result = {'rows': 0, 'invoices': 0, 'last_invoice_id': last_id, 'file': None, 'cancelled': False}
+            if max_id <= last_id:
+                print(f"DEBUG: Artımlı dışa aktarma: yeni fiş yok ({destination})")
+                return result
+            params = (last_id, max_id)
+            # Fark dosyası adı tarih ve fiş id aralığını taşır (aynı gün birden çok çalıştırma çakışmaz)
+            target = (os.path.join(destination, f"fisler_{datetime.now():%Y%m%d}_{last_id + 1}-{max_id}.csv")
+                      if delta_mode else destination)
+            source = f"{INVOICE_EXPORT_SOURCE} WHERE i.id > ? AND i.id <= ?"
+            total = conn.execute(f"SELECT COUNT(*) FROM {source}", params).fetchone()[0] if progress else 0
+            invoices = conn.execute("SELECT COUNT(*) FROM invoices WHERE id > ? AND id <= ?", params).fetchone()[0]
+            cursor = conn.execute(f"SELECT {INVOICE_EXPORT_COLUMNS} FROM {source} ORDER BY i.id, ii.id", params)
+
+            try:
+                if delta_mode:
+                    rows = self._write_export_file(target, cursor, total, progress)
+                    new_size = None
+                else:
+                    rows, new_size = self._append_export_log(target, cursor, total, progress)
+            except ExportCancelled:
+                print(f"DEBUG: Artımlı dışa aktarma iptal edildi: {destination}")
+                return dict(result, cancelled=True)
+            conn.rollback()
+
+            # Dosya diske yazıldıktan sonra işareti ilerlet (arada çökme: ek dosya sonraki çalıştırmada kırpılır)
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("""
+                INSERT INTO export_watermarks (destination, last_invoice_id, file_size, row_count, updated_at)
+                VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+                ON CONFLICT(destination) DO UPDATE SET
+                    last_invoice_id = excluded.last_invoice_id, file_size = excluded.file_size,
+                    row_count = excluded.row_count, updated_at = excluded.updated_at
+            """, (destination, max_id, new_size, row_count + rows))
+            conn.commit()
+        finally:
+            conn.close()
+        print(f"DEBUG: Artımlı dışa aktarma: {invoices} fiş, {rows} satır -> {target}")
+        return {'rows': rows, 'invoices': invoices, 'last_invoice_id': max_id, 'file': target, 'cancelled': False}
+
+    def reset_export_watermark(self, destination: str):
+        """Hedefin işaretini sil; sonraki artımlı dışa aktarma tüm fişleri yazar"""
+        conn = self.db.get_connection()
+        try:
+            conn.execute("DELETE FROM export_watermarks WHERE destination = ?", (os.path.abspath(destination),))
+            conn.commit()
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _prepare_export_log(path: str, last_id: int, file_size: Optional[int], row_count: int):
+        """Ek dosyasını işaretle karşılaştır; (başlangıç id'si, satır sayısı) döndür"""
+        if last_id and not os.path.exists(path):
+            print(f"DEBUG: Dışa aktarma dosyası yok, baştan yazılacak: {path}")
+            return 0, 0
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        if file_size is not None and size > file_size:
+            # Önceki çalıştırma dosyaya yazıp işareti kaydedemeden kesilmiş: yarım eki at
+            print(f"DEBUG: Dışa aktarma dosyası son işarete kırpılıyor: {size} -> {file_size} bayt")
+            os.truncate(path, file_size)
+        elif file_size is not None and size < file_size:
+            raise ValueError(f"'{path}' son dışa aktarmadan sonra değiştirilmiş; "
+                             f"dosyayı silin veya farklı bir dosya seçin.")
+        return last_id, row_count
+
+    @staticmethod
+    def _append_export_log(path: str, cursor, total: int, progress: Optional[ExportProgress]):
+        """Satırları CSV dosyasının sonuna ekle; (satır, yeni boyut) döndür. İptal/hata ekini geri alır."""
+        start_size = os.path.getsize(path) if os.path.exists(path) else 0
+        try:
+            # utf-8-sig: BOM yalnızca boş dosyanın başına yazılır (Excel Türkçe karakterleri doğru açar)
+            with open(path, 'a', newline='', encoding='utf-8-sig') as handle:
+                rows = write_csv_rows(handle, INVOICE_EXPORT_HEADERS if start_size == 0 else None,
+                                      iter_cursor(cursor), total=total, progress=progress)
+                handle.flush()
+                os.fsync(handle.fileno())
+        except BaseException:
+            os.truncate(path, start_size)
+            raise
+        return rows, os.path.getsize(path)
+
+    @staticmethod
+    def _write_export_file(path: str, cursor, total: int, progress: Optional[ExportProgress]) -> int:
+        """Satırları yeni bir CSV dosyasına yaz (geçici dosya + os.replace; yarım dosya kalmaz)"""
+        temp_path = path + ".tmp"
+        try:
+            with open(temp_path, 'w', newline='', encoding='utf-8-sig') as handle:
+                rows = write_csv_rows(handle, INVOICE_EXPORT_HEADERS, iter_cursor(cursor),
+                                      total=total, progress=progress)
+                handle.flush()
+                os.fsync(handle.fileno())
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return rows
+
+    def _export_query(self, file_path: str, sheet_title: str, headers: List[str], source: str,
+                      query: str, params: list, progress: Optional[ExportProgress],
+                      file_format: Optional[str] = None) -> Dict[str, Any]:
+        """Sorgu sonucunu imleçten parça parça dosyaya yaz (biçim: file_format ya da uzantı).
+
+        source: COUNT(*) için FROM/WHERE kısmı (yalnızca ilerleme verildiğinde sayılır).
+        Sonuç: {'rows': yazılan satır, 'cancelled': iptal edildi mi}; iptalde dosya yazılmaz.
+        """
+        writer = open_export_writer(file_path, file_format)  # Bilinmeyen/kurulu olmayan biçim sorgudan önce hata verir
+        conn = self.db.get_connection(profile="reporting")
+        try:
+            cursor = conn.cursor()
+            total = cursor.execute(f"SELECT COUNT(*) FROM {source}", params).fetchone()[0] if progress else 0
+            cursor.execute(query, params)
+            with writer:
+                rows = writer.write_sheet(sheet_title, headers, iter_cursor(cursor), total=total, progress=progress)
+        except ExportCancelled:
+            print(f"DEBUG: Dışa aktarma iptal edildi: {file_path}")
+            return {'rows': 0, 'cancelled': True}
+        finally:
+            conn.close()
+        print(f"DEBUG: {rows} satır dışa aktarıldı: {file_path}")
+        return {'rows': rows, 'cancelled': False}
@@ -0,0 +1,479 @@
+"""
+Sütunsal olgu deposu (analiz motoru için)
+
+Fiş ve kalem olguları sütun başına bir dizi olarak tutulur. Veritabanı bir
+dosyaysa sütunlar yanındaki '<veritabanı>.facts/' dizininde ham ikili
+dosyalara yazılır ve np.memmap ile açılır: uygulama açılışında yeniden
+yükleme yapılmaz, raporlar yalnızca ihtiyaç duydukları sütun ve gün
+aralıklarını diskten okur. Bellek içi veritabanında diziler bellekte kalır.
+
+Dizin yapısı:
+    meta.json                 : nesil, satır sayıları, id filigranları, sözlükler
+    <sütun>.<nesil>.bin       : sütun verisi (dtype meta'daki COLUMNS tablosunda)
+
+Güncelleme yalnızca eklemedir: invoices.id / invoice_items.id filigranından
+büyük satırlar dosya sonlarına yazılır, ardından meta.json atomik olarak
+değiştirilir (os.replace). meta'daki satır sayısı geçerli veri sınırıdır;
+yarım kalmış bir yazmanın fazlası sonraki eklemede kırpılır. Yeni satırlar
+sıradan bir okuma işleminde (BEGIN) okunur; yalnızca dosyalara ekleme ve
+meta.json'un yayımlanması sırasında BEGIN IMMEDIATE tutulur, böylece aynı
+dosyayı kullanan başka bir uygulama örneğiyle eklemeler çakışmaz ve eklenecek
+bir şey yoksa fiş kaydedenler hiç beklemez.
+
+Silme/güncelleme filigranla yakalanamaz: her eşitlemede diziler özet
+tablolarının (daily_sales, product_daily_sales) sayı/toplam sağlamalarıyla ve
+fişlerin müşteri bağlantısı sağlamasıyla (customer_id sayısı/toplamı)
+karşılaştırılır; tutmazsa yeni bir nesil sıfırdan yazılır. Kayıtlı
+müşterilerin adları dizilere gömülmez, her eşitlemede customers'tan okunur.
+"""
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+try:
+    import numpy as np
+except ImportError:  # NumPy isteğe bağlı
+    np = None
+
+STORE_FORMAT = 1
+
+# Sütun adı -> dtype
+INVOICE_COLUMNS = {
+    "invoice_ids": "int64",
+    "invoice_days": "int32",       # YYYYMMDD
+    "invoice_customers": "int32",  # customer_keys kodu
+    "invoice_totals": "int64",     # kuruş
+}
+ITEM_COLUMNS = {
+    "item_invoice_ids": "int64",
+    "item_days": "int32",          # fişin günü
+    "item_products": "int32",      # product_codes kodu
+    "item_names": "int32",         # product_names kodu
+    "item_quantities": "int64",
+    "item_unit_prices": "int64",   # kuruş
+    "item_totals": "int64",        # kuruş
+}
+COLUMNS = {**INVOICE_COLUMNS, **ITEM_COLUMNS}
+
+
+class _Interner:
+    """Metinleri ardışık tam sayı kodlarına eşler (gruplama anahtarı olarak)"""
+
+    def __init__(self, values: Optional[List[Any]] = None):
+        self.values: List[Any] = []
+        self._codes: Dict[Any, int] = {}
+        for value in values or []:
+            self.code(value)
+
+    def code(self, value) -> int:
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def get(self, value) -> Optional[int]:
+        return self._codes.get(value)
+
+    def __len__(self):
+        return len(self.values)
+
+
+class FactStore:
+    """Fiş/kalem olgu sütunları (diskte memmap veya bellekte)"""
+
+    def __init__(self, directory: Optional[str] = None):
+        if np is None:
+            raise ImportError("Olgu deposu için NumPy gerekli")
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._data_version: Optional[int] = None
+        self._meta_stamp_seen = None
+        self._reset()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            self._open()
+
+    @classmethod
+    def for_database(cls, db) -> "FactStore":
+        """DatabaseManager için depo: dosya veritabanında '<dosya>.facts/', bellek içinde diziler"""
+        connection = db.db
+        if connection.is_memory:
+            return cls(None)
+        return cls(f"{connection.db_path}.facts")
+
+    def _reset(self):
+        self.generation = 0
+        self.last_invoice_id = 0
+        self.last_item_id = 0
+        # Gün sütunları sıralıysa (fişler çoğunlukla tarih sırasıyla kesilir) aralıklar ikili aramayla bulunur
+        self.invoice_days_sorted = True
+        self.item_days_sorted = True
+        self.customer_keys = _Interner()
+        self.customer_names: List[str] = []
+        self.product_codes = _Interner()
+        self.product_names = _Interner()
+        for name, dtype in COLUMNS.items():
+            setattr(self, name, np.empty(0, dtype=dtype))
+
+    # --- Disk ---
+
+    def _meta_path(self) -> str:
+        return os.path.join(self.directory, "meta.json")
+
+    def _column_path(self, name: str, generation: int) -> str:
+        return os.path.join(self.directory, f"{name}.{generation}.bin")
+
+    def _open(self):
+        """meta.json'u oku ve sütunları memmap ile aç (yoksa ya da biçim farklıysa boş depo)"""
+        try:
+            with open(self._meta_path(), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            self._meta_stamp_seen = self._meta_stamp()
+        except (OSError, ValueError):
+            self._reset()
+            return
+        if meta.get("format") != STORE_FORMAT:
+            self._reset()
+            return
+
+        self.generation = meta["generation"]
+        self.last_invoice_id = meta["last_invoice_id"]
+        self.last_item_id = meta["last_item_id"]
+        self.invoice_days_sorted = meta["invoice_days_sorted"]
+        self.item_days_sorted = meta["item_days_sorted"]
+        # JSON'da demetler liste olur: kayıtsız müşteri anahtarı (ad, adres)
+        self.customer_keys = _Interner([tuple(key) if isinstance(key, list) else key
+                                        for key in meta["customer_keys"]])
+        self.customer_names = meta["customer_names"]
+        self.product_codes = _Interner(meta["product_codes"])
+        self.product_names = _Interner(meta["product_names"])
+        for name in COLUMNS:
+            self._map_column(name, meta["invoice_count"] if name in INVOICE_COLUMNS else meta["item_count"])
+
+    def _map_column(self, name: str, count: int):
+        """Sütun dosyasının ilk 'count' değerini salt okunur eşle"""
+        dtype = COLUMNS[name]
+        if count == 0:
+            column = np.empty(0, dtype=dtype)  # Boş dosya eşlenemez
+        else:
+            column = np.memmap(self._column_path(name, self.generation), dtype=dtype, mode="r", shape=(count,))
+        setattr(self, name, column)
+
+    def _write_meta(self):
+        meta = {
+            "format": STORE_FORMAT,
+            "generation": self.generation,
+            "invoice_count": len(self.invoice_ids),
+            "item_count": len(self.item_days),
+            "last_invoice_id": int(self.last_invoice_id),
+            "last_item_id": int(self.last_item_id),
+            "invoice_days_sorted": self.invoice_days_sorted,
+            "item_days_sorted": self.item_days_sorted,
+            "customer_keys": self.customer_keys.values,
+            "customer_names": self.customer_names,
+            "product_codes": self.product_codes.values,
+            "product_names": self.product_names.values,
+        }
+        temp_path = self._meta_path() + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self._meta_path())  # Okuyucular eski ya da yeni meta'yı görür, yarımını değil
+        self._meta_stamp_seen = self._meta_stamp()
+
+    def _meta_stamp(self):
+        """meta.json değişti mi karşılaştırması için (değiştirilme zamanı, boyut, inode)"""
+        stat = os.stat(self._meta_path())
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+    def _append_columns(self, new: Dict[str, "np.ndarray"]):
+        """Yeni satırları sütunlara ekle (diskte dosya sonuna yazıp yeniden eşler)"""
+        if not self.directory:
+            for name, values in new.items():
+                setattr(self, name, np.concatenate([getattr(self, name), values]))
+            return
+        for name, values in new.items():
+            current = getattr(self, name)
+            path = self._column_path(name, self.generation)
+            with open(path, "ab") as f:
+                f.truncate(len(current) * current.dtype.itemsize)  # Yarım kalmış yazmayı at
+                f.write(np.ascontiguousarray(values, dtype=COLUMNS[name]).tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+
+    def _remove_stale_generations(self):
+        """Güncel nesil dışındaki sütun dosyalarını sil (başka bir süreç hâlâ eşliyorsa sonraki sefere kalır)"""
+        suffix = f".{self.generation}.bin"
+        for file_name in os.listdir(self.directory):
+            if file_name.endswith(".bin") and not file_name.endswith(suffix):
+                try:
+                    os.remove(os.path.join(self.directory, file_name))
+                except OSError:
+                    pass
+
+    # --- Eşitleme ---
+
+    def sync(self, db, force_rebuild: bool = False) -> bool:
+        """
+        Depoyu veritabanıyla eşitle. Veritabanı değişmediyse (PRAGMA data_version)
+        bir şey yapmaz. Bir şey eklendi/yeniden yazıldıysa True döner.
+        """
+        data_version = db.data_version()
+        with self._lock:
+            if not force_rebuild and data_version == self._data_version:
+                return False
+            changed = self._sync_locked(db, force_rebuild)
+            self._data_version = data_version
+        print(f"DEBUG: Olgu deposu güncel: {len(self.invoice_ids)} fiş, {len(self.item_days)} kalem"
+              f"{' (' + self.directory + ')' if self.directory else ''}")
+        return changed
+
+    def _sync_locked(self, db, force_rebuild: bool) -> bool:
+        conn = db.get_connection(profile="reporting")
+        try:
+            if not force_rebuild:
+                # Okuma anlık görüntüsü: yazma kilidi alınmaz
+                conn.execute("BEGIN")
+                if self.directory:
+                    # Diskteki depoya başka bir örnek eklemiş olabilir: önce meta'yı yeniden oku
+                    self._reopen_if_changed()
+                invoice_rows, item_rows = self._read_new_rows(conn)
+                checksums = self._rollup_checksums(conn)
+                customer_names = self._read_customer_names(conn)
+                conn.rollback()
+                # Okunan anlık görüntüdeki filigranlar (sağlamalar bu duruma aittir)
+                seen = (invoice_rows[-1][0] if invoice_rows else self.last_invoice_id,
+                        item_rows[-1][0] if item_rows else self.last_item_id)
+                appended = self._publish_rows(conn, invoice_rows, item_rows)
+                if (self.last_invoice_id, self.last_item_id) != seen or self._matches_rollups(checksums):
+                    # Filigran farklıysa başka bir örnek daha yeni bir durumu yayımlamıştır;
+                    # sağlama sonraki eşitlemeye kalır
+                    self._apply_customer_names(customer_names)
+                    return appended
+                print("DEBUG: Olgu deposu özet tablolarıyla uyuşmuyor, yeniden oluşturuluyor")
+
+            # Yeni nesil yalnızca okuma anlık görüntüsüyle yazılır (fiş kaydedenler beklemez);
+            # yalnızca meta.json'un yayımlanması eklemelerle aynı kilit altında yapılır
+            conn.execute("BEGIN")
+            old_generation = self.generation
+            self._reset()
+            self.generation = old_generation + 1
+            try:
+                if self.directory:
+                    self._write_empty_generation()
+                self._append_new_rows(conn)
+                conn.rollback()
+                if self.directory:
+                    conn.execute("BEGIN IMMEDIATE")
+                    self._write_meta()
+                    conn.rollback()
+            except Exception:
+                conn.rollback()
+                if self.directory:
+                    self._open()  # Yayımlanmış son nesle dön
+                raise
+            if self.directory:
+                self._open()
+                self._remove_stale_generations()
+            return True
+        finally:
+            conn.close()
+
+    def _publish_rows(self, conn, invoice_rows, item_rows) -> bool:
+        """
+        Okunan satırları ekle. Diskteki depoda ekleme ve meta.json yayımı BEGIN IMMEDIATE
+        altında yapılır; arada başka bir örnek yayımladıysa onun eklediği satırlar atlanır.
+        """
+        if not invoice_rows and not item_rows:
+            return False
+        if not self.directory:
+            return self._append_rows(invoice_rows, item_rows)
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            reopened = self._reopen_if_changed()
+            appended = self._append_rows(invoice_rows, item_rows)
+            if appended:
+                self._write_meta()
+        finally:
+            conn.rollback()
+        return appended or reopened
+
+    def _reopen_if_changed(self) -> bool:
+        """meta.json başka bir örnekçe değiştirildiyse yeniden aç; açıldıysa True"""
+        try:
+            stamp = self._meta_stamp()
+        except OSError:
+            return False
+        if stamp != self._meta_stamp_seen:
+            self._open()
+            return True
+        return False
+
+    def _write_empty_generation(self):
+        for name in COLUMNS:
+            open(self._column_path(name, self.generation), "wb").close()
+
+    def _append_new_rows(self, conn) -> bool:
+        """Filigrandan sonraki fiş ve kalemleri ekle; bir şey eklendiyse True"""
+        return self._append_rows(*self._read_new_rows(conn))
+
+    def _read_new_rows(self, conn):
+        """Filigrandan sonraki (fiş, kalem) satırları"""
+        # CAST: MONEY dönüştürücüsü devreye girmesin (ham kuruş tam sayısı)
+        invoice_rows = conn.execute("""
+            SELECT i.id, i.invoice_day, i.customer_id, COALESCE(c.name, i.customer_name),
+                   i.customer_address, CAST(COALESCE(i.total_amount, 0) AS INTEGER)
+            FROM invoices i
+            LEFT JOIN customers c ON c.id = i.customer_id
+            WHERE i.id > ? AND i.invoice_day IS NOT NULL
+            ORDER BY i.id
+        """, (self.last_invoice_id,)).fetchall()
+        item_rows = conn.execute("""
+            SELECT id, invoice_id, product_code, product_name, quantity,
+                   CAST(unit_price AS INTEGER), CAST(total_price AS INTEGER)
+            FROM invoice_items
+            WHERE id > ?
+            ORDER BY id
+        """, (self.last_item_id,)).fetchall()
+        return invoice_rows, item_rows
+
+    def _append_rows(self, invoice_rows, item_rows) -> bool:
+        """Satırları sütunlara ekle (filigrana kadar olanlar zaten eklenmiştir, atlanır)"""
+        invoice_rows = [row for row in invoice_rows if row[0] > self.last_invoice_id]
+        item_rows = [row for row in item_rows if row[0] > self.last_item_id]
+        if not invoice_rows and not item_rows:
+            return False
+
+        new = {}
+        invoice_ids, invoice_days = self.invoice_ids, self.invoice_days
+        if invoice_rows:
+            ids, days, customer_ids, names, addresses, totals = zip(*invoice_rows)
+            customers = []
+            for customer_id, name, address in zip(customer_ids, names, addresses):
+                key = customer_id if customer_id is not None else (name, address)
+                code = self.customer_keys.code(key)
+                if code == len(self.customer_names):
+                    self.customer_names.append(name)
+                customers.append(code)
+            new_days = np.array(days, dtype=np.int32)
+            new.update({
+                "invoice_ids": np.array(ids, dtype=np.int64),
+                "invoice_days": new_days,
+                "invoice_customers": np.array(customers, dtype=np.int32),
+                "invoice_totals": np.array(totals, dtype=np.int64),
+            })
+            self.invoice_days_sorted = self.invoice_days_sorted and _extends_sorted(invoice_days, new_days)
+            self.last_invoice_id = ids[-1]
+            invoice_ids = np.concatenate([invoice_ids, new["invoice_ids"]])
+            invoice_days = np.concatenate([invoice_days, new_days])
+
+        if item_rows:
+            item_ids, item_invoice_ids, codes, names, quantities, unit_prices, totals = zip(*item_rows)
+            # Kalemin günü fişinden: sıralı fiş id'lerinde ikili arama (günü olmayan fişlerin kalemleri atlanır)
+            item_invoice_ids = np.array(item_invoice_ids, dtype=np.int64)
+            if len(invoice_ids):
+                positions = np.minimum(np.searchsorted(invoice_ids, item_invoice_ids), len(invoice_ids) - 1)
+                known = invoice_ids[positions] == item_invoice_ids
+            else:
+                positions = np.zeros(len(item_invoice_ids), dtype=np.int64)
+                known = np.zeros(len(item_invoice_ids), dtype=bool)
+            new_days = np.asarray(invoice_days[positions[known]], dtype=np.int32)
+            new.update({
+                "item_invoice_ids": item_invoice_ids[known],
+                "item_days": new_days,
+                "item_products": np.array([self.product_codes.code(c) for c in codes], dtype=np.int32)[known],
+                "item_names": np.array([self.product_names.code(n) for n in names], dtype=np.int32)[known],
+                "item_quantities": np.array(quantities, dtype=np.int64)[known],
+                "item_unit_prices": np.array(unit_prices, dtype=np.int64)[known],
+                "item_totals": np.array(totals, dtype=np.int64)[known],
+            })
+            self.item_days_sorted = self.item_days_sorted and _extends_sorted(self.item_days, new_days)
+            self.last_item_id = item_ids[-1]
+
+        counts = {
+            "invoice": len(self.invoice_ids) + len(new.get("invoice_ids", ())),
+            "item": len(self.item_days) + len(new.get("item_days", ())),
+        }
+        self._append_columns(new)
+        if self.directory:
+            # Yeni uzunluklarla yeniden eşle (meta henüz yazılmadı; geçerli sayılar bellekte)
+            for name in new:
+                self._map_column(name, counts["invoice" if name in INVOICE_COLUMNS else "item"])
+        return True
+
+    def _read_customer_names(self, conn) -> Dict[int, str]:
+        """Kayıtlı müşterilerin güncel adları (id -> ad)"""
+        return {row[0]: row[1] for row in conn.execute("SELECT id, name FROM customers")}
+
+    def _apply_customer_names(self, names: Dict[int, str]):
+        """Müşteri kaydına bağlı kodların adlarını güncelle (ad değişiklikleri yeniden yazma gerektirmez)"""
+        for code, key in enumerate(self.customer_keys.values):
+            if not isinstance(key, tuple):
+                name = names.get(key)
+                if name is not None:
+                    self.customer_names[code] = name
+
+    def _rollup_checksums(self, conn):
+        """Özet tablolarından fiş/kalem sağlamaları ve fişlerden müşteri bağlantısı sağlaması"""
+        invoices = conn.execute("""
+            SELECT COALESCE(SUM(invoice_count), 0), CAST(COALESCE(SUM(total_amount), 0) AS INTEGER),
+                   COALESCE(SUM(day * invoice_count), 0)
+            FROM daily_sales
+        """).fetchone()
+        items = conn.execute("""
+            SELECT COALESCE(SUM(line_count), 0), CAST(COALESCE(SUM(revenue), 0) AS INTEGER),
+                   COALESCE(SUM(quantity), 0), COALESCE(SUM(day * line_count), 0)
+            FROM product_daily_sales
+        """).fetchone()
+        # Müşteri bağlantısı özet tablolarında yok (customer_stats uygulamaca tutulur);
+        # (customer_id, invoice_day) indeksinin yalnızca taranmasıyla okunur
+        customers = conn.execute("""
+            SELECT COUNT(customer_id), COALESCE(SUM(customer_id), 0)
+            FROM invoices INDEXED BY idx_invoices_customer_day
+            WHERE invoice_day IS NOT NULL
+        """).fetchone()
+        return tuple(invoices), tuple(items), tuple(customers)
+
+    def _matches_rollups(self, checksums) -> bool:
+        """Sütunlar özet tablolarıyla aynı sayı, toplam ve gün ağırlıklı sağlamayı veriyor mu?"""
+        invoices, items, customers = checksums
+        # Kod -> müşteri id'si (kayıtsız müşteri anahtarı (ad, adres) için 0)
+        customer_ids = np.array([0 if isinstance(key, tuple) else key for key in self.customer_keys.values],
+                                dtype=np.int64)
+        linked = customer_ids[self.invoice_customers] if len(customer_ids) else np.empty(0, dtype=np.int64)
+        return (
+            invoices == (len(self.invoice_days), int(self.invoice_totals.sum()),
+                         int(self.invoice_days.sum(dtype=np.int64)))
+            and items == (len(self.item_days), int(self.item_totals.sum()),
+                          int(self.item_quantities.sum()), int(self.item_days.sum(dtype=np.int64)))
+            and customers == (int(np.count_nonzero(linked)), int(linked.sum()))
+        )
+
+    # --- Okuma ---
+
+    def invoice_range(self, start_day: int, end_day: int):
+        """Gün aralığındaki fişlerin dizini: sıralıysa dilim (yalnızca o sayfalar okunur), değilse maske"""
+        return _day_index(self.invoice_days, self.invoice_days_sorted, start_day, end_day)
+
+    def item_range(self, start_day: int, end_day: int):
+        """Gün aralığındaki kalemlerin dizini (dilim veya maske)"""
+        return _day_index(self.item_days, self.item_days_sorted, start_day, end_day)
+
+
+def _extends_sorted(current, new) -> bool:
+    """Sıralı 'current' dizisine 'new' eklendiğinde sıra korunuyor mu?"""
+    if len(new) == 0:
+        return True
+    if len(current) and new[0] < current[-1]:
+        return False
+    return bool(np.all(new[1:] >= new[:-1]))
+
+
+def _day_index(days, is_sorted: bool, start_day: int, end_day: int):
+    if is_sorted:
+        return slice(int(np.searchsorted(days, start_day, side="left")),
+                     int(np.searchsorted(days, end_day, side="right")))
+    return (days >= start_day) & (days <= end_day)
@@ -1,15 +1,18 @@
 """
 Fiş yönetimi modülü (Zaman Düzeltmesi Dahil)
 """
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 from decimal import Decimal
 from datetime import datetime
 import uuid
 import sqlite3
 
 # Diğer modüllerden bağımlılıklar
-from database.models import Invoice, InvoiceItem, Customer, Product
-from database import db_manager
+from database.models import Invoice, InvoiceItem, InvoiceQuery, InvoiceSummary, Customer, CustomerStats, Product
+from database import db_manager, day_number, turkish_search_key, turkish_sort_key
+from database.money import to_minor
+from database.rollups import add_customer_invoice, remove_customer_invoice
+from modules.product_catalog import product_catalog
 
 
 class InvoiceManager:
@@ -17,14 +20,108 @@ class InvoiceManager:
     
     def __init__(self):
         self.db = db_manager
-        self._product_cache = None
-        self._cache_timestamp = None
+        self.catalog = product_catalog  # Bellek içi katalog (hazır değilse veritabanı kullanılır)
+        self._fts_available = None
     
-    def search_products(self, search_text: str):
-        """Ürün koduna veya adına göre ürün arar (SADECE VAR OLAN SÜTUNLAR ÇEKİLİYOR)"""
-        if not search_text.strip():
+    # Trigram dizini en az 3 karakterlik parçaları arayabilir
+    FTS_MIN_TERM_LENGTH = 3
+    # Bundan fazla eşleşmede bm25 sıralaması atlanır (tüm eşleşmeleri puanlamak pahalı;
+    # kullanıcı yazmaya devam ettikçe sonuç zaten daralır)
+    FTS_RANK_MAX_MATCHES = 500
+    # Fiş geçmişi tablosunun bir seferde çektiği satır sayısı
+    INVOICE_PAGE_SIZE = 200
+    # Sıralanabilir fiş geçmişi alanı -> sütun. Hepsi indeksli (subtotal/tax_amount
+    # hariç; onlar filtrelenmiş aralıkta sıralanır). Müşteri sırası katlanmış ada göredir.
+    INVOICE_SORT_COLUMNS = {
+        "invoice_number": "invoice_number",
+        "invoice_date": "invoice_date",
+        "customer_name": "customer_key",
+        "subtotal": "subtotal",
+        "tax_amount": "tax_amount",
+        "total_amount": "total_amount",
+    }
+
+    def search_products(self, search_text: str, limit: int = 20) -> List[Product]:
+        """
+        Ürün koduna veya adına göre ürün arar (otomatik tamamlama için).
+        Bellek içi katalog hazırsa ondan yanıtlanır; değilse
+        products_fts (FTS5 trigram) varsa sıralı tam metin araması yapılır;
+        kısa aramalarda veya FTS5 yoksa LIKE sorgusuna düşülür.
+        Arama Türkçe harf ve aksan duyarsızdır ("KEÇE" = "kece"); katlanmış
+        code_key/name_key sütunları üzerinden yapılır.
+        """
+        folded = turkish_search_key(search_text.strip())
+        if not folded:
             return []
 
+        products = self.catalog.search(search_text, limit)
+        if products is not None:
+            return products
+
+        terms = folded.split()
+        if self._has_products_fts() and any(len(t) >= self.FTS_MIN_TERM_LENGTH for t in terms):
+            return self._search_products_fts(terms, limit)
+        return self._search_products_like(folded, limit)
+
+    def _has_products_fts(self) -> bool:
+        """products_fts tablosu var mı? (bir kez kontrol edilir)"""
+        if self._fts_available is None:
+            conn = self.db.get_connection()
+            try:
+                row = conn.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'products_fts'"
+                ).fetchone()
+                self._fts_available = row is not None
+            finally:
+                conn.close()
+        return self._fts_available
+
+    def _search_products_fts(self, terms: List[str], limit: int) -> List[Product]:
+        """FTS5 trigram araması: kod eşleşmeleri önce, sonra bm25 sırası (seçici aramalarda)"""
+        long_terms = [t for t in terms if len(t) >= self.FTS_MIN_TERM_LENGTH]
+        short_terms = [t for t in terms if len(t) < self.FTS_MIN_TERM_LENGTH]
+        # Her terim tırnak içinde (FTS sözdizimi karakterleri etkisiz); terimler AND ile birleşir
+        match_query = " ".join('"' + t.replace('"', '""') + '"' for t in long_terms)
+
+        conditions = ["products_fts MATCH ?"]
+        params: list = [match_query]
+        for term in short_terms:
+            conditions.append("(p.code_key LIKE ? OR p.name_key LIKE ?)")
+            params += [f"%{term}%", f"%{term}%"]
+
+        conn = self.db.get_connection()
+        try:
+            # Sayım sınırda durur; çok genel aramada tüm eşleşmeler gezilmez
+            match_count = conn.execute(
+                "SELECT COUNT(*) FROM (SELECT 1 FROM products_fts WHERE products_fts MATCH ? LIMIT ?)",
+                (match_query, self.FTS_RANK_MAX_MATCHES + 1)
+            ).fetchone()[0]
+            if match_count <= self.FTS_RANK_MAX_MATCHES:
+                order_by = """
+                ORDER BY
+                    CASE WHEN p.code_key LIKE ? THEN 0 ELSE 1 END,
+                    bm25(products_fts, 10.0, 1.0),
+                    p.sort_key"""
+                params.append(long_terms[0] + "%")
+            else:
+                order_by = ""
+            query = f"""
+                SELECT p.id, p.code, p.name
+                FROM products_fts f
+                JOIN products p ON p.id = f.rowid
+                WHERE {' AND '.join(conditions)}{order_by}
+                LIMIT ?
+            """
+            rows = conn.execute(query, params + [limit]).fetchall()
+        finally:
+            conn.close()
+        return [Product(id=row["id"], code=row["code"], name=row["name"]) for row in rows]
+
+    def _search_products_like(self, folded_text: str, limit: int) -> List[Product]:
+        """
+        LIKE araması (kısa arama metni veya FTS5 olmayan SQLite için).
+        sort_key indeksi sırayla gezilir; ilk 'limit' eşleşmede durulur.
+        """
         conn = self.db.get_connection()
         conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
@@ -32,14 +129,14 @@ class InvoiceManager:
         # Düzeltme: Yalnızca Product modelinde tanımlı olan ve DB'de VAR OLAN sütunları çekin.
         query = """
             SELECT id, code, name FROM products 
-            WHERE LOWER(code) LIKE LOWER(?) 
-              OR LOWER(name) LIKE LOWER(?) 
-            ORDER BY name
-            LIMIT 20
+            WHERE code_key LIKE ? 
+              OR name_key LIKE ? 
+            ORDER BY sort_key
+            LIMIT ?
         """
 
-        search_pattern = f"%{search_text}%"
-        cursor.execute(query, (search_pattern, search_pattern))
+        search_pattern = f"%{folded_text}%"
+        cursor.execute(query, (search_pattern, search_pattern, limit))
 
         products = []
         for row in cursor.fetchall():
@@ -74,12 +171,12 @@ class InvoiceManager:
         
         query = """
             SELECT DISTINCT code FROM products
-            WHERE LOWER(code) LIKE LOWER(?)
+            WHERE code_key LIKE ?
             ORDER BY code
             LIMIT ?
         """
         
-        search_pattern = f"%{search_text}%"
+        search_pattern = f"%{turkish_search_key(search_text.strip())}%"
         cursor.execute(query, (search_pattern, limit))
         
         suggestions = [row[0] for row in cursor.fetchall()]
@@ -87,21 +184,16 @@ class InvoiceManager:
         return suggestions
     
     def get_cached_product_codes(self) -> List[str]:
-        """Cache'den ürün kodlarını getir (performans için)"""
-        from datetime import datetime, timedelta
-        
-        # Cache 5 dakika geçerli
-        if (self._product_cache is None or 
-            self._cache_timestamp is None or 
-            datetime.now() - self._cache_timestamp > timedelta(minutes=5)):
-            
-            self._product_cache = self.get_all_product_codes()
-            self._cache_timestamp = datetime.now()
-        
-        return self._product_cache
+        """Bellek içi katalogdan ürün kodlarını getir (hazır değilse veritabanından)"""
+        codes = self.catalog.codes()
+        return codes if codes is not None else self.get_all_product_codes()
     
     def get_product_by_code(self, code: str) -> Optional[Product]:
         """Ürün koduna göre ürün getir (SADECE VAR OLAN SÜTUNLAR ÇEKİLİYOR)"""
+        product = self.catalog.lookup(code)
+        if product is not None:
+            return product
+
         conn = self.db.get_connection()
         conn.row_factory = sqlite3.Row 
         cursor = conn.cursor()
@@ -147,7 +239,8 @@ class InvoiceManager:
         conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
         
-        cursor.execute("SELECT * FROM customers ORDER BY name")
+        # sort_key: Türk alfabesi sırası (indeksli)
+        cursor.execute("SELECT * FROM customers ORDER BY sort_key")
         
         customers = []
         for row in cursor.fetchall():
@@ -164,6 +257,24 @@ class InvoiceManager:
         conn.close()
         return customers
     
+    def get_customer_stats(self) -> Dict[int, CustomerStats]:
+        """Müşteri id'si -> tüm zamanlar alış özeti (customer_stats; toplama sorgusu yok)"""
+        conn = self.db.get_connection()
+        try:
+            rows = conn.execute("SELECT * FROM customer_stats").fetchall()
+        finally:
+            conn.close()
+        return {
+            row['customer_id']: CustomerStats(
+                customer_id=row['customer_id'],
+                invoice_count=row['invoice_count'],
+                total_amount=row['total_amount'],
+                first_purchase=row['first_purchase'],
+                last_purchase=row['last_purchase']
+            )
+            for row in rows
+        }
+
     def save_customer(self, customer: Customer) -> Customer:
         """Müşteri kaydet"""
         conn = self.db.get_connection()
@@ -171,14 +282,16 @@ class InvoiceManager:
         
         try:
             cursor.execute("""
-                INSERT INTO customers (name, address, phone, email, tax_number)
-                VALUES (?, ?, ?, ?, ?)
+                INSERT INTO customers (name, address, phone, email, tax_number, name_key, sort_key)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
             """, (
                 customer.name,
                 customer.address,
                 customer.phone,
                 customer.email,
-                customer.tax_number
+                customer.tax_number,
+                turkish_search_key(customer.name),  # Türkçe arama/sıralama anahtarları
+                turkish_sort_key(customer.name)
             ))
             
             customer.id = cursor.lastrowid
@@ -197,22 +310,34 @@ class InvoiceManager:
         cursor = conn.cursor()
         
         try:
-            # Fiş numarası oluştur
-            if not invoice.invoice_number:
-                invoice.invoice_number = self.generate_invoice_number()
-            
             # YENİ EKLENEN SATIR: Yerel saat dilimi farkındalıklı zamanı kaydet
             from datetime import datetime, timezone
             # datetime.now(timezone.utc) ile UTC zamanını alıp, veritabanına kaydederiz. 
             # Veritabanı da bunu okurken yerel saate göre yorumlar.
             invoice.invoice_date = datetime.now() # Bu kez varsayılan saati bırakalım
+
+            # Yazma kilidi baştan alınır: numara ayırma ve fiş kaydı tek işlemde
+            # (başka terminal aynı anda kaydediyorsa busy_timeout kadar beklenir)
+            conn.execute("BEGIN IMMEDIATE")
+
+            # Fiş numarası oluştur
+            if not invoice.invoice_number:
+                invoice.invoice_number = self._reserve_invoice_number(cursor, invoice.invoice_date)
+
+            # Ad ile girilen müşteriyi kaydına bağla (müşteri özetleri müşteri id'si ile tutulur)
+            if invoice.customer_id is None and invoice.customer_name:
+                row = cursor.execute(
+                    "SELECT id FROM customers WHERE name = ?", (invoice.customer_name,)
+                ).fetchone()
+                invoice.customer_id = row[0] if row else None
             
-            # Fişi kaydet
+            # Fişi kaydet (tutarlar kuruş olarak)
             cursor.execute("""
                 INSERT INTO invoices (
                     invoice_number, customer_id, customer_name, customer_address,
-                    delivery_person, receiver_person, subtotal, tax_rate, tax_amount, total_amount, invoice_date
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    delivery_person, receiver_person, subtotal, discount_amount, tax_rate, tax_amount, total_amount,
+                    invoice_date, invoice_day, customer_key
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             """, (
                 invoice.invoice_number,
                 invoice.customer_id,
@@ -220,14 +345,16 @@ class InvoiceManager:
                 invoice.customer_address,
                 invoice.delivery_person,
                 invoice.receiver_person,
-                str(invoice.subtotal),
+                to_minor(invoice.subtotal),
                 # YENİ EKLENDİ: (getattr ile None ise 0.0 olmasını sağlıyoruz)
-                str(getattr(invoice, 'discount_amount', Decimal('0.0'))), 
+                to_minor(getattr(invoice, 'discount_amount', None) or Decimal('0.0')),
                 str(invoice.tax_rate),
-                str(invoice.tax_amount),
-                str(invoice.total_amount),
+                to_minor(invoice.tax_amount),
+                to_minor(invoice.total_amount),
                 # KRİTİK: SQLite, isoformat ile kaydederken bunu düzgünce saklamalı.
-                invoice.invoice_date.strftime("%Y-%m-%d %H:%M:%S")
+                invoice.invoice_date.strftime("%Y-%m-%d %H:%M:%S"),
+                day_number(invoice.invoice_date),  # İndeksli gün numarası (YYYYMMDD)
+                turkish_search_key(invoice.customer_name)  # Geçmişte müşteri önek araması
             ))
             
             invoice_id = cursor.lastrowid
@@ -245,9 +372,13 @@ class InvoiceManager:
                     item.product_code,
                     item.product_name,
                     item.quantity,
-                    str(item.unit_price),
-                    str(item.total_price)
+                    to_minor(item.unit_price),
+                    to_minor(item.total_price)
                 ))
+
+            # Müşteri özetleri aynı işlemde güncellenir
+            if invoice.customer_id is not None:
+                add_customer_invoice(conn, invoice.customer_id, invoice.invoice_date, to_minor(invoice.total_amount))
             
             conn.commit()
             invoice.id = invoice_id
@@ -263,26 +394,38 @@ class InvoiceManager:
         finally:
             conn.close()
     
+    @staticmethod
+    def _format_invoice_number(day: datetime, number: int) -> str:
+        return f"{day.strftime('%Y%m%d')}-{number:03d}"
+
+    def _reserve_invoice_number(self, cursor, when: datetime) -> str:
+        """
+        Günün sayacını artırıp yeni numarayı döndür. Açık bir yazma işlemi
+        (BEGIN IMMEDIATE) içinde çağrılmalıdır; işlem geri alınırsa numara da geri alınır.
+        """
+        day = day_number(when)
+        cursor.execute("""
+            INSERT INTO invoice_counters (day, last_number) VALUES (?, 1)
+            ON CONFLICT (day) DO UPDATE SET last_number = last_number + 1
+        """, (day,))
+        cursor.execute("SELECT last_number FROM invoice_counters WHERE day = ?", (day,))
+        return self._format_invoice_number(when, cursor.fetchone()[0])
+
     def generate_invoice_number(self) -> str:
-        """Fiş numarası oluştur"""
+        """
+        Bugünün sıradaki fiş numarası (yalnızca gösterim için, numarayı ayırmaz;
+        kesin numara save_invoice içinde verilir)
+        """
         today = datetime.now()
-        date_str = today.strftime("%Y%m%d")
         
         conn = self.db.get_connection()
-        conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
         
-        cursor.execute("""
-            SELECT COUNT(*) as count FROM invoices 
-            WHERE DATE(invoice_date) = DATE('now', 'localtime')
-        """) # 'localtime' eklendi
-        
-        count_row = cursor.fetchone()
-        count = count_row['count'] if count_row else 0
+        cursor.execute("SELECT last_number FROM invoice_counters WHERE day = ?", (day_number(today),))
+        row = cursor.fetchone()
         conn.close()
         
-        invoice_number = f"{date_str}-{count + 1:03d}"
-        return invoice_number
+        return self._format_invoice_number(today, (row[0] if row else 0) + 1)
     
     def get_invoice_by_number(self, invoice_number: str) -> Optional[Invoice]:
         """Fiş numarasına göre fiş getir"""
@@ -311,10 +454,11 @@ class InvoiceManager:
             customer_address=invoice_row['customer_address'],
             delivery_person=invoice_row['delivery_person'],
             receiver_person=invoice_row['receiver_person'],
-            subtotal=Decimal(str(invoice_row['subtotal'])),
+            subtotal=invoice_row['subtotal'],
+            discount_amount=invoice_row['discount_amount'] or Decimal('0.00'),
             tax_rate=Decimal(str(invoice_row['tax_rate'])),
-            tax_amount=Decimal(str(invoice_row['tax_amount'])),
-            total_amount=Decimal(str(invoice_row['total_amount'])),
+            tax_amount=invoice_row['tax_amount'],
+            total_amount=invoice_row['total_amount'],
             # DÜZELTME: Artık row['invoice_date'] zaten datetime objesi gelmeli
             invoice_date=invoice_row['invoice_date'] 
         )
@@ -327,8 +471,8 @@ class InvoiceManager:
                 product_code=item_row['product_code'],
                 product_name=item_row['product_name'],
                 quantity=item_row['quantity'],
-                unit_price=Decimal(str(item_row['unit_price'])),
-                total_price=Decimal(str(item_row['total_price']))
+                unit_price=item_row['unit_price'],
+                total_price=item_row['total_price']
             )
             invoice.items.append(item)
         
@@ -356,10 +500,11 @@ class InvoiceManager:
                 customer_address=row['customer_address'],
                 delivery_person=row['delivery_person'],
                 receiver_person=row['receiver_person'],
-                subtotal=Decimal(str(row['subtotal'])),
+                subtotal=row['subtotal'],
+                discount_amount=row['discount_amount'] or Decimal('0.00'),
                 tax_rate=Decimal(str(row['tax_rate'])),
-                tax_amount=Decimal(str(row['tax_amount'])),
-                total_amount=Decimal(str(row['total_amount'])),
+                tax_amount=row['tax_amount'],
+                total_amount=row['total_amount'],
                 # DÜZELTME: Artık row['invoice_date'] zaten datetime objesi gelmeli
                 invoice_date=row['invoice_date']
             )
@@ -368,6 +513,116 @@ class InvoiceManager:
         conn.close()
         return invoices
 
+    def query_invoices(self, query: InvoiceQuery, after: Optional[Tuple[object, int]] = None,
+                       limit: Optional[int] = None,
+                       offset: int = 0) -> Tuple[List[InvoiceSummary], Optional[Tuple[object, int]]]:
+        """
+        Filtrelenmiş fiş başlıklarını (sort_by, id) sırasıyla sayfa sayfa getir.
+        after önceki sayfanın döndürdüğü anahtardır: sayfa OFFSET ile değil bu
+        anahtardan aranır, böylece derin sayfalar da tek bir indeks aralık taramasıdır.
+        offset yalnızca anahtarsız (atlamalı) erişim içindir.
+        Sıralama sütunu NULL olmamalıdır (tutarların varsayılanı 0, tarihin şimdiki zaman).
+        Dönen ikinci değer sonraki sayfanın anahtarıdır (başka satır yoksa None).
+        """
+        column = self.INVOICE_SORT_COLUMNS.get(query.sort_by)
+        if column is None:
+            raise ValueError(f"Sıralanamayan alan: {query.sort_by}")
+        limit = limit or self.INVOICE_PAGE_SIZE
+        direction, op = ("DESC", "<") if query.descending else ("ASC", ">")
+
+        conditions, params = [], []
+        if after is not None:
+            # Anahtar koşulu filtrelerden önce: SQLite aynı sütundaki ilk sınırı
+            # indeks aralığı olarak kullanır, tarama doğrudan kalınan yerden başlar
+            conditions.append(f"{column} {op}= ? AND ({column} {op} ? OR id {op} ?)")
+            params += [after[0], after[0], after[1]]
+        where, filter_params = self._invoice_query_filters(query)
+        conditions += where
+        params += filter_params
+
+        # +sütun türü dönüştürülmemiş ham değeri verir (sayfa anahtarı)
+        sql = f"""
+            SELECT id, invoice_number, customer_name, subtotal, tax_amount, total_amount,
+                   invoice_date, +{column} AS sort_value
+            FROM invoices
+            {"WHERE " + " AND ".join(conditions) if conditions else ""}
+            ORDER BY {column} {direction}, id {direction}
+            LIMIT ? OFFSET ?
+        """
+        params += [limit + 1, offset]  # Fazladan bir satır: sonraki sayfa var mı?
+
+        conn = self.db.get_connection()
+        try:
+            rows = conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+
+        page = [
+            InvoiceSummary(
+                id=row['id'],
+                invoice_number=row['invoice_number'],
+                customer_name=row['customer_name'],
+                subtotal=row['subtotal'],
+                tax_amount=row['tax_amount'],
+                total_amount=row['total_amount'],
+                invoice_date=row['invoice_date'],
+                page_key=(row['sort_value'], row['id'])
+            )
+            for row in rows[:limit]
+        ]
+        next_key = page[-1].page_key if len(rows) > limit else None
+        return page, next_key
+
+    def get_invoice_totals(self, query: InvoiceQuery) -> Dict:
+        """Sorguya uyan tüm fişlerin sayısı ve tutar toplamları (tablo alt satırı; SQL'de toplanır)"""
+        where, params = self._invoice_query_filters(query)
+        conn = self.db.get_connection()
+        try:
+            row = conn.execute(f"""
+                SELECT COUNT(*) AS invoice_count,
+                       SUM(subtotal) AS "subtotal [MONEY]",
+                       SUM(tax_amount) AS "tax_amount [MONEY]",
+                       SUM(total_amount) AS "total_amount [MONEY]"
+                FROM invoices
+                {"WHERE " + " AND ".join(where) if where else ""}
+            """, params).fetchone()
+        finally:
+            conn.close()
+        return {
+            'invoice_count': row['invoice_count'],
+            'subtotal': row['subtotal'] or Decimal('0.00'),
+            'tax_amount': row['tax_amount'] or Decimal('0.00'),
+            'total_amount': row['total_amount'] or Decimal('0.00'),
+        }
+
+    def _invoice_query_filters(self, query: InvoiceQuery):
+        """InvoiceQuery filtreleri -> (WHERE koşulları, parametreler)"""
+        conditions, params = [], []
+        if query.start_date is not None:
+            conditions.append("invoice_date >= ?")
+            params.append(query.start_date)
+        if query.end_date is not None:
+            conditions.append("invoice_date < ?")
+            params.append(query.end_date)
+        if query.customer_id is not None:
+            conditions.append("customer_id = ?")
+            params.append(query.customer_id)
+        folded = turkish_search_key(query.customer_prefix.strip()) if query.customer_prefix else ""
+        if folded:
+            # Önek araması aralık olarak: idx_invoices_customer_key üzerinde aranır
+            conditions.append("customer_key >= ? AND customer_key < ?")
+            params += [folded, folded[:-1] + chr(ord(folded[-1]) + 1)]
+        if query.product_code and query.product_code.strip():
+            conditions.append("id IN (SELECT invoice_id FROM invoice_items WHERE product_code = ?)")
+            params.append(query.product_code.strip())
+        if query.min_total is not None:
+            conditions.append("total_amount >= ?")
+            params.append(to_minor(query.min_total))
+        if query.max_total is not None:
+            conditions.append("total_amount <= ?")
+            params.append(to_minor(query.max_total))
+        return conditions, params
+
     def delete_invoice_by_number(self, invoice_number: str):
         """Fiş numarasını kullanarak bir fişi ve ilgili kalemlerini siler."""
         
@@ -376,7 +631,11 @@ class InvoiceManager:
         cursor = conn.cursor()
         
         try:
-            cursor.execute("SELECT id FROM invoices WHERE invoice_number = ?", (invoice_number,))
+            conn.execute("BEGIN IMMEDIATE")
+            cursor.execute(
+                "SELECT id, customer_id, invoice_date, total_amount FROM invoices WHERE invoice_number = ?",
+                (invoice_number,)
+            )
             invoice_row = cursor.fetchone()
             
             if not invoice_row:
@@ -386,6 +645,11 @@ class InvoiceManager:
             
             cursor.execute("DELETE FROM invoice_items WHERE invoice_id = ?", (invoice_id,))
             cursor.execute("DELETE FROM invoices WHERE id = ?", (invoice_id,))
+
+            # Müşteri özetleri (fiş satırı silindikten sonra: ilk/son alış yeniden bulunur)
+            if invoice_row['customer_id'] is not None and invoice_row['invoice_date'] is not None:
+                remove_customer_invoice(conn, invoice_row['customer_id'], invoice_row['invoice_date'],
+                                        to_minor(invoice_row['total_amount'] or Decimal('0.00')))
             
             conn.commit()
             print(f"Fiş başarıyla silindi: {invoice_number} (ID: {invoice_id})")
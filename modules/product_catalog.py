@@ -0,0 +1,213 @@
+"""
+Bellek içi ürün kataloğu (otomatik tamamlama ve barkod/kod okutma için)
+
+Tüm ürünler bir kez (arka planda) yüklenir ve şu aramalar veritabanına
+gitmeden yanıtlanır:
+  - lookup(code)  : tam kod eşleşmesi (büyük/küçük harf duyarsız)
+  - search(text)  : önce kod öneki, sonra kod/ad içinde alt dizi eşleşmeleri
+
+Yapı: ürünler sort_key (Türk alfabesi) sırasıyla paralel listelerde tutulur;
+kod öneki için sıralı code_key dizisi (bisect), alt dizi araması için tüm
+anahtarların tek bir metinde birleştirildiği 'haystack' (str.find) kullanılır.
+
+Geçersiz kılma zaman aşımıyla değil PRAGMA data_version ile yapılır:
+veritabanı değiştiğinde ürün sayısı/son id/son güncelleme zamanı karşılaştırılır,
+farklıysa katalog arka planda yeniden yüklenir. Böylece başka bir terminalin
+yaptığı ad/fiyat değişikliği ve var olan koda upsert (updated_at'i günceller)
+de yakalanır. Bu süreçteki içe aktarma ayrıca invalidate() çağırır.
+"""
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import List, Optional
+
+from database.models import Product
+from database import db_manager, turkish_search_key
+
+
+class _Snapshot:
+    """Kataloğun değişmez bir kopyası (okuyucular kilitsiz kullanır)"""
+
+    __slots__ = ("ids", "codes", "names", "keys", "by_code", "by_code_key",
+                 "prefix_keys", "prefix_rows", "haystack", "offsets", "fingerprint")
+
+    def __init__(self, rows, fingerprint):
+        self.ids = array("q", (row["id"] for row in rows))
+        self.codes = [row["code"] for row in rows]
+        self.names = [row["name"] for row in rows]
+        # Satır başına katlanmış "kod<TAB>ad" anahtarı
+        self.keys = [f"{row['code_key'] or ''}\t{row['name_key'] or ''}" for row in rows]
+        self.by_code = {code: i for i, code in enumerate(self.codes)}
+        self.by_code_key = {}
+        for i, row in enumerate(rows):
+            self.by_code_key.setdefault(row["code_key"], i)
+
+        order = sorted(range(len(rows)), key=lambda i: rows[i]["code_key"] or "")
+        self.prefix_keys = [rows[i]["code_key"] or "" for i in order]
+        self.prefix_rows = array("l", order)
+
+        # Alt dizi araması: anahtarlar '\n' ile birleşir; offsets[i] satır i'nin başlangıcı
+        self.haystack = "\n".join(self.keys)
+        self.offsets = array("q")
+        position = 0
+        for key in self.keys:
+            self.offsets.append(position)
+            position += len(key) + 1
+        self.fingerprint = fingerprint
+
+    def __len__(self):
+        return len(self.codes)
+
+    def product(self, i: int) -> Product:
+        return Product(id=self.ids[i], code=self.codes[i], name=self.names[i])
+
+
+class ProductCatalog:
+    """Bellek içi ürün kataloğu"""
+
+    def __init__(self, db=None):
+        self.db = db or db_manager
+        self._snapshot: Optional[_Snapshot] = None
+        self._data_version: Optional[int] = None
+        self._stale = False
+        self._loading: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    # --- Yükleme / geçersiz kılma ---
+
+    @property
+    def is_ready(self) -> bool:
+        """Katalog yüklendi mi? (Yüklenmediyse çağıranlar veritabanına düşer)"""
+        return self._snapshot is not None
+
+    def load(self):
+        """Kataloğu şimdi (çağıran thread'de) yükle"""
+        # Sürüm okuma yüklemeden önce: arada gelen değişiklik bir sonraki kontrolde yakalanır
+        data_version = self.db.data_version()
+        conn = self.db.get_connection(profile="reporting")
+        try:
+            fingerprint = self._fingerprint(conn)
+            rows = conn.execute(
+                "SELECT id, code, name, code_key, name_key FROM products ORDER BY sort_key"
+            ).fetchall()
+        finally:
+            conn.close()
+        snapshot = _Snapshot(rows, fingerprint)
+        with self._lock:
+            self._snapshot = snapshot
+            self._data_version = data_version
+            self._stale = False
+        print(f"DEBUG: Ürün kataloğu yüklendi: {len(snapshot)} ürün")
+
+    def load_async(self):
+        """Kataloğu arka planda yükle (zaten yükleniyorsa bir şey yapmaz)"""
+        with self._lock:
+            if self._loading is not None and self._loading.is_alive():
+                return
+            self._loading = threading.Thread(target=self._load_quietly, name="ProductCatalogLoader", daemon=True)
+            self._loading.start()
+
+    def invalidate(self):
+        """Kataloğu eskimiş işaretle ve arka planda yeniden yükle (ör. içe aktarmadan sonra)"""
+        with self._lock:
+            self._stale = True
+        self.load_async()
+
+    def _load_quietly(self):
+        try:
+            self.load()
+        except Exception as e:
+            print(f"Ürün kataloğu yüklenemedi: {e}")
+
+    @staticmethod
+    def _fingerprint(conn):
+        """Ucuz ürün tablosu özeti: sayım, son id ve son güncelleme (ekleme/silme/ad-fiyat değişikliği)"""
+        row = conn.execute("SELECT COUNT(*), MAX(id), MAX(updated_at) FROM products").fetchone()
+        return tuple(row)
+
+    def _current(self) -> Optional[_Snapshot]:
+        """Güncel kopyayı döndür; veritabanı değiştiyse ürünleri kontrol et"""
+        snapshot = self._snapshot
+        if snapshot is None:
+            return None
+        if self._stale:
+            return None  # Yeniden yükleme sürerken veritabanı kullanılır
+        data_version = self.db.data_version()
+        if data_version != self._data_version:
+            conn = self.db.get_connection()
+            try:
+                fingerprint = self._fingerprint(conn)
+            finally:
+                conn.close()
+            if fingerprint != snapshot.fingerprint:
+                self.invalidate()
+                return None
+            self._data_version = data_version  # Değişiklik ürünlerle ilgili değil (ör. yeni fiş)
+        return snapshot
+
+    # --- Aramalar ---
+
+    def lookup(self, code: str) -> Optional[Product]:
+        """
+        Tam kod eşleşmesi. None: ürün yok ya da katalog hazır değil/eskimiş;
+        her iki durumda da çağıran veritabanına bakar (kaçırmalar seyrek ve ucuz).
+        """
+        snapshot = self._current()
+        if snapshot is None:
+            return None
+        code = code.strip()
+        i = snapshot.by_code.get(code)
+        if i is None:
+            i = snapshot.by_code_key.get(turkish_search_key(code))
+        return snapshot.product(i) if i is not None else None
+
+    def search(self, text: str, limit: int = 20) -> Optional[List[Product]]:
+        """
+        Öneki koda uyan ürünler önce, ardından kod/adında tüm terimleri içerenler.
+        Katalog hazır değilse None döner (çağıran veritabanına düşer).
+        """
+        snapshot = self._current()
+        if snapshot is None:
+            return None
+        folded = turkish_search_key(text.strip())
+        if not folded:
+            return []
+        terms = folded.split()
+
+        results = []
+        seen = set()
+        # 1) Kod öneki (sıralı code_key üzerinde ikili arama)
+        start = bisect_left(snapshot.prefix_keys, folded)
+        end = bisect_right(snapshot.prefix_keys, folded + "\uffff", lo=start)
+        for j in range(start, min(end, start + limit)):
+            i = snapshot.prefix_rows[j]
+            seen.add(i)
+            results.append(i)
+
+        # 2) Alt dizi: en uzun terim haystack'te aranır, diğer terimler satır anahtarında kontrol edilir
+        if len(results) < limit:
+            needle = max(terms, key=len)
+            others = [t for t in terms if t is not needle]
+            haystack, offsets = snapshot.haystack, snapshot.offsets
+            position = haystack.find(needle)
+            while position != -1 and len(results) < limit:
+                i = bisect_right(offsets, position) - 1
+                if i not in seen and all(t in snapshot.keys[i] for t in others):
+                    seen.add(i)
+                    results.append(i)
+                # Aynı satırdaki diğer eşleşmeleri atla
+                next_row = offsets[i + 1] if i + 1 < len(offsets) else len(haystack)
+                position = haystack.find(needle, max(position + 1, next_row))
+
+        return [snapshot.product(i) for i in results]
+
+    def codes(self) -> Optional[List[str]]:
+        """Tüm ürün kodları (sıralı); katalog hazır değilse None"""
+        snapshot = self._current()
+        if snapshot is None:
+            return None
+        return [snapshot.codes[i] for i in snapshot.prefix_rows]
+
+
+# Paylaşılan katalog (tembel: load_async() veya load() çağrılınca dolar)
+product_catalog = ProductCatalog()
@@ -0,0 +1,86 @@
+"""
+Rapor sonuç önbelleği
+
+ReportGenerator metotlarının sonuçları (metot, argümanlar) anahtarıyla sınırlı
+bir LRU önbellekte tutulur. Geçersiz kılma zaman aşımıyla değil PRAGMA
+data_version ile yapılır: herhangi bir bağlantı commit ettiğinde (ör. yeni
+fiş) sürüm değişir ve önbellek bir sonraki okumada tamamen boşaltılır.
+
+Dönen listeler/sözlükler çağıranlar arasında paylaşılır; değiştirilmemelidir.
+"""
+import threading
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from database import db_manager
+
+
+class ReportCache:
+    """data_version ile geçersiz kılınan sınırlı LRU önbellek"""
+
+    def __init__(self, db=None, maxsize: int = 64):
+        self.db = db or db_manager
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._data_version: Optional[int] = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Önbellekteki sonucu döndür; yoksa compute() ile hesaplayıp sakla"""
+        data_version = self.db.data_version()
+        with self._lock:
+            if data_version != self._data_version:
+                if self._entries:
+                    self.invalidations += 1
+                self._entries.clear()
+                self._data_version = data_version
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+
+        # Sorgu kilit dışında çalışır; arada gelen yazma bir sonraki get'te yakalanır
+        value = compute()
+        with self._lock:
+            if self._data_version == data_version:
+                self._entries[key] = value
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        """Tüm sonuçları at (istatistikler korunur)"""
+        with self._lock:
+            self._entries.clear()
+            self._data_version = None
+
+    def stats(self) -> Dict[str, Any]:
+        """İsabet/ıskalama istatistikleri"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'invalidations': self.invalidations,
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+
+def cached_report(method):
+    """ReportGenerator metodunu self.cache üzerinden önbelleğe al (cache None ise doğrudan çalışır)"""
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        cache = getattr(self, 'cache', None)
+        if cache is None:
+            return method(self, *args, **kwargs)
+        key = (method.__name__, args, tuple(sorted(kwargs.items())))
+        return cache.get(key, lambda: method(self, *args, **kwargs))
+    return wrapper
@@ -1,31 +1,39 @@
 """
 Rapor oluşturma modülü
 """
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from datetime import datetime, timedelta
 from decimal import Decimal
 from collections import defaultdict
 
 from database.models import Invoice, InvoiceItem
-from database import db_manager
+from database import db_manager, day_number, day_from_number
+from database.rollups import customer_period_totals
+from modules.report_cache import ReportCache, cached_report
+from modules.analytics_engine import AnalyticsEngine
 
 
 class ReportGenerator:
     """Rapor oluşturma sınıfı"""
     
-    def __init__(self):
+    def __init__(self, cache_size: int = 64, use_engine: Optional[bool] = None):
         self.db = db_manager
+        # Aynı aralık için tekrar eden raporlar (sekme değişimi, yenileme) önbellekten gelir
+        self.cache = ReportCache(self.db, maxsize=cache_size) if cache_size else None
+        # NumPy analiz motoru (çok yıllık analiz için); FORKLIFT_ANALYTICS=numpy ile de açılır
+        self.engine = AnalyticsEngine.from_environment(self.db, use_engine)
     
+    @cached_report
     def get_sales_report(self, start_date: datetime, end_date: datetime) -> List[Invoice]:
-        """Satış raporu oluştur"""
+        """Satış raporu oluştur (tam günler: bitiş günü dahil, diğer raporlarla aynı aralık)"""
         conn = self.db.get_connection()
         cursor = conn.cursor()
         
         cursor.execute("""
             SELECT * FROM invoices 
-            WHERE invoice_date BETWEEN ? AND ?
+            WHERE invoice_day BETWEEN ? AND ?
             ORDER BY invoice_date DESC
-        """, (start_date, end_date))
+        """, (day_number(start_date), day_number(end_date)))
         
         invoices = []
         for row in cursor.fetchall():
@@ -37,35 +45,41 @@ class ReportGenerator:
                 customer_address=row['customer_address'],
                 delivery_person=row['delivery_person'],
                 receiver_person=row['receiver_person'],
-                subtotal=Decimal(str(row['subtotal'])),
+                subtotal=row['subtotal'],
+                discount_amount=row['discount_amount'] or Decimal('0.00'),
                 tax_rate=Decimal(str(row['tax_rate'])),
-                tax_amount=Decimal(str(row['tax_amount'])),
-                total_amount=Decimal(str(row['total_amount'])),
-                invoice_date=datetime.fromisoformat(row['invoice_date'])
+                tax_amount=row['tax_amount'],
+                total_amount=row['total_amount'],
+                invoice_date=row['invoice_date']  # TIMESTAMP dönüştürücüsü datetime döndürür
             )
             invoices.append(invoice)
         
         conn.close()
         return invoices
     
+    @cached_report
     def get_product_analysis(self, start_date: datetime, end_date: datetime) -> List[Dict[str, Any]]:
         """Ürün analizi oluştur"""
+        if self.engine is not None:
+            return self.engine.product_analysis(start_date, end_date)
         conn = self.db.get_connection()
         cursor = conn.cursor()
         
+        # Ürün-gün özet tablosundan (gün çözünürlüğünde). product_name, MAX(day)
+        # ile aynı satırdan gelir: aralıktaki en son kullanılan ad.
         cursor.execute("""
             SELECT 
-                ii.product_code,
-                ii.product_name,
-                SUM(ii.quantity) as total_quantity,
-                SUM(ii.total_price) as total_amount,
-                AVG(ii.unit_price) as avg_price
-            FROM invoice_items ii
-            JOIN invoices i ON ii.invoice_id = i.id
-            WHERE i.invoice_date BETWEEN ? AND ?
-            GROUP BY ii.product_code, ii.product_name
-            ORDER BY total_amount DESC
-        """, (start_date, end_date))
+                product_code,
+                product_name,
+                MAX(day) as last_day,
+                SUM(quantity) as total_quantity,
+                SUM(revenue) as "total_amount [MONEY]",
+                SUM(unit_price_sum) * 1.0 / SUM(line_count) as "avg_price [MONEY]"
+            FROM product_daily_sales
+            WHERE day BETWEEN ? AND ?
+            GROUP BY product_code
+            ORDER BY SUM(revenue) DESC
+        """, (day_number(start_date), day_number(end_date)))
         
         products = []
         for row in cursor.fetchall():
@@ -73,73 +87,97 @@ class ReportGenerator:
                 'code': row['product_code'],
                 'name': row['product_name'],
                 'quantity': row['total_quantity'],
-                'total': Decimal(str(row['total_amount'])),
-                'avg_price': Decimal(str(row['avg_price']))
+                'total': row['total_amount'],
+                'avg_price': row['avg_price']
             }
             products.append(product_data)
         
         conn.close()
         return products
     
+    @cached_report
     def get_customer_analysis(self, start_date: datetime, end_date: datetime) -> List[Dict[str, Any]]:
-        """Müşteri analizi oluştur"""
+        """Müşteri analizi oluştur (müşteri özet tablolarından; gün çözünürlüğünde)"""
+        if self.engine is not None:
+            return self.engine.customer_analysis(start_date, end_date)
         conn = self.db.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            SELECT 
-                customer_name,
-                COUNT(*) as invoice_count,
-                SUM(total_amount) as total_amount,
-                AVG(total_amount) as avg_amount
-            FROM invoices 
-            WHERE invoice_date BETWEEN ? AND ?
-            GROUP BY customer_name
-            ORDER BY total_amount DESC
-        """, (start_date, end_date))
+        try:
+            totals = customer_period_totals(conn, day_number(start_date), day_number(end_date))
+        finally:
+            conn.close()
         
         customers = []
-        for row in cursor.fetchall():
+        for entry in totals:
             customer_data = {
-                'name': row['customer_name'],
-                'invoice_count': row['invoice_count'],
-                'total_amount': Decimal(str(row['total_amount'])),
-                'avg_amount': Decimal(str(row['avg_amount']))
+                'name': entry['name'],
+                'invoice_count': entry['invoice_count'],
+                'total_amount': entry['total_amount'],
+                'avg_amount': entry['avg_amount']
             }
             customers.append(customer_data)
         
-        conn.close()
         return customers
     
+    @cached_report
+    def get_customer_ranking(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Tüm zamanlarda en çok alış yapan müşteriler (customer_stats indeksinden)"""
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute("""
+            SELECT c.name, s.invoice_count, s.total_amount, s.first_purchase, s.last_purchase
+            FROM customer_stats s
+            JOIN customers c ON c.id = s.customer_id
+            ORDER BY s.total_amount DESC
+            LIMIT ?
+        """, (limit,))
+        
+        ranking = []
+        for row in cursor.fetchall():
+            ranking.append({
+                'name': row['name'],
+                'invoice_count': row['invoice_count'],
+                'total_amount': row['total_amount'],
+                'avg_amount': (row['total_amount'] / row['invoice_count']).quantize(Decimal('0.01')),
+                'first_purchase': row['first_purchase'],
+                'last_purchase': row['last_purchase']
+            })
+        
+        conn.close()
+        return ranking
+    
+    @cached_report
     def get_summary_stats(self, start_date: datetime, end_date: datetime) -> Dict[str, Any]:
         """Özet istatistikler"""
+        if self.engine is not None:
+            return self.engine.summary_stats(start_date, end_date)
         conn = self.db.get_connection()
         cursor = conn.cursor()
         
-        # Temel istatistikler
+        # Temel istatistikler (günlük özet tablosundan; gün çözünürlüğünde)
         cursor.execute("""
             SELECT 
-                COUNT(*) as total_invoices,
-                SUM(total_amount) as total_revenue,
-                AVG(total_amount) as avg_invoice_amount
-            FROM invoices 
-            WHERE invoice_date BETWEEN ? AND ?
-        """, (start_date, end_date))
+                SUM(invoice_count) as total_invoices,
+                SUM(total_amount) as "total_revenue [MONEY]",
+                SUM(total_amount) * 1.0 / SUM(invoice_count) as "avg_invoice_amount [MONEY]"
+            FROM daily_sales 
+            WHERE day BETWEEN ? AND ?
+        """, (day_number(start_date), day_number(end_date)))
         
         stats_row = cursor.fetchone()
         
-        # En çok satan ürün
+        # En çok satan ürün (ürün-gün özet tablosundan)
         cursor.execute("""
             SELECT 
-                ii.product_name,
-                SUM(ii.quantity) as total_quantity
-            FROM invoice_items ii
-            JOIN invoices i ON ii.invoice_id = i.id
-            WHERE i.invoice_date BETWEEN ? AND ?
-            GROUP BY ii.product_code, ii.product_name
-            ORDER BY total_quantity DESC
+                product_name,
+                MAX(day) as last_day,
+                SUM(quantity) as total_quantity
+            FROM product_daily_sales
+            WHERE day BETWEEN ? AND ?
+            GROUP BY product_code
+            ORDER BY SUM(quantity) DESC
             LIMIT 1
-        """, (start_date, end_date))
+        """, (day_number(start_date), day_number(end_date)))
         
         top_product_row = cursor.fetchone()
         
@@ -147,97 +185,113 @@ class ReportGenerator:
         
         stats = {
             'total_invoices': stats_row['total_invoices'] or 0,
-            'total_revenue': Decimal(str(stats_row['total_revenue'] or 0)),
-            'avg_invoice_amount': Decimal(str(stats_row['avg_invoice_amount'] or 0)),
+            'total_revenue': stats_row['total_revenue'] or Decimal('0.00'),
+            'avg_invoice_amount': stats_row['avg_invoice_amount'] or Decimal('0.00'),
             'top_product': top_product_row['product_name'] if top_product_row else 'Ürün Yok',
             'top_product_quantity': top_product_row['total_quantity'] if top_product_row else 0
         }
         
         return stats
     
+    @cached_report
     def get_daily_sales(self, start_date: datetime, end_date: datetime) -> List[Dict[str, Any]]:
         """Günlük satış verileri"""
+        if self.engine is not None:
+            return self.engine.daily_sales(start_date, end_date)
         conn = self.db.get_connection()
         cursor = conn.cursor()
         
+        # Tetikleyicilerle güncel tutulan günlük özet tablosu (gün başına bir satır)
         cursor.execute("""
             SELECT 
-                DATE(invoice_date) as sale_date,
-                COUNT(*) as invoice_count,
-                SUM(total_amount) as daily_revenue
-            FROM invoices 
-            WHERE invoice_date BETWEEN ? AND ?
-            GROUP BY DATE(invoice_date)
-            ORDER BY sale_date
-        """, (start_date, end_date))
+                day as invoice_day,
+                invoice_count,
+                total_amount as "daily_revenue [MONEY]"
+            FROM daily_sales 
+            WHERE day BETWEEN ? AND ?
+            ORDER BY day
+        """, (day_number(start_date), day_number(end_date)))
         
         daily_data = []
         for row in cursor.fetchall():
             day_data = {
-                'date': datetime.fromisoformat(row['sale_date']).date(),
+                'date': day_from_number(row['invoice_day']),
                 'invoice_count': row['invoice_count'],
-                'revenue': Decimal(str(row['daily_revenue']))
+                'revenue': row['daily_revenue']
             }
             daily_data.append(day_data)
         
         conn.close()
         return daily_data
     
+    @cached_report
     def get_monthly_sales(self, year: int) -> List[Dict[str, Any]]:
         """Aylık satış verileri"""
+        if self.engine is not None:
+            return self.engine.monthly_sales(year)
         conn = self.db.get_connection()
         cursor = conn.cursor()
         
+        # Yıl filtresi gün numarası aralığı (YYYY0101-YYYY1231); yılda en fazla 366 özet satırı
         cursor.execute("""
             SELECT 
-                strftime('%m', invoice_date) as month,
-                COUNT(*) as invoice_count,
-                SUM(total_amount) as monthly_revenue
-            FROM invoices 
-            WHERE strftime('%Y', invoice_date) = ?
-            GROUP BY strftime('%m', invoice_date)
-            ORDER BY month
-        """, (str(year),))
+                day / 100 % 100 as month,
+                SUM(invoice_count) as invoice_count,
+                SUM(total_amount) as "monthly_revenue [MONEY]"
+            FROM daily_sales 
+            WHERE day BETWEEN ? AND ?
+            GROUP BY day / 100
+            ORDER BY day / 100
+        """, (year * 10000 + 101, year * 10000 + 1231))
         
         monthly_data = []
         for row in cursor.fetchall():
             month_data = {
-                'month': int(row['month']),
+                'month': row['month'],
                 'invoice_count': row['invoice_count'],
-                'revenue': Decimal(str(row['monthly_revenue']))
+                'revenue': row['monthly_revenue']
             }
             monthly_data.append(month_data)
         
         conn.close()
         return monthly_data
     
+    @cached_report
     def get_product_sales_trend(self, product_code: str, start_date: datetime, end_date: datetime) -> List[Dict[str, Any]]:
         """Ürün satış trendi"""
+        if self.engine is not None:
+            return self.engine.product_sales_trend(product_code, start_date, end_date)
         conn = self.db.get_connection()
         cursor = conn.cursor()
         
+        # Birincil anahtar (product_code, day) üzerinde aralık taraması
         cursor.execute("""
             SELECT 
-                DATE(i.invoice_date) as sale_date,
-                SUM(ii.quantity) as daily_quantity,
-                SUM(ii.total_price) as daily_revenue
-            FROM invoice_items ii
-            JOIN invoices i ON ii.invoice_id = i.id
-            WHERE ii.product_code = ? 
-            AND i.invoice_date BETWEEN ? AND ?
-            GROUP BY DATE(i.invoice_date)
-            ORDER BY sale_date
-        """, (product_code, start_date, end_date))
+                day as invoice_day,
+                quantity as daily_quantity,
+                revenue as "daily_revenue [MONEY]"
+            FROM product_daily_sales
+            WHERE product_code = ? 
+            AND day BETWEEN ? AND ?
+            ORDER BY day
+        """, (product_code, day_number(start_date), day_number(end_date)))
         
         trend_data = []
         for row in cursor.fetchall():
             trend_item = {
-                'date': datetime.fromisoformat(row['sale_date']).date(),
+                'date': day_from_number(row['invoice_day']),
                 'quantity': row['daily_quantity'],
-                'revenue': Decimal(str(row['daily_revenue']))
+                'revenue': row['daily_revenue']
             }
             trend_data.append(trend_item)
         
+        conn.close()
+        return trend_data
+    
+    def cache_stats(self) -> Dict[str, Any]:
+        """Rapor önbelleği isabet/ıskalama istatistikleri"""
+        return self.cache.stats() if self.cache is not None else {}
+    
     def get_daily_sales_data(self, start_date: datetime, end_date: datetime) -> str:
         """Günlük satış grafik verileri"""
         daily_data = self.get_daily_sales(start_date, end_date)
@@ -0,0 +1,148 @@
+"""
+SQLite performans profillerinin ölçümü (database.PERFORMANCE_PROFILES).
+
+Her profil için geçici bir veritabanı dosyası açılır ve şu iş yükleri ölçülür:
+  - fis_kaydi    : fiş başına ayrı işlem (1 fiş + 5 kalem, her biri commit)
+  - toplu_urun   : tek işlemde executemany ile ürün ekleme
+  - rapor        : tarih aralığı üzerinde GROUP BY sorgusu
+  - okur_yazar   : uzun bir okuma işlemi açıkken başka bağlantıdan fiş kaydı
+
+Kullanım:
+    python tools/bench_db_profiles.py [--invoices 2000] [--products 50000]
+
+Örnek ölçüm (Linux, Python 3.11, SQLite 3.40.1, varsayılan parametreler):
+
+    profil        fis_kaydi/sn  toplu_urun/sn   rapor/sn  okur_yazar
+    varsayilan            1270         223241        471  KİLİTLİ
+    interactive          16809         229862        358  OK
+    bulk-import          17174         226778        279  OK
+    reporting            15147         200185        338  OK
+
+"varsayilan" profil uygulanmamış bağlantıdır (rollback journal, synchronous=FULL);
+bu modda uzun bir rapor okuması sürerken fiş kaydı 'database is locked' hatası alır.
+"""
+import os
+import sys
+import sqlite3
+import tempfile
+import threading
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import DatabaseConnection, PERFORMANCE_PROFILES, apply_profile
+
+SCHEMA = """
+    CREATE TABLE products (id INTEGER PRIMARY KEY, code TEXT UNIQUE NOT NULL, name TEXT NOT NULL);
+    CREATE TABLE invoices (id INTEGER PRIMARY KEY, invoice_number TEXT UNIQUE NOT NULL,
+                           customer_name TEXT NOT NULL, total_amount INTEGER, invoice_date TIMESTAMP);
+    CREATE TABLE invoice_items (id INTEGER PRIMARY KEY, invoice_id INTEGER NOT NULL,
+                                product_code TEXT NOT NULL, quantity INTEGER, total_price INTEGER);
+    CREATE INDEX idx_invoices_date ON invoices(invoice_date);
+"""
+
+
+def open_connection(path, profile):
+    conn = DatabaseConnection(path).create_connection()
+    if profile is not None:
+        apply_profile(conn, profile)
+    return conn
+
+
+def bench_invoices(conn, count):
+    started = time.perf_counter()
+    for i in range(count):
+        cursor = conn.cursor()
+        cursor.execute(
+            "INSERT INTO invoices (invoice_number, customer_name, total_amount, invoice_date) VALUES (?, ?, ?, ?)",
+            (f"BENCH-{i:06d}", f"Müşteri {i % 50}", 10000 + i, f"2024-{i % 12 + 1:02d}-{i % 28 + 1:02d} 10:00:00")
+        )
+        invoice_id = cursor.lastrowid
+        cursor.executemany(
+            "INSERT INTO invoice_items (invoice_id, product_code, quantity, total_price) VALUES (?, ?, ?, ?)",
+            [(invoice_id, f"PRD{j:03d}", j + 1, 1000 * (j + 1)) for j in range(5)]
+        )
+        conn.commit()
+    return count / (time.perf_counter() - started)
+
+
+def bench_products(conn, count):
+    started = time.perf_counter()
+    conn.executemany("INSERT INTO products (code, name) VALUES (?, ?)",
+                     ((f"P{i:07d}", f"Ürün {i}") for i in range(count)))
+    conn.commit()
+    return count / (time.perf_counter() - started)
+
+
+def bench_reports(conn, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        conn.execute("""
+            SELECT DATE(invoice_date), COUNT(*), SUM(total_amount) FROM invoices
+            WHERE invoice_date BETWEEN '2024-01-01' AND '2024-12-31 23:59:59'
+            GROUP BY DATE(invoice_date)
+        """).fetchall()
+    return repeat / (time.perf_counter() - started)
+
+
+def bench_reader_writer(path, profile):
+    """Okuma işlemi açıkken başka bağlantı yazabiliyor mu?"""
+    reader = open_connection(path, profile)
+    writer = open_connection(path, profile)
+    writer.execute("PRAGMA busy_timeout = 500")
+    reader.execute("BEGIN")
+    reader.execute("SELECT COUNT(*) FROM invoice_items").fetchone()
+    result = {}
+
+    def write():
+        try:
+            writer.execute("INSERT INTO invoices (invoice_number, customer_name) VALUES ('RW-1', 'X')")
+            writer.commit()
+            result['status'] = "OK"
+        except sqlite3.OperationalError:
+            result['status'] = "KİLİTLİ"
+
+    thread = threading.Thread(target=write)
+    thread.start()
+    thread.join()
+    reader.rollback()
+    reader.close()
+    writer.close()
+    return result['status']
+
+
+def run(profile, invoices, products):
+    tmp_dir = tempfile.mkdtemp(prefix="forklift_bench_")
+    path = os.path.join(tmp_dir, "bench.db")
+    conn = open_connection(path, profile)
+    conn.executescript(SCHEMA)
+    try:
+        return {
+            'fis_kaydi': bench_invoices(conn, invoices),
+            'toplu_urun': bench_products(conn, products),
+            'rapor': bench_reports(conn, 50),
+            'okur_yazar': bench_reader_writer(path, profile),
+        }
+    finally:
+        conn.close()
+        for name in os.listdir(tmp_dir):
+            os.remove(os.path.join(tmp_dir, name))
+        os.rmdir(tmp_dir)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SQLite performans profili ölçümü")
+    parser.add_argument("--invoices", type=int, default=2000)
+    parser.add_argument("--products", type=int, default=50000)
+    args = parser.parse_args()
+
+    print(f"{'profil':<12}{'fis_kaydi/sn':>14}{'toplu_urun/sn':>15}{'rapor/sn':>11}  okur_yazar")
+    for profile in [None] + list(PERFORMANCE_PROFILES):
+        result = run(profile, args.invoices, args.products)
+        print(f"{profile or 'varsayilan':<12}{result['fis_kaydi']:>14.0f}{result['toplu_urun']:>15.0f}"
+              f"{result['rapor']:>11.0f}  {result['okur_yazar']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Dışa aktarma biçimlerinin ölçümü: DataImporter.export_invoices aynı veriyi
+her kayıtlı biçimde (xlsx, csv, csv.gz, pyarrow kuruluysa parquet) yazar;
+yazma süresi, satır/sn, dosya boyutu ve pandas ile geri okuma süresi raporlanır.
+
+Geçici bir veritabanı dosyasına --invoices fiş (her birinde 5 kalem) eklenir.
+
+Kullanım:
+    python tools/bench_export.py [--invoices 20000]
+
+Örnek ölçüm (Linux, Python 3.11, SQLite 3.40.1, openpyxl 3.1, pyarrow 26,
+--invoices 20000 -> 100000 satır):
+
+    bicim       yazma_sn     satir/sn     boyut_mb   okuma_sn
+    xlsx           17.11         5844         4.50      18.07
+    csv             2.40        41581        12.63       0.29
+    csv.gz          2.33        43009         0.55       0.21
+    parquet         1.84        54352         0.44       0.21
+
+Yazma süresinin çoğu her biçimde imleç ve Decimal/datetime dönüşümüdür; xlsx'te
+buna hücre başına XML üretimi ve zip sıkıştırması eklenir.
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+import argparse
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import db_manager, day_number
+from modules.data_importer import DataImporter
+from utils.streaming_export import available_export_formats
+
+# Biçim -> pandas okuyucu (geri okuma ölçümü)
+READERS = {
+    "xlsx": lambda path: pd.read_excel(path, engine="openpyxl"),
+    "csv": pd.read_csv,
+    "csv.gz": pd.read_csv,
+    "parquet": pd.read_parquet,
+}
+
+
+def seed(invoice_count: int):
+    """Örnek fiş ve kalemler (tek işlemde)"""
+    conn = db_manager.get_connection(profile="bulk-import")
+    start = datetime(2024, 1, 1, 9, 0, 0)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        for i in range(invoice_count):
+            when = start + timedelta(minutes=20 * i)
+            cursor = conn.execute(
+                "INSERT INTO invoices (invoice_number, customer_name, customer_address, subtotal, tax_amount, "
+                "total_amount, invoice_date, invoice_day) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (f"BENCH-{i:07d}", f"Müşteri {i % 300}", "Örnek Mah. Deneme Sok. No: 1", 15000, 2700, 17700,
+                 when.strftime("%Y-%m-%d %H:%M:%S"), day_number(when))
+            )
+            conn.executemany(
+                "INSERT INTO invoice_items (invoice_id, product_code, product_name, quantity, unit_price, total_price) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [(cursor.lastrowid, f"PRD{(i + j) % 500:03d}", f"Ürün {(i + j) % 500}", 2, 1500, 3000)
+                 for j in range(5)]
+            )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dışa aktarma biçimi ölçümü")
+    parser.add_argument("--invoices", type=int, default=20000)
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp(prefix="forklift_export_")
+    lines = []
+    try:
+        db_manager.init(os.path.join(tmp_dir, "bench.db"))
+        seed(args.invoices)
+        importer = DataImporter()
+        for export_format in available_export_formats():
+            path = os.path.join(tmp_dir, f"fisler{export_format.extension}")
+            started = time.perf_counter()
+            rows = importer.export_invoices(path, file_format=export_format.name)['rows']
+            write_time = time.perf_counter() - started
+
+            started = time.perf_counter()
+            read_rows = len(READERS[export_format.name](path))
+            read_time = time.perf_counter() - started
+            check = "" if read_rows == rows else f"  SATIR SAYISI FARKLI: {rows} / {read_rows}"
+            lines.append(f"{export_format.name:<10}{write_time:>10.2f}{rows / write_time:>13.0f}"
+                         f"{os.path.getsize(path) / 2 ** 20:>13.2f}{read_time:>11.2f}{check}")
+    finally:
+        db_manager.init(":memory:")  # Geçici dosyadaki bağlantıları kapat
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    print(f"\n{'bicim':<10}{'yazma_sn':>10}{'satir/sn':>13}{'boyut_mb':>13}{'okuma_sn':>11}")
+    for line in lines:
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+Ürün/müşteri içe aktarma ölçümü: eski satır satır döngü ile DataImporter'ın
+toplu (executemany + ON CONFLICT DO UPDATE) yolu karşılaştırılır.
+
+Her senaryo için geçici bir veritabanı dosyası ve CSV üretilir:
+  - ilk      : boş tabloya içe aktarma (hepsi yeni)
+  - tekrar   : aynı dosya ikinci kez (hepsi mevcut, değişiklik yok)
+  - degisen  : satırların yarısında ad/adres değişmiş dosya
+
+Kullanım:
+    python tools/bench_import.py [--rows 50000]
+
+Örnek ölçüm (Linux, Python 3.11, SQLite 3.40.1, pandas 3.0, --rows 50000):
+
+    tablo      senaryo     dongu_sn   toplu_sn    hizlanma
+    products   ilk            9.12       3.69        2.5x
+    products   tekrar        13.20       0.50       26.4x
+    products   degisen       14.96       4.03        3.7x
+    customers  ilk            4.73       2.00        2.4x
+    customers  tekrar         2.53       0.58        4.4x
+    customers  degisen        2.62       0.67        3.9x
+
+Toplu yolda kalan süre çoğunlukla eklenen/değişen satır başına çalışan anahtar
+tetikleyicileridir (TR_SEARCH_KEY/TR_SORT_KEY, products_fts); değişmeyen
+satırlar tetikleyici çalıştırmaz.
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+import argparse
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import db_manager
+from modules.data_importer import DataImporter
+
+
+def legacy_import_products(conn, df):
+    """Önceki sürümdeki satır satır döngü (karşılaştırma için)"""
+    cursor = conn.cursor()
+    imported = updated = 0
+    for index, row in df.iterrows():
+        code = str(row.get('code', '')).strip()
+        name = str(row.get('name', '')).strip()
+        if not code or not name:
+            continue
+        cursor.execute("SELECT id FROM products WHERE code = ?", (code,))
+        if cursor.fetchone():
+            cursor.execute("UPDATE products SET name = ?, updated_at = CURRENT_TIMESTAMP WHERE code = ?", (name, code))
+            updated += 1
+        else:
+            cursor.execute("INSERT INTO products (code, name) VALUES (?, ?)", (code, name))
+            imported += 1
+    conn.commit()
+    return {'imported': imported, 'updated': updated, 'total': imported + updated}
+
+
+def legacy_import_customers(conn, df):
+    """Önceki sürümdeki satır satır döngü (karşılaştırma için)"""
+    cursor = conn.cursor()
+    imported = updated = 0
+    for index, row in df.iterrows():
+        name = str(row['name']).strip()
+        if not name:
+            continue
+        address = str(row.get('address', '')).strip()
+        tax_number = str(row.get('tax_number', '')).strip()
+        cursor.execute("SELECT id FROM customers WHERE name = ?", (name,))
+        existing = cursor.fetchone()
+        if existing:
+            cursor.execute("UPDATE customers SET address = ?, tax_number = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
+                           (address, tax_number, existing['id']))
+            updated += 1
+        else:
+            cursor.execute("INSERT INTO customers (name, address, tax_number) VALUES (?, ?, ?)", (name, address, tax_number))
+            imported += 1
+    conn.commit()
+    return {'imported': imported, 'updated': updated, 'total': imported + updated}
+
+
+def tax_number(i):
+    """10 haneli vergi numarası"""
+    return f"{i:010d}"
+
+
+def make_files(tmp_dir, rows):
+    """Senaryo CSV dosyalarını üret; {(tablo, senaryo): yol}"""
+    products = pd.DataFrame({'code': [f"P{i:07d}" for i in range(rows)],
+                             'name': [f"Ürün {i}" for i in range(rows)]})
+    changed_products = products.copy()
+    changed_products.loc[::2, 'name'] = changed_products.loc[::2, 'name'] + " (yeni)"
+    customers = pd.DataFrame({'name': [f"Müşteri {i}" for i in range(rows)],
+                              'address': [f"Adres {i % 500}" for i in range(rows)],
+                              'tax_number': [tax_number(i) for i in range(rows)]})
+    changed_customers = customers.copy()
+    changed_customers.loc[::2, 'address'] = changed_customers.loc[::2, 'address'] + " / 2"
+
+    paths = {}
+    for (table, scenario), df in {
+        ('products', 'ilk'): products, ('products', 'degisen'): changed_products,
+        ('customers', 'ilk'): customers, ('customers', 'degisen'): changed_customers,
+    }.items():
+        path = os.path.join(tmp_dir, f"{table}_{scenario}.csv")
+        df.to_csv(path, index=False, encoding='utf-8')
+        paths[(table, scenario)] = path
+    return paths
+
+
+def run_path(tmp_dir, label, table, files, bulk):
+    """Boş veritabanında ilk/tekrar/degisen senaryolarını sırayla çalıştır; {senaryo: (süre, sonuç)}"""
+    db_manager.init(os.path.join(tmp_dir, f"{label}_{table}.db"))
+    importer = DataImporter()
+    results = {}
+    for scenario, path in (('ilk', files[(table, 'ilk')]), ('tekrar', files[(table, 'ilk')]),
+                           ('degisen', files[(table, 'degisen')])):
+        started = time.perf_counter()
+        if bulk:
+            result = getattr(importer, f"import_{table}")(path)
+        else:
+            df = pd.read_csv(path, encoding='utf-8', na_filter=False)
+            conn = db_manager.get_connection(profile="bulk-import")
+            try:
+                result = (legacy_import_products if table == 'products' else legacy_import_customers)(conn, df)
+            finally:
+                conn.close()
+        results[scenario] = (time.perf_counter() - started, result)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="İçe aktarma ölçümü (döngü ve toplu yol)")
+    parser.add_argument("--rows", type=int, default=50000)
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp(prefix="forklift_import_")
+    lines = []
+    try:
+        files = make_files(tmp_dir, args.rows)
+        for table in ('products', 'customers'):
+            legacy = run_path(tmp_dir, "dongu", table, files, bulk=False)
+            bulk = run_path(tmp_dir, "toplu", table, files, bulk=True)
+            for scenario in ('ilk', 'tekrar', 'degisen'):
+                (legacy_time, legacy_result), (bulk_time, bulk_result) = legacy[scenario], bulk[scenario]
+                # Eski döngü eşleşen her satırı 'güncel' sayardı (değişmeyenler dahil)
+                bulk_result = {'imported': bulk_result['imported'],
+                               'updated': bulk_result['updated'] + bulk_result['unchanged'],
+                               'total': bulk_result['imported'] + bulk_result['updated'] + bulk_result['unchanged']}
+                same = "" if legacy_result == bulk_result else f"  SAYILAR FARKLI: {legacy_result} / {bulk_result}"
+                lines.append(f"{table:<11}{scenario:<9}{legacy_time:>9.2f}{bulk_time:>11.2f}"
+                             f"{legacy_time / bulk_time:>11.1f}x{same}")
+    finally:
+        db_manager.init(":memory:")  # Geçici dosyalardaki bağlantıları kapat
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    print(f"\n{'tablo':<11}{'senaryo':<9}{'dongu_sn':>9}{'toplu_sn':>11}{'hizlanma':>12}")
+    for line in lines:
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""
+Tarih filtreli sorguların indeks kullandığını EXPLAIN QUERY PLAN ile doğrular.
+
+Bellek içi bir veritabanı oluşturulur, göçler uygulanır ve örnek veri eklenir.
+Ardından asıl uygulama metotları (ReportGenerator, InvoiceManager, ExcelHandler)
+çalıştırılırken gönderdikleri SQL yakalanır (set_trace_callback). Her sorgunun
+planında invoices (veya özet tabloları) indeksle/birincil anahtarla
+aranmalıdır (SEARCH ... USING ...); tam tablo taraması (SCAN) hata sayılır.
+
+Kullanım:
+    python tools/check_query_plans.py [-v]
+
+Çıkış kodu: tüm sorgular indeks kullanıyorsa 0, aksi halde 1.
+"""
+import os
+import sys
+import argparse
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import DatabaseManager, day_number, turkish_search_key
+from database.models import InvoiceQuery
+from modules.report_generator import ReportGenerator
+from modules.invoice_manager import InvoiceManager
+
+try:
+    from utils.excel_handler import ExcelHandler
+    from utils.streaming_export import StreamingExcelWriter
+except ImportError:  # pandas/openpyxl yoksa Excel sorguları atlanır
+    ExcelHandler = None
+
+
+def seed(manager: DatabaseManager, invoice_count: int = 2000):
+    """Planlayıcının gerçekçi karar vermesi için örnek fiş/kalem ekle"""
+    conn = manager.get_connection()
+    start = datetime(2023, 1, 1, 9, 0, 0)
+    try:
+        for i in range(invoice_count):
+            when = start + timedelta(hours=7 * i)
+            cursor = conn.execute(
+                "INSERT INTO invoices (invoice_number, customer_name, customer_key, total_amount, invoice_date, invoice_day) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (f"PLAN-{i:05d}", f"Müşteri {i % 40}", turkish_search_key(f"Müşteri {i % 40}"), 10000 + i,
+                 when.strftime("%Y-%m-%d %H:%M:%S"), day_number(when))
+            )
+            conn.executemany(
+                "INSERT INTO invoice_items (invoice_id, product_code, product_name, quantity, unit_price, total_price) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [(cursor.lastrowid, f"PRD{(i + j) % 100:03d}", "Ürün", 1, 1000, 1000) for j in range(3)]
+            )
+        conn.execute("ANALYZE")
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def capture(manager: DatabaseManager, calls):
+    """Verilen çağrıları çalıştırır, her biri için gönderilen SELECT'leri döndürür"""
+    conn = manager.get_connection()
+    statements = []
+    conn.set_trace_callback(statements.append)
+    conn.close()  # Havuzda tek bağlantı var; metotlar aynı bağlantıyı alır
+
+    captured = []
+    for name, call in calls:
+        statements.clear()
+        call()
+        selects = [sql for sql in statements if sql.lstrip().upper().startswith("SELECT")]
+        captured.append((name, selects))
+
+    conn = manager.get_connection()
+    conn.set_trace_callback(None)
+    conn.close()
+    return captured
+
+
+# Planı denetlenen tablolar (takma adlarıyla)
+CHECKED_TABLES = {"invoices", "i", "daily_sales", "product_daily_sales", "customer_monthly_stats", "s"}
+
+
+def invoice_plan_lines(conn, sql):
+    """Sorgu planında denetlenen tablolara ait satırlar"""
+    rows = conn.execute(f"EXPLAIN QUERY PLAN {sql}").fetchall()
+    details = [row[3] for row in rows]
+    invoice_lines = [d for d in details if d.split(" ")[1:2] and d.split(" ")[1] in CHECKED_TABLES]
+    return details, invoice_lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tarih sorgularının plan kontrolü")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Tüm planları yazdır")
+    args = parser.parse_args()
+
+    manager = DatabaseManager(":memory:", pool_size=1)
+    seed(manager)
+
+    reports = ReportGenerator(cache_size=0, use_engine=False)  # Her çağrı SQL göndermeli
+    reports.db = manager
+
+    invoices = InvoiceManager()
+    invoices.db = manager
+
+    start, end = datetime(2023, 3, 1), datetime(2023, 3, 31, 23, 59, 59)
+    history = InvoiceQuery(start_date=start, end_date=end)
+    calls = [
+        ("ReportGenerator.get_daily_sales", lambda: reports.get_daily_sales(start, end)),
+        ("ReportGenerator.get_monthly_sales", lambda: reports.get_monthly_sales(2023)),
+        ("ReportGenerator.get_product_analysis", lambda: reports.get_product_analysis(start, end)),
+        ("ReportGenerator.get_customer_analysis",
+         lambda: reports.get_customer_analysis(datetime(2023, 2, 10), datetime(2023, 4, 20))),
+        ("ReportGenerator.get_product_sales_trend", lambda: reports.get_product_sales_trend("PRD007", start, end)),
+        ("ReportGenerator.get_sales_report", lambda: reports.get_sales_report(start, end)),
+        ("ReportGenerator.get_summary_stats", lambda: reports.get_summary_stats(start, end)),
+        ("InvoiceManager.query_invoices", lambda: invoices.query_invoices(history, limit=20)),
+        ("InvoiceManager.query_invoices (sonraki sayfa)",
+         lambda: invoices.query_invoices(history, after=invoices.query_invoices(history, limit=20)[1], limit=20)),
+        ("InvoiceManager.query_invoices (müşteri öneki)",
+         lambda: invoices.query_invoices(InvoiceQuery(start_date=start, end_date=end, customer_prefix="müşteri 1"))),
+        ("InvoiceManager.query_invoices (müşteri id)",
+         lambda: invoices.query_invoices(InvoiceQuery(start_date=start, end_date=end, customer_id=3))),
+        ("InvoiceManager.query_invoices (ürün kodu)",
+         lambda: invoices.query_invoices(InvoiceQuery(start_date=start, end_date=end, product_code="PRD007"))),
+        ("InvoiceManager.query_invoices (tutar, tutara göre)",
+         lambda: invoices.query_invoices(InvoiceQuery(min_total=100, max_total=105, sort_by="total_amount"))),
+        ("InvoiceManager.get_invoice_totals", lambda: invoices.get_invoice_totals(history)),
+    ]
+    if ExcelHandler is not None:
+        excel = ExcelHandler()
+        excel.db = manager
+        # Yalnızca SQL yakalanıyor; sayfalar kaydedilmeyen write_only kitaba yazılır
+        writer = StreamingExcelWriter(os.devnull)
+        calls += [
+            ("ExcelHandler._export_product_analysis", lambda: excel._export_product_analysis(writer, start, end)),
+            ("ExcelHandler._export_customer_analysis", lambda: excel._export_customer_analysis(writer, start, end)),
+            ("ExcelHandler._export_daily_summary", lambda: excel._export_daily_summary(writer, start, end)),
+            ("ExcelHandler._export_monthly_summary", lambda: excel._export_monthly_summary(writer, 2023)),
+        ]
+    else:
+        print("UYARI: pandas bulunamadı, ExcelHandler sorguları atlandı.")
+
+    try:
+        captured = capture(manager, calls)
+    finally:
+        if ExcelHandler is not None:
+            writer.discard()
+
+    failures = 0
+    conn = manager.get_connection()
+    try:
+        for name, selects in captured:
+            if not selects:
+                print(f"[HATA] {name}: SQL yakalanamadı")
+                failures += 1
+                continue
+            for sql in selects:
+                details, invoice_lines = invoice_plan_lines(conn, sql)
+                ok = bool(invoice_lines) and all(
+                    line.startswith("SEARCH") and "USING" in line for line in invoice_lines
+                )
+                print(f"[{'OK' if ok else 'HATA'}] {name}")
+                if args.verbose or not ok:
+                    for line in details:
+                        print(f"        {line}")
+                failures += 0 if ok else 1
+    finally:
+        conn.close()
+        manager.close()
+
+    print(f"\n{failures} sorun bulundu." if failures else "\nTüm sorgular indeks kullanıyor.")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
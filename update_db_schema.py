@@ -1,37 +1,65 @@
+"""
+Veritabanı şemasını güncelleme betiği.
+Artık tek başına sütun eklemiyor; database.migrations içindeki sürümlü göçleri
+(PRAGMA user_version) bekleyen sırayla uygular. Uygulama da açılışta aynı
+göçleri çalıştırır; bu betik güncellemeyi uygulamayı açmadan yapmak içindir.
+
+    python update_db_schema.py [--rebuild-rollups] [--rebuild-search-keys]
+
+--rebuild-rollups: rapor özet tablolarını (daily_sales, product_daily_sales,
+                   customer_stats) fişlerden yeniden üretir.
+--rebuild-search-keys: Türkçe arama/sıralama anahtarlarını (name_key, sort_key,
+                   customer_key ...) tüm satırlar için yeniden hesaplar.
+"""
 import sys
 import os
-import sqlite3 # Doğrudan sqlite3 kullanmak daha basit olabilir
+import sqlite3
+
+# Proje kök dizinini path'e ekle
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-# Proje kök dizinini path'e ekle (db_manager için gerekli olabilir ama sqlite3 direkt kullanacağız)
-# sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
-# from database import db_manager # Şimdilik db_manager'a gerek yok
+from database import DatabaseConnection, fill_search_keys
+from database.migrations import migrate, get_schema_version, LATEST_VERSION
+from database.rollups import rebuild_daily_sales, rebuild_product_daily_sales, rebuild_customer_stats
 
 DB_FILE = "forklift_system.db" # Veritabanı dosyanın adı bu mu kontrol et
 
-def add_discount_column():
+
+def update_schema(db_file: str = DB_FILE, rebuild_rollups: bool = False, rebuild_search_keys: bool = False):
     conn = None # Bağlantıyı başta None yapalım
     try:
-        print(f"Veritabanı dosyası '{DB_FILE}' açılıyor...")
-        conn = sqlite3.connect(DB_FILE)
-        cursor = conn.cursor()
-
-        print("Mevcut 'invoices' tablosu sütunları kontrol ediliyor...")
-        cursor.execute("PRAGMA table_info(invoices);")
-        columns = [info[1] for info in cursor.fetchall()]
+        db = DatabaseConnection(db_file)
+        print(f"Veritabanı dosyası '{db.db_path}' açılıyor...")
+        conn = db.create_connection()
 
-        if 'discount_amount' in columns:
-            print("'discount_amount' sütunu zaten var. İşlem yapılmadı.")
+        current = get_schema_version(conn)
+        print(f"Mevcut şema sürümü: {current}, hedef sürüm: {LATEST_VERSION}")
+        if current >= LATEST_VERSION:
+            print("Şema zaten güncel.")
         else:
-            print("'discount_amount' sütunu ekleniyor...")
-            # Yeni sütunu ekle
-            cursor.execute("ALTER TABLE invoices ADD COLUMN discount_amount NUMERIC(10, 2) DEFAULT 0.0;")
+            applied = migrate(conn)
+            print(f"{applied} göç uygulandı. Yeni şema sürümü: {get_schema_version(conn)}")
+
+        if rebuild_rollups:
+            # Özet tabloları fişlerden sıfırdan üret (tutarsızlık şüphesinde)
+            conn.execute("BEGIN IMMEDIATE")
+            days = rebuild_daily_sales(conn)
+            product_days = rebuild_product_daily_sales(conn)
+            customers = rebuild_customer_stats(conn)
+            conn.commit()
+            print(f"Özet tablolar yeniden oluşturuldu: daily_sales ({days} gün), "
+                  f"product_daily_sales ({product_days} satır), customer_stats ({customers} müşteri)")
+
+        if rebuild_search_keys:
+            # Anahtar kuralı (turkish_search_key/turkish_sort_key) değiştiyse tümünü yeniden hesapla
+            conn.execute("BEGIN IMMEDIATE")
+            updated = fill_search_keys(conn, rebuild=True)
             conn.commit()
-            print("'discount_amount' sütunu başarıyla eklendi.")
+            print("Arama anahtarları yeniden hesaplandı: " +
+                  ", ".join(f"{table} ({count} satır)" for table, count in updated.items()))
 
     except sqlite3.Error as e:
-        print(f"Veritabanı hatası oluştu: {e}")
-        if conn:
-            conn.rollback() # Hata olursa yapılan değişikliği geri al (ALTER TABLE için pek işlemez ama alışkanlık)
+        print(f"Veritabanı hatası oluştu: {e}") # Hatalı göç geri alındı (migrate içinde)
     except Exception as e:
         print(f"Beklenmedik bir hata oluştu: {e}")
     finally:
@@ -42,5 +70,6 @@ def add_discount_column():
 if __name__ == "__main__":
     # Veritabanı dosyasının yedeğini almayı unutma!
     input("ÖNEMLİ: Devam etmeden önce 'forklift_system.db' dosyasının yedeğini aldınız mı? (Devam etmek için Enter'a basın)")
-    add_discount_column()
-    input("İşlem tamamlandı. Kapatmak için Enter'a basın.")
\ No newline at end of file
+    update_schema(rebuild_rollups="--rebuild-rollups" in sys.argv,
+                  rebuild_search_keys="--rebuild-search-keys" in sys.argv)
+    input("İşlem tamamlandı. Kapatmak için Enter'a basın.")
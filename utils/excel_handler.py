@@ -2,225 +2,296 @@
 Excel işleme modülü
 """
 import pandas as pd
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from datetime import datetime
+from decimal import Decimal, ROUND_HALF_UP
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 from database.models import Invoice
-from database import db_manager
+from database import db_manager, day_number, day_from_number
+from database.rollups import customer_period_totals
+from modules.analytics_engine import AnalyticsEngine
+from utils.streaming_export import ExportCancelled, ExportProgress, iter_cursor, open_export_writer
+
+# Sayfa başlıkları (tek sayfalık ve genel rapor aynı sütunları yazar)
+SALES_HEADERS = ['Fiş No', 'Tarih', 'Müşteri', 'Adres', 'Teslim Eden', 'Teslim Alan',
+                 'Ara Toplam', 'KDV', 'Toplam']
+PRODUCT_HEADERS = ['Ürün Kodu', 'Ürün Adı', 'Satılan Miktar', 'Toplam Tutar', 'Ortalama Fiyat', 'Fiş Sayısı']
+CUSTOMER_HEADERS = ['Müşteri Adı', 'Adres', 'Fiş Sayısı', 'Toplam Tutar', 'Ortalama Tutar', 'İlk Alış', 'Son Alış']
 
 
 class ExcelHandler:
     """Excel işleme sınıfı"""
     
-    def __init__(self):
+    def __init__(self, use_engine: Optional[bool] = None):
         self.db = db_manager
+        # Olgu deposu açıksa (FORKLIFT_ANALYTICS=numpy) özet sayfaları memmap sütunlardan üretilir
+        self.engine = AnalyticsEngine.from_environment(self.db, use_engine)
+        self.last_export_timings: Dict[str, float] = {}  # Son export_report_to_excel aşama süreleri (ms)
     
     def export_report_to_excel(self, file_path: str, start_date: datetime, 
-                                 end_date: datetime, report_type: str):
-        """Raporu Excel dosyasına aktar"""
+                                 end_date: datetime, report_type: str,
+                                 progress: Optional[ExportProgress] = None,
+                                 file_format: Optional[str] = None) -> bool:
+        """Raporu dosyaya aktar (satırlar akışlı yazılır).
+
+        Biçim file_format ya da uzantıdan seçilir (xlsx, csv, csv.gz, parquet); tek tablolu
+        biçimlerde genel raporun ek sayfaları yan dosyalara yazılır (utils.streaming_export).
+        progress(yazılan, toplam) False döndürürse dışa aktarma durur, dosya yazılmaz ve
+        False döner. Aşama süreleri (ms) last_export_timings'e yazılır.
+        """
+        self.last_export_timings = {}
+        started = time.perf_counter()
         try:
-            with pd.ExcelWriter(file_path, engine='openpyxl') as writer:
+            with open_export_writer(file_path, file_format) as writer:
                 
                 if report_type == "Satış Raporu":
-                    self._export_sales_report(writer, start_date, end_date)
+                    self._export_sales_report(writer, start_date, end_date, progress)
                 elif report_type == "Ürün Analizi":
-                    self._export_product_analysis(writer, start_date, end_date)
+                    self._export_product_analysis(writer, start_date, end_date, progress)
                 elif report_type == "Müşteri Analizi":
-                    self._export_customer_analysis(writer, start_date, end_date)
+                    self._export_customer_analysis(writer, start_date, end_date, progress)
                 elif report_type == "Günlük Özet":
-                    self._export_daily_summary(writer, start_date, end_date)
+                    self._export_daily_summary(writer, start_date, end_date, progress)
                 elif report_type == "Aylık Özet":
-                    self._export_monthly_summary(writer, start_date.year)
+                    self._export_monthly_summary(writer, start_date.year, progress)
                 else:
-                    # Genel rapor - tüm verileri ekle
-                    self._export_sales_report(writer, start_date, end_date)
-                    self._export_product_analysis(writer, start_date, end_date)
-                    self._export_customer_analysis(writer, start_date, end_date)
+                    # Genel rapor - tüm sayfalar tek anlık görüntüden, sorgular paralel
+                    self._export_general_report(writer, start_date, end_date, progress)
+                save_started = time.perf_counter()
                 
+        except ExportCancelled:
+            print(f"DEBUG: Excel raporu iptal edildi: {file_path}")
+            return False
         except Exception as e:
             raise Exception(f"Excel dosyası oluşturulamadı: {str(e)}")
+        self.last_export_timings['save_ms'] = self._elapsed_ms(save_started)
+        self.last_export_timings['total_ms'] = self._elapsed_ms(started)
+        print(f"DEBUG: Excel raporu süreleri (ms): {self.last_export_timings}")
+        return True
     
-    def _export_sales_report(self, writer, start_date: datetime, end_date: datetime):
-        """Satış raporunu Excel'e aktar"""
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            SELECT 
-                invoice_number,
-                invoice_date,
-                customer_name,
-                customer_address,
-                delivery_person,
-                receiver_person,
-                subtotal,
-                tax_amount,
-                total_amount
-            FROM invoices 
-            WHERE invoice_date BETWEEN ? AND ?
-            ORDER BY invoice_date DESC
-        """, (start_date, end_date))
-        
-        sales_data = []
-        for row in cursor.fetchall():
-            sales_data.append({
-                'Fiş No': row['invoice_number'],
-                'Tarih': row['invoice_date'],
-                'Müşteri': row['customer_name'],
-                'Adres': row['customer_address'],
-                'Teslim Eden': row['delivery_person'],
-                'Teslim Alan': row['receiver_person'],
-                'Ara Toplam': row['subtotal'],
-                'KDV': row['tax_amount'],
-                'Toplam': row['total_amount']
-            })
-        
-        conn.close()
+    def _export_general_report(self, writer, start_date: datetime, end_date: datetime,
+                               progress: Optional[ExportProgress] = None):
+        """Satış, ürün ve müşteri sayfalarını aynı anlık görüntüden yaz.
+
+        Üç sorgu ayrı salt okunur bağlantılarda aynı WAL okuma işlemiyle çalışır
+        (arada kaydedilen fiş hiçbir sayfada görünmez). Ürün/müşteri özetleri
+        arka planda hesaplanırken satış sayfası akıtılır; kitap tek thread'den yazılır.
+        """
+        timings = self.last_export_timings
+        started = time.perf_counter()
+        with self.db.read_snapshot(3, profile="reporting") as conns:
+            timings['snapshot_ms'] = self._elapsed_ms(started)
+            if len(conns) == 3:
+                with ThreadPoolExecutor(max_workers=2, thread_name_prefix="excel-export") as pool:
+                    products = pool.submit(self._timed, timings, 'product_query_ms',
+                                           self._product_analysis_rows, start_date, end_date, conns[1])
+                    customers = pool.submit(self._timed, timings, 'customer_query_ms',
+                                            self._customer_analysis_rows, start_date, end_date, conns[2])
+                    self._timed(timings, 'sales_ms', self._export_sales_report,
+                                writer, start_date, end_date, progress, conns[0])
+                    product_rows, customer_rows = products.result(), customers.result()
+            else:
+                # Bellek içi veritabanı: paralel okuma yok, aynı işlemde sırayla
+                conn = conns[0]
+                self._timed(timings, 'sales_ms', self._export_sales_report,
+                            writer, start_date, end_date, progress, conn)
+                product_rows = self._timed(timings, 'product_query_ms',
+                                           self._product_analysis_rows, start_date, end_date, conn)
+                customer_rows = self._timed(timings, 'customer_query_ms',
+                                            self._customer_analysis_rows, start_date, end_date, conn)
         
-        df = pd.DataFrame(sales_data)
-        df.to_excel(writer, sheet_name='Satış Raporu', index=False)
+        self._timed(timings, 'product_write_ms', writer.write_sheet,
+                    'Ürün Analizi', PRODUCT_HEADERS, product_rows, len(product_rows), progress)
+        self._timed(timings, 'customer_write_ms', writer.write_sheet,
+                    'Müşteri Analizi', CUSTOMER_HEADERS, customer_rows, len(customer_rows), progress)
     
-    def _export_product_analysis(self, writer, start_date: datetime, end_date: datetime):
+    def _export_sales_report(self, writer, start_date: datetime, end_date: datetime,
+                             progress: Optional[ExportProgress] = None, conn=None):
+        """Satış raporunu Excel'e aktar (imleçten parça parça; conn verilirse onun işleminde)"""
+        own_connection = conn is None
+        if own_connection:
+            conn = self.db.get_connection(profile="reporting")
+        try:
+            cursor = conn.cursor()
+            # Diğer sayfalar gibi tam günler (bitiş günü dahil; saat/gece yarısı sınırı yok)
+            day_range = (day_number(start_date), day_number(end_date))
+            total = 0
+            if progress is not None:
+                cursor.execute("SELECT COUNT(*) FROM invoices WHERE invoice_day BETWEEN ? AND ?", day_range)
+                total = cursor.fetchone()[0]
+            
+            cursor.execute("""
+                SELECT 
+                    invoice_number,
+                    invoice_date,
+                    customer_name,
+                    customer_address,
+                    delivery_person,
+                    receiver_person,
+                    subtotal,
+                    tax_amount,
+                    total_amount
+                FROM invoices 
+                WHERE invoice_day BETWEEN ? AND ?
+                ORDER BY invoice_date DESC
+            """, day_range)
+            
+            writer.write_sheet('Satış Raporu', SALES_HEADERS, iter_cursor(cursor), total=total, progress=progress)
+        finally:
+            if own_connection:
+                conn.close()
+    
+    def _export_product_analysis(self, writer, start_date: datetime, end_date: datetime,
+                                 progress: Optional[ExportProgress] = None):
         """Ürün analizini Excel'e aktar"""
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            SELECT 
-                ii.product_code,
-                ii.product_name,
-                SUM(ii.quantity) as total_quantity,
-                SUM(ii.total_price) as total_amount,
-                AVG(ii.unit_price) as avg_price,
-                COUNT(DISTINCT i.id) as invoice_count
-            FROM invoice_items ii
-            JOIN invoices i ON ii.invoice_id = i.id
-            WHERE i.invoice_date BETWEEN ? AND ?
-            GROUP BY ii.product_code, ii.product_name
-            ORDER BY total_amount DESC
-        """, (start_date, end_date))
-        
-        product_data = []
-        for row in cursor.fetchall():
-            product_data.append({
-                'Ürün Kodu': row['product_code'],
-                'Ürün Adı': row['product_name'],
-                'Satılan Miktar': row['total_quantity'],
-                'Toplam Tutar': row['total_amount'],
-                'Ortalama Fiyat': row['avg_price'],
-                'Fiş Sayısı': row['invoice_count']
-            })
-        
-        conn.close()
+        rows = self._product_analysis_rows(start_date, end_date)
+        writer.write_sheet('Ürün Analizi', PRODUCT_HEADERS, rows, total=len(rows), progress=progress)
+    
+    def _product_analysis_rows(self, start_date: datetime, end_date: datetime, conn=None) -> List[tuple]:
+        """Ürün analizi satırları (ürün başına bir satır; conn verilirse onun işleminde)"""
+        if self.engine is not None and conn is None:
+            return [(entry['code'], entry['name'], entry['quantity'], entry['total'],
+                     entry['avg_price'], entry['invoice_count'])
+                    for entry in self.engine.product_analysis(start_date, end_date, with_invoice_count=True)]
         
-        df = pd.DataFrame(product_data)
-        df.to_excel(writer, sheet_name='Ürün Analizi', index=False)
+        own_connection = conn is None
+        if own_connection:
+            conn = self.db.get_connection(profile="reporting")
+        try:
+            # Ürün-gün özet tablosundan; fiş sayıları gün başına ayrık olduğundan toplanabilir
+            cursor = conn.execute("""
+                SELECT 
+                    product_code,
+                    product_name,
+                    SUM(quantity) as total_quantity,
+                    SUM(revenue) as "total_amount [MONEY]",
+                    SUM(unit_price_sum) * 1.0 / SUM(line_count) as "avg_price [MONEY]",
+                    SUM(invoice_count) as invoice_count
+                FROM product_daily_sales
+                WHERE day BETWEEN ? AND ?
+                GROUP BY product_code
+                ORDER BY SUM(revenue) DESC
+            """, (day_number(start_date), day_number(end_date)))
+            return [tuple(row) for row in cursor.fetchall()]
+        finally:
+            if own_connection:
+                conn.close()
     
-    def _export_customer_analysis(self, writer, start_date: datetime, end_date: datetime):
+    def _export_customer_analysis(self, writer, start_date: datetime, end_date: datetime,
+                                  progress: Optional[ExportProgress] = None):
         """Müşteri analizini Excel'e aktar"""
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            SELECT 
-                customer_name,
-                customer_address,
-                COUNT(*) as invoice_count,
-                SUM(total_amount) as total_amount,
-                AVG(total_amount) as avg_amount,
-                MIN(invoice_date) as first_purchase,
-                MAX(invoice_date) as last_purchase
-            FROM invoices 
-            WHERE invoice_date BETWEEN ? AND ?
-            GROUP BY customer_name, customer_address
-            ORDER BY total_amount DESC
-        """, (start_date, end_date))
-        
-        customer_data = []
-        for row in cursor.fetchall():
-            customer_data.append({
-                'Müşteri Adı': row['customer_name'],
-                'Adres': row['customer_address'],
-                'Fiş Sayısı': row['invoice_count'],
-                'Toplam Tutar': row['total_amount'],
-                'Ortalama Tutar': row['avg_amount'],
-                'İlk Alış': row['first_purchase'],
-                'Son Alış': row['last_purchase']
-            })
-        
-        conn.close()
+        rows = self._customer_analysis_rows(start_date, end_date)
+        writer.write_sheet('Müşteri Analizi', CUSTOMER_HEADERS, rows, total=len(rows), progress=progress)
+    
+    def _customer_analysis_rows(self, start_date: datetime, end_date: datetime, conn=None) -> List[tuple]:
+        """Müşteri analizi satırları (conn verilirse onun işleminde)"""
+        own_connection = conn is None
+        if own_connection:
+            conn = self.db.get_connection(profile="reporting")
+        try:
+            # Tam aylar müşteri özet tablosundan, kenar günler fişlerden
+            totals = customer_period_totals(conn, day_number(start_date), day_number(end_date))
+        finally:
+            if own_connection:
+                conn.close()
         
-        df = pd.DataFrame(customer_data)
-        df.to_excel(writer, sheet_name='Müşteri Analizi', index=False)
+        return [(entry['name'], entry['address'], entry['invoice_count'], entry['total_amount'],
+                 entry['avg_amount'], entry['first_purchase'], entry['last_purchase'])
+                for entry in totals]
     
-    def _export_daily_summary(self, writer, start_date: datetime, end_date: datetime):
+    def _export_daily_summary(self, writer, start_date: datetime, end_date: datetime,
+                              progress: Optional[ExportProgress] = None):
         """Günlük özeti Excel'e aktar"""
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            SELECT 
-                DATE(invoice_date) as sale_date,
-                COUNT(*) as invoice_count,
-                SUM(total_amount) as daily_revenue,
-                AVG(total_amount) as avg_invoice_amount
-            FROM invoices 
-            WHERE invoice_date BETWEEN ? AND ?
-            GROUP BY DATE(invoice_date)
-            ORDER BY sale_date
-        """, (start_date, end_date))
-        
-        daily_data = []
-        for row in cursor.fetchall():
-            daily_data.append({
-                'Tarih': row['sale_date'],
-                'Fiş Sayısı': row['invoice_count'],
-                'Günlük Ciro': row['daily_revenue'],
-                'Ortalama Fiş': row['avg_invoice_amount']
-            })
+        headers = ['Tarih', 'Fiş Sayısı', 'Günlük Ciro', 'Ortalama Fiş']
+        if self.engine is not None:
+            rows = ((entry['date'].isoformat(), entry['invoice_count'], entry['revenue'],
+                     self._average(entry['revenue'], entry['invoice_count']))
+                    for entry in self.engine.daily_sales(start_date, end_date))
+            writer.write_sheet('Günlük Özet', headers, rows, progress=progress)
+            return
         
-        conn.close()
-        
-        df = pd.DataFrame(daily_data)
-        df.to_excel(writer, sheet_name='Günlük Özet', index=False)
+        conn = self.db.get_connection(profile="reporting")
+        try:
+            cursor = conn.cursor()
+            
+            cursor.execute("""
+                SELECT 
+                    day as invoice_day,
+                    invoice_count,
+                    total_amount as "daily_revenue [MONEY]",
+                    total_amount * 1.0 / invoice_count as "avg_invoice_amount [MONEY]"
+                FROM daily_sales 
+                WHERE day BETWEEN ? AND ?
+                ORDER BY day
+            """, (day_number(start_date), day_number(end_date)))
+            
+            rows = ((day_from_number(row['invoice_day']).isoformat(), row['invoice_count'],
+                     row['daily_revenue'], row['avg_invoice_amount'])
+                    for row in iter_cursor(cursor))
+            writer.write_sheet('Günlük Özet', headers, rows, progress=progress)
+        finally:
+            conn.close()
     
-    def _export_monthly_summary(self, writer, year: int):
+    def _export_monthly_summary(self, writer, year: int,
+                                progress: Optional[ExportProgress] = None):
         """Aylık özeti Excel'e aktar"""
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            SELECT 
-                strftime('%m', invoice_date) as month,
-                COUNT(*) as invoice_count,
-                SUM(total_amount) as monthly_revenue,
-                AVG(total_amount) as avg_invoice_amount
-            FROM invoices 
-            WHERE strftime('%Y', invoice_date) = ?
-            GROUP BY strftime('%m', invoice_date)
-            ORDER BY month
-        """, (str(year),))
-        
-        monthly_data = []
         month_names = {
             '01': 'Ocak', '02': 'Şubat', '03': 'Mart', '04': 'Nisan',
             '05': 'Mayıs', '06': 'Haziran', '07': 'Temmuz', '08': 'Ağustos',
             '09': 'Eylül', '10': 'Ekim', '11': 'Kasım', '12': 'Aralık'
         }
+        headers = ['Ay', 'Fiş Sayısı', 'Aylık Ciro', 'Ortalama Fiş']
         
-        for row in cursor.fetchall():
-            monthly_data.append({
-                'Ay': month_names.get(row['month'], row['month']),
-                'Fiş Sayısı': row['invoice_count'],
-                'Aylık Ciro': row['monthly_revenue'],
-                'Ortalama Fiş': row['avg_invoice_amount']
-            })
-        
-        conn.close()
+        if self.engine is not None:
+            rows = ((month_names[f"{entry['month']:02d}"], entry['invoice_count'], entry['revenue'],
+                     self._average(entry['revenue'], entry['invoice_count']))
+                    for entry in self.engine.monthly_sales(year))
+            writer.write_sheet('Aylık Özet', headers, rows, progress=progress)
+            return
         
-        df = pd.DataFrame(monthly_data)
-        df.to_excel(writer, sheet_name='Aylık Özet', index=False)
+        conn = self.db.get_connection(profile="reporting")
+        try:
+            cursor = conn.cursor()
+            
+            cursor.execute("""
+                SELECT 
+                    printf('%02d', day / 100 % 100) as month,
+                    SUM(invoice_count) as invoice_count,
+                    SUM(total_amount) as "monthly_revenue [MONEY]",
+                    SUM(total_amount) * 1.0 / SUM(invoice_count) as "avg_invoice_amount [MONEY]"
+                FROM daily_sales 
+                WHERE day BETWEEN ? AND ?
+                GROUP BY day / 100
+                ORDER BY day / 100
+            """, (year * 10000 + 101, year * 10000 + 1231))
+            
+            rows = ((month_names.get(row['month'], row['month']), row['invoice_count'],
+                     row['monthly_revenue'], row['avg_invoice_amount'])
+                    for row in iter_cursor(cursor))
+            writer.write_sheet('Aylık Özet', headers, rows, progress=progress)
+        finally:
+            conn.close()
+    
+    @staticmethod
+    def _elapsed_ms(started: float) -> float:
+        return round((time.perf_counter() - started) * 1000, 1)
+    
+    @classmethod
+    def _timed(cls, timings: Dict[str, float], key: str, func, *args):
+        """func(*args) çalıştır, süresini timings[key]'e (ms) yaz"""
+        started = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            timings[key] = cls._elapsed_ms(started)
+    
+    @staticmethod
+    def _average(revenue: Decimal, count: int) -> Decimal:
+        """Ortalama fiş tutarı (SQL yolundaki MONEY yuvarlamasıyla aynı)"""
+        return (revenue / count).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
     
     def export_invoice_details_to_excel(self, invoice: Invoice, file_path: str):
         """Fiş detaylarını Excel'e aktar"""
@@ -2,10 +2,21 @@
 Veri doğrulama modülü
 """
 import re
-from typing import List, Dict, Any, Optional
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Optional, Tuple
 from decimal import Decimal, InvalidOperation
 from datetime import datetime
 import email_validator
+import numpy as np
+import pandas as pd
+
+# Desenler bir kez derlenir; tekil ve toplu doğrulayıcılar aynı desenleri kullanır
+PHONE_PATTERN = re.compile(r'^(\+90|0)?[5][0-9]{9}$')
+TAX_NUMBER_PATTERN = re.compile(r'^[0-9]{10}$')
+INVOICE_NUMBER_PATTERN = re.compile(r'^\d{8}-\d{3}$')
+USERNAME_PATTERN = re.compile(r'^[a-zA-Z0-9_]+$')
+WHITESPACE_PATTERN = re.compile(r'\s+')
+WHITESPACE_RUN_PATTERN = re.compile(r'\s{2,}|[^\S ]')  # Tek boşluk dışındaki boşluklar
 
 
 class Validators:
@@ -30,8 +41,7 @@ class Validators:
             return True  # Telefon opsiyonel
         
         # Türkiye telefon numarası formatı
-        phone_pattern = r'^(\+90|0)?[5][0-9]{9}$'
-        return bool(re.match(phone_pattern, phone.strip()))
+        return bool(PHONE_PATTERN.match(phone.strip()))
     
     @staticmethod
     def validate_tax_number(tax_number: str) -> bool:
@@ -40,7 +50,7 @@ class Validators:
             return True  # Vergi numarası opsiyonel
         
         # 10 haneli sayı kontrolü
-        if not re.match(r'^\d{10}$', tax_number.strip()):
+        if not TAX_NUMBER_PATTERN.match(tax_number.strip()):
             return False
         
         # Basit kontrol toplamı
@@ -101,8 +111,7 @@ class Validators:
             return False
         
         # Fiş numarası formatı: YYYYMMDD-XXX
-        pattern = r'^\d{8}-\d{3}$'
-        return bool(re.match(pattern, invoice_number.strip()))
+        return bool(INVOICE_NUMBER_PATTERN.match(invoice_number.strip()))
     
     @staticmethod
     def validate_date_range(start_date: datetime, end_date: datetime) -> bool:
@@ -144,7 +153,7 @@ class Validators:
             errors.append("Kullanıcı adı gerekli")
         elif len(username.strip()) < 3:
             errors.append("Kullanıcı adı en az 3 karakter olmalı")
-        elif not re.match(r'^[a-zA-Z0-9_]+$', username.strip()):
+        elif not USERNAME_PATTERN.match(username.strip()):
             errors.append("Kullanıcı adı sadece harf, rakam ve _ içerebilir")
         
         if not password or not password.strip():
@@ -202,7 +211,7 @@ class Validators:
         text = text.strip()
         
         # Çoklu boşlukları tek boşluğa çevir
-        text = re.sub(r'\s+', ' ', text)
+        text = WHITESPACE_PATTERN.sub(' ', text)
         
         return text
     
@@ -229,3 +238,137 @@ class Validators:
             return int(float(quantity))
         except (ValueError, TypeError):
             return None
+
+
+@dataclass
+class ColumnCheck:
+    """Toplu doğrulama sonucu: temizlenmiş sütun ve geçersiz satır maskesi"""
+    values: pd.Series
+    invalid: pd.Series  # bool; True = satır bu sütun yüzünden geçersiz
+    message: str = ""
+
+
+@dataclass
+class BatchResult:
+    """DataFrame doğrulama sonucu"""
+    frame: pd.DataFrame            # Temizlenmiş sütunlar (tüm satırlar)
+    invalid: pd.Series             # Satır başına: herhangi bir kural tuttu mu
+    errors: List[Dict[str, Any]] = field(default_factory=list)  # Satır/sütun bazında hata raporu
+
+    @property
+    def valid_frame(self) -> pd.DataFrame:
+        return self.frame[~self.invalid]
+
+
+class BatchValidators:
+    """
+    Validators kurallarının pandas Series üzerinde çalışan toplu karşılıkları.
+    Her metot satır satır Python döngüsü yerine vektörel metin işlemleri
+    (str.strip, str.len, str.fullmatch) kullanır ve ColumnCheck döndürür.
+    """
+
+    @staticmethod
+    def stripped(series: pd.Series) -> pd.Series:
+        """None/NaN -> '', metne çevirip kırp"""
+        # str erişicisi satır başına ek yük taşıyor; düz liste üzerinde strip belirgin şekilde hızlı
+        return pd.Series([value.strip() for value in series.fillna('').astype(str).tolist()],
+                         index=series.index, dtype=object)
+
+    @classmethod
+    def text(cls, series: pd.Series) -> pd.Series:
+        """sanitize_string karşılığı: kırpma ve çoklu boşluk -> tek boşluk"""
+        values = cls.stripped(series)
+        # Sütun tek metinde bir kez taranır: çift boşluk ya da boşluk dışı bir boşluk karakteri
+        # (sekme, satır sonu, NBSP; isprintable bunları yakalar) yoksa satırlara hiç dokunulmaz
+        joined = '_'.join(values.tolist())
+        if '  ' not in joined and joined.isprintable():
+            return values
+        needs_collapse = values.str.contains(WHITESPACE_RUN_PATTERN, regex=True)
+        if needs_collapse.any():
+            values = values.copy()
+            values[needs_collapse] = values[needs_collapse].str.replace(WHITESPACE_PATTERN, ' ', regex=True)
+        return values
+
+    @classmethod
+    def required_text(cls, series: pd.Series, min_length: int, message: str,
+                      collapse_whitespace: bool = True) -> ColumnCheck:
+        values = cls.text(series) if collapse_whitespace else cls.stripped(series)
+        return ColumnCheck(values, values.str.len() < min_length, message)
+
+    @classmethod
+    def product_code(cls, series: pd.Series) -> ColumnCheck:
+        """validate_product_code: en az 3 karakter (anahtar sütun: yalnızca kırpılır)"""
+        return cls.required_text(series, 3, "Geçersiz ürün kodu (en az 3 karakter)", collapse_whitespace=False)
+
+    @classmethod
+    def product_name(cls, series: pd.Series) -> ColumnCheck:
+        return cls.required_text(series, 1, "Ürün adı gerekli")
+
+    @classmethod
+    def customer_name(cls, series: pd.Series) -> ColumnCheck:
+        """validate_customer_name: en az 2 karakter (ON CONFLICT(name) anahtarı: yalnızca kırpılır)"""
+        return cls.required_text(series, 2, "Geçerli müşteri adı gerekli (en az 2 karakter)",
+                                 collapse_whitespace=False)
+
+    @classmethod
+    def optional_text(cls, series: pd.Series) -> ColumnCheck:
+        values = cls.text(series)
+        return ColumnCheck(values, pd.Series(False, index=series.index))
+
+    @classmethod
+    def tax_number(cls, series: pd.Series) -> ColumnCheck:
+        """
+        Boş olabilir; doluysa 10 rakam olmalı. Yalnızca biçim denetlenir:
+        validate_tax_number'daki kontrol toplamı gerçek VKN algoritması değildir
+        ve geçerli numaraların çoğunu reddeder.
+        """
+        values = cls.stripped(series)
+        well_formed = values.str.fullmatch(TAX_NUMBER_PATTERN).fillna(False).astype(bool)
+        return ColumnCheck(values, (values != '') & ~well_formed, "Geçersiz vergi numarası (10 hane olmalı)")
+
+    @classmethod
+    def phone(cls, series: pd.Series) -> ColumnCheck:
+        """validate_phone: boş olabilir"""
+        values = cls.stripped(series)
+        well_formed = values.str.fullmatch(PHONE_PATTERN).fillna(False).astype(bool)
+        return ColumnCheck(values, (values != '') & ~well_formed, "Geçersiz telefon numarası")
+
+    @classmethod
+    def price(cls, series: pd.Series) -> ColumnCheck:
+        """sanitize_price + validate_price: virgül nokta olur; sayı olmayan veya negatif geçersiz"""
+        numbers = pd.to_numeric(cls.stripped(series).str.replace(',', '.', regex=False), errors='coerce')
+        return ColumnCheck(numbers, numbers.isna() | (numbers < 0), "Geçersiz fiyat")
+
+    @classmethod
+    def quantity(cls, series: pd.Series) -> ColumnCheck:
+        """sanitize_quantity + validate_quantity: tam sayıya kesilir; sıfır/negatif geçersiz"""
+        numbers = pd.to_numeric(cls.stripped(series).str.replace(',', '.', regex=False), errors='coerce')
+        truncated = np.trunc(numbers)
+        invalid = truncated.isna() | (truncated <= 0)
+        return ColumnCheck(truncated.where(~invalid, 0).astype('int64'), invalid, "Geçersiz miktar")
+
+    @staticmethod
+    def validate(df: pd.DataFrame, rules: Dict[str, Any], row_offset: int = 2,
+                 max_errors: Optional[int] = None) -> BatchResult:
+        """
+        DataFrame'i sütun kurallarıyla tek geçişte doğrula.
+        rules: {sütun: BatchValidators metodu}; dosyada olmayan sütun boş kabul edilir.
+        Hata raporundaki 'row', indeks + row_offset'tir (Excel satırı: başlık + 1).
+        """
+        frame = {}
+        invalid = pd.Series(False, index=df.index)
+        errors: List[Dict[str, Any]] = []
+        for column, rule in rules.items():
+            source = df[column] if column in df.columns else pd.Series('', index=df.index, dtype=object)
+            check = rule(source)
+            frame[column] = check.values
+            invalid |= check.invalid
+            if check.invalid.any() and (max_errors is None or len(errors) < max_errors):
+                bad = source[check.invalid]
+                if max_errors is not None:
+                    bad = bad.iloc[:max_errors - len(errors)]
+                for index, value in zip(bad.index, bad):
+                    errors.append({'row': index + row_offset, 'column': column,
+                                   'value': value, 'error': check.message})
+        errors.sort(key=lambda error: error['row'])
+        return BatchResult(pd.DataFrame(frame, index=df.index), invalid, errors)